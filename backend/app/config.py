@@ -21,6 +21,51 @@ class Settings(BaseSettings):
     API_URL: str = os.getenv("API_URL")
     FRONTEND_URL: str = os.getenv("FRONTEND_URL")
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR")
+    CATEGORY_CACHE_TTL_SECONDS: int = int(os.getenv("CATEGORY_CACHE_TTL_SECONDS", "300"))
+    BLOG_CACHE_SIZE: int = int(os.getenv("BLOG_CACHE_SIZE", "1024"))
+    BLOG_CACHE_TTL_SECONDS: int = int(os.getenv("BLOG_CACHE_TTL_SECONDS", "60"))
+    BLOG_ID_CACHE_SIZE: int = int(os.getenv("BLOG_ID_CACHE_SIZE", "65536"))
+    BLOG_ID_CACHE_TTL_SECONDS: int = int(os.getenv("BLOG_ID_CACHE_TTL_SECONDS", "3600"))
+    BLOG_ID_MISS_TTL_SECONDS: int = int(os.getenv("BLOG_ID_MISS_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+    # Analytics ingest settings
+    VIEW_BUFFER_MAX_SIZE: int = int(os.getenv("VIEW_BUFFER_MAX_SIZE", "500"))
+    VIEW_BUFFER_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("VIEW_BUFFER_FLUSH_INTERVAL_SECONDS", "2"))
+    VIEW_BUFFER_MAX_BACKLOG: int = int(os.getenv("VIEW_BUFFER_MAX_BACKLOG", "10000"))
+    ANALYTICS_ROLLUPS_ENABLED: bool = os.getenv("ANALYTICS_ROLLUPS_ENABLED", "True").lower() == "true"
+    # Repeat views of a blog by the same visitor within this window are dropped; 0 disables
+    VIEW_DEDUP_WINDOW_SECONDS: int = int(os.getenv("VIEW_DEDUP_WINDOW_SECONDS", "1800"))
+    VIEW_DEDUP_MAX_KEYS: int = int(os.getenv("VIEW_DEDUP_MAX_KEYS", "200000"))
+    VIEW_BOT_FILTER_ENABLED: bool = os.getenv("VIEW_BOT_FILTER_ENABLED", "True").lower() == "true"
+    VIEW_EVENTS_TIMESERIES: bool = os.getenv("VIEW_EVENTS_TIMESERIES", "False").lower() == "true"
+    # Raw view events older than this are deleted; 0 keeps them forever
+    VIEW_EVENTS_RETENTION_DAYS: int = int(os.getenv("VIEW_EVENTS_RETENTION_DAYS", "0"))
+    # Raw view events older than this are moved to compressed files by archive_view_events.py; 0 disables
+    VIEW_EVENTS_ARCHIVE_AFTER_DAYS: int = int(os.getenv("VIEW_EVENTS_ARCHIVE_AFTER_DAYS", "0"))
+    VIEW_EVENTS_ARCHIVE_DIR: str = os.getenv("VIEW_EVENTS_ARCHIVE_DIR", "archive/view_events")
+
+    # Rate limiting (requests per client per minute for each route class; 0 disables a class)
+    RATE_LIMIT_INGEST_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_INGEST_PER_MINUTE", "120"))
+    RATE_LIMIT_AUTH_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_AUTH_PER_MINUTE", "10"))
+    RATE_LIMIT_LIKE_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_LIKE_PER_MINUTE", "30"))
+    RATE_LIMIT_MAX_BUCKETS: int = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+    # Header a trusted reverse proxy puts the client address in (e.g. X-Forwarded-For); unset uses the peer address
+    TRUSTED_PROXY_HEADER: str = os.getenv("TRUSTED_PROXY_HEADER", "")
+    # Proxies in front of the app that append to TRUSTED_PROXY_HEADER
+    TRUSTED_PROXY_COUNT: int = int(os.getenv("TRUSTED_PROXY_COUNT", "1"))
+    # Requests beyond this many in flight are shed with 503; 0 disables
+    MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "200"))
+
+    # GET /api/metrics requires this value in the X-Metrics-Token header; unset disables the endpoint
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+    # bcrypt runs on its own thread pool; jobs beyond the queue limit are rejected with 503
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
 
     # Email settings
     MAIL_USERNAME: str = os.getenv("MAIL_USERNAME")
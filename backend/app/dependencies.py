@@ -1,22 +1,17 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from bson import ObjectId
 from app.config import settings
-from app.schemas.user import TokenData, UserInDB
-from typing import Optional
+from app.schemas.blog import BlogResponse
+from app.schemas.user import User, UserInDB
+from app.services.user import get_principal
+from app.utils.fields import parse_fields
+from app.utils.security import token_subject
+from typing import Optional, Set
+import hmac
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-
-
-async def get_user_by_id(user_id: str):
-    from app.main import app
-    db = app.mongodb
-    user = await db["users"].find_one({"_id": ObjectId(user_id)})
-    if user:
-        user["id"] = str(user.pop("_id"))  # Convert ObjectId to string and rename _id -> id
-        return UserInDB(**user)
-    return None
+# Same scheme for routes that also serve anonymous callers, which send no Authorization header
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
@@ -25,16 +20,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
+    user_id = token_subject(token)
+    if user_id is None:
         raise credentials_exception
 
-    user = await get_user_by_id(token_data.user_id)
+    user = await get_principal(user_id)
     if user is None:
         raise credentials_exception
     return user
@@ -44,10 +34,55 @@ async def get_current_active_user(current_user: UserInDB = Depends(get_current_u
     return current_user
 
 
-async def get_optional_user(token: Optional[str] = Depends(oauth2_scheme)):
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)):
     if token:
         try:
             return await get_current_user(token)
         except HTTPException:
             return None
-    return None
\ No newline at end of file
+    return None
+
+
+async def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """Guard for operational endpoints: hidden unless METRICS_TOKEN is set, and only for callers presenting it"""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid metrics token"
+        )
+
+
+def include_content(
+        include: Optional[str] = Query(None, description="Comma-separated extras to include, e.g. 'content'")
+) -> bool:
+    """List endpoints return blog summaries unless ``?include=content`` is passed"""
+    return "content" in (include or "").split(",")
+
+
+def _field_selection(fields: Optional[str], allowed) -> Optional[Set[str]]:
+    try:
+        return parse_fields(fields, allowed)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def blog_fields(
+        fields: Optional[str] = Query(None, description="Comma-separated blog fields to return, e.g. 'id,slug,title'")
+) -> Optional[Set[str]]:
+    """Field selection for blog responses; None means every field"""
+    return _field_selection(fields, BlogResponse.model_fields)
+
+
+def user_fields(
+        fields: Optional[str] = Query(None, description="Comma-separated user fields to return, e.g. 'id,name,avatar'")
+) -> Optional[Set[str]]:
+    """Field selection for user responses; None means every field"""
+    return _field_selection(fields, User.model_fields)
@@ -1,11 +1,18 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from motor.motor_asyncio import AsyncIOMotorClient
 import logging
 import os
 from app.config import settings
+from app.dependencies import require_metrics_token
+from app.middleware import RateLimitMiddleware
 from app.routes import auth, users, blogs, comments, uploads, analytics
+from app.services.category import category_registry
+from app.services.ingest import view_buffer
+from app.services.view_store import setup_view_events
+from app.utils.metrics import metrics
+from app.utils.security import password_pool
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +35,9 @@ app = FastAPI(
     openapi_url="/api/openapi.json"
 )
 
+# Rate limiting and load shedding; added first so CORS headers still wrap its 429/503 responses
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Mount static files
@@ -64,6 +75,13 @@ async def startup_db_client():
         await app.mongodb.blogs.create_index("author_id")
         await app.mongodb.blogs.create_index("category_id")
         await app.mongodb.blogs.create_index("published_at")
+        await app.mongodb.blogs.create_index([("published", 1), ("published_at", -1), ("_id", -1)])
+        await app.mongodb.blogs.create_index([
+            ("published", 1),
+            ("category_id", 1),
+            ("published_at", -1),
+            ("_id", -1)
+        ])
         await app.mongodb.blogs.create_index([
             ("title", "text"),
             ("content", "text"),
@@ -72,18 +90,36 @@ async def startup_db_client():
         await app.mongodb.comments.create_index("blog_id")
         await app.mongodb.comments.create_index("user_id")
         await app.mongodb.likes.create_index([("blog_id", 1), ("user_id", 1)], unique=True)
-        await app.mongodb.view_events.create_index("blog_id")
-        await app.mongodb.view_events.create_index("created_at")
+        await setup_view_events(
+            app.mongodb,
+            timeseries=settings.VIEW_EVENTS_TIMESERIES,
+            retention_days=settings.VIEW_EVENTS_RETENTION_DAYS
+        )
+        await app.mongodb.daily_blog_stats.create_index([("blog_id", 1), ("day", 1)], unique=True)
+        await app.mongodb.visitor_sketches.create_index([("blog_id", 1), ("day", 1)], unique=True)
+        await app.mongodb.author_visitor_sketches.create_index([("author_id", 1), ("day", 1)], unique=True)
 
         logger.info("Database connection established and indexes created")
+
+        # Warm the in-memory category registry
+        await category_registry.load(app.mongodb)
+        logger.info(f"Loaded {len(category_registry.categories)} categories")
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
 
+    view_buffer.start()
+
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_db_client():
     if hasattr(app, "mongodb_client"):
+        # Write out buffered view events before the connection goes away
+        await view_buffer.stop()
+        logger.info("View event buffer drained")
+
+        password_pool.shutdown()
+
         app.mongodb_client.close()
         logger.info("Database connection closed")
 
@@ -94,6 +130,12 @@ async def root():
     return {"message": "Welcome to BlogMind API"}
 
 
+# Process-local counters, e.g. views dropped at ingest; only served with METRICS_TOKEN
+@app.get("/api/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def read_metrics():
+    return metrics.snapshot()
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))  # Read PORT from environment (Render sets this)
     import uvicorn
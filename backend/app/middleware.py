@@ -0,0 +1,137 @@
+import math
+import re
+import time
+from typing import List, NamedTuple, Optional
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.rate_limit import TokenBuckets
+from app.utils.security import token_subject
+
+
+class RouteLimit(NamedTuple):
+    name: str
+    method: str
+    path: re.Pattern
+    per_minute: int
+
+
+def route_limits() -> List[RouteLimit]:
+    return [
+        RouteLimit("ingest", "POST", re.compile(r"^/api/analytics/(view/[^/]+|read-progress/[^/]+|events)$"),
+                   settings.RATE_LIMIT_INGEST_PER_MINUTE),
+        RouteLimit("auth", "POST", re.compile(r"^/api/auth/(login|register)$"), settings.RATE_LIMIT_AUTH_PER_MINUTE),
+        RouteLimit("like", "POST", re.compile(r"^/api/blogs/[^/]+/like$"), settings.RATE_LIMIT_LIKE_PER_MINUTE),
+    ]
+
+
+def client_ip(scope: Scope) -> Optional[str]:
+    """Address of the client, taken from TRUSTED_PROXY_HEADER when the app runs behind a proxy.
+
+    With a list-valued header such as X-Forwarded-For, each of the
+    TRUSTED_PROXY_COUNT proxies appends the address it received the request
+    from, so the client is that many entries from the right; anything
+    further left is client-supplied and not trusted.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else None
+    if not settings.TRUSTED_PROXY_HEADER:
+        return peer
+
+    header = settings.TRUSTED_PROXY_HEADER.lower().encode("latin-1")
+    entries = []
+    for name, value in scope["headers"]:
+        if name == header:
+            entries += [entry.strip() for entry in value.decode("latin-1").split(",") if entry.strip()]
+    if len(entries) < settings.TRUSTED_PROXY_COUNT:
+        return peer
+    return entries[-settings.TRUSTED_PROXY_COUNT]
+
+
+def bearer_subject(scope: Scope) -> Optional[str]:
+    """User id of a valid bearer token on the request, if any"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            return token_subject(token)
+    return None
+
+
+class RateLimitMiddleware:
+    """Per-IP and per-user token buckets for expensive or abusable routes, plus a global concurrency cap.
+
+    Each route class allows ``per_minute`` requests, with bursts of the same
+    size, per client IP and, for authenticated requests, per user. Limited
+    requests get 429 with Retry-After. Once MAX_CONCURRENT_REQUESTS requests
+    are in flight further ones get 503 straight away, before they can queue
+    up on the Mongo connection pool.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.limits = [limit for limit in route_limits() if limit.per_minute > 0]
+        self.buckets = TokenBuckets(settings.RATE_LIMIT_MAX_BUCKETS)
+        self.max_concurrent = settings.MAX_CONCURRENT_REQUESTS
+        self.in_flight = 0
+        metrics.gauge("requests_in_flight", lambda: self.in_flight)
+        metrics.gauge("rate_limit_buckets", lambda: len(self.buckets))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            metrics.inc("requests_shed")
+            await self.reject(scope, receive, send, 503, "Server is busy, try again shortly", 1)
+            return
+
+        retry_after = self.check_limits(scope)
+        if retry_after:
+            metrics.inc("requests_rate_limited")
+            await self.reject(scope, receive, send, 429, "Too many requests", retry_after)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    def check_limits(self, scope: Scope) -> float:
+        """Seconds the request has to wait, or 0 if it may proceed.
+
+        A token is only taken once every bucket the request counts against
+        has one, so a request refused by its user's bucket doesn't also use
+        up its IP's allowance, or the other way round.
+        """
+        for limit in self.limits:
+            if scope["method"] != limit.method or not limit.path.match(scope["path"]):
+                continue
+
+            rate = limit.per_minute / 60
+            keys = [("ip", limit.name, client_ip(scope))]
+            user_id = bearer_subject(scope)
+            if user_id:
+                keys.append(("user", limit.name, user_id))
+
+            now = time.monotonic()
+            wait = max(self.buckets.peek(key, rate, limit.per_minute, now) for key in keys)
+            if wait:
+                return wait
+            for key in keys:
+                self.buckets.take(key, rate, limit.per_minute, now)
+            return 0
+        return 0
+
+    @staticmethod
+    async def reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str, retry_after: float):
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+        await response(scope, receive, send)
@@ -11,6 +11,7 @@ class ViewEvent(BaseModel):
     ip_address: str
     user_agent: str
     referrer: Optional[str] = None
+    referrer_domain: Optional[str] = None
     country: Optional[str] = None
     device: Optional[str] = None
     read_percentage: Optional[int] = None
@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
 from typing import Optional
 from app.dependencies import get_current_active_user, get_optional_user
+from app.middleware import client_ip
 from app.schemas.user import UserInDB
-from app.schemas.analytics import PostAnalytics, UserAnalytics
-from app.services.analytics import record_view, update_read_percentage, get_post_analytics, get_user_analytics
-from app.services.blog import get_blog_by_slug
+from app.schemas.analytics import BeaconBatch, BeaconResult, PostAnalytics, UserAnalytics
+from app.services.analytics import (
+    record_events, record_view, update_read_percentage, get_post_analytics, get_user_analytics
+)
+from app.services.blog import get_blog_view, resolve_blog_id
 
 router = APIRouter()
 
+beacon_batch = TypeAdapter(BeaconBatch)
+
 
 @router.post("/view/{slug}", status_code=status.HTTP_200_OK)
 async def record_blog_view(
@@ -19,20 +26,20 @@ async def record_blog_view(
         current_user: Optional[UserInDB] = Depends(get_optional_user)
 ):
     """Record a blog view"""
-    blog = await get_blog_by_slug(slug)
-    if not blog:
+    blog_id = await resolve_blog_id(slug)
+    if not blog_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog post not found"
         )
 
     # Get client IP and user agent
-    ip_address = request.client.host
+    ip_address = client_ip(request.scope)
     user_agent = request.headers.get("user-agent", "")
 
     # Record view
-    await record_view(
-        blog_id=blog.id,
+    view_token = await record_view(
+        blog_id=str(blog_id),
         user_id=current_user.id if current_user else None,
         ip_address=ip_address,
         user_agent=user_agent,
@@ -41,46 +48,70 @@ async def record_blog_view(
         device=device
     )
 
-    return {"message": "View recorded successfully"}
+    return {"message": "View recorded successfully", "view_token": view_token}
 
 
 @router.post("/read-progress/{slug}", status_code=status.HTTP_200_OK)
 async def record_read_progress(
         slug: str,
         request: Request,
-        read_percentage: int,
+        read_percentage: int = Query(..., ge=0, le=100),
+        view_token: Optional[str] = None,
         current_user: Optional[UserInDB] = Depends(get_optional_user)
 ):
     """Record reading progress for a blog post"""
-    blog = await get_blog_by_slug(slug)
-    if not blog:
+    blog_id = await resolve_blog_id(slug)
+    if not blog_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog post not found"
         )
 
     # Get client IP
-    ip_address = request.client.host
+    ip_address = client_ip(request.scope)
 
     # Update read percentage
     await update_read_percentage(
-        blog_id=blog.id,
+        blog_id=str(blog_id),
         user_id=current_user.id if current_user else None,
         ip_address=ip_address,
-        read_percentage=read_percentage
+        read_percentage=read_percentage,
+        view_token=view_token
     )
 
     return {"message": "Read progress recorded successfully"}
 
 
+@router.post("/events", response_model=BeaconResult, status_code=status.HTTP_200_OK)
+async def record_analytics_events(
+        request: Request,
+        current_user: Optional[UserInDB] = Depends(get_optional_user)
+):
+    """Record a batch of view and read-progress events, e.g. sent with navigator.sendBeacon"""
+    # sendBeacon posts strings as text/plain, so the body is parsed whatever its content type
+    try:
+        events = beacon_batch.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+    return await record_events(
+        events,
+        user_id=current_user.id if current_user else None,
+        ip_address=client_ip(request.scope),
+        user_agent=request.headers.get("user-agent", "")
+    )
+
+
 @router.get("/blog/{slug}", response_model=PostAnalytics)
 async def get_blog_analytics(
         slug: str,
         days: int = Query(30, ge=1, le=365),
+        tz_offset: int = Query(0, ge=-720, le=840, description="Author's UTC offset in minutes"),
+        granularity: str = Query("auto", pattern="^(auto|day|week|month)$"),
         current_user: UserInDB = Depends(get_current_active_user)
 ):
     """Get analytics for a specific blog post"""
-    blog = await get_blog_by_slug(slug)
+    blog, _ = await get_blog_view(slug)
     if not blog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,15 +125,17 @@ async def get_blog_analytics(
             detail="You don't have permission to view these analytics"
         )
 
-    analytics = await get_post_analytics(blog.id, days)
+    analytics = await get_post_analytics(blog.id, days, tz_offset, granularity)
     return analytics
 
 
 @router.get("/user", response_model=UserAnalytics)
 async def get_user_analytics_endpoint(
         days: int = Query(30, ge=1, le=365),
+        tz_offset: int = Query(0, ge=-720, le=840, description="Author's UTC offset in minutes"),
+        granularity: str = Query("auto", pattern="^(auto|day|week|month)$"),
         current_user: UserInDB = Depends(get_current_active_user)
 ):
     """Get analytics for the current user"""
-    analytics = await get_user_analytics(current_user.id, days)
+    analytics = await get_user_analytics(current_user.id, days, tz_offset, granularity)
     return analytics
\ No newline at end of file
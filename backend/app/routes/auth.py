@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from app.schemas.user import UserCreate, Token
-from app.services.auth import register_user, authenticate_user
+from app.services.auth import register_user, authenticate_user, issue_token
 
 router = APIRouter()
 
@@ -11,9 +11,8 @@ async def register(user_in: UserCreate):
     """Register a new user"""
     user = await register_user(user_in)
 
-    # Authenticate user after registration
-    token = await authenticate_user(user_in.email, user_in.password)
-    return token
+    # The password was just set, so no need to verify it again
+    return issue_token(user)
 
 
 @router.post("/login", response_model=Token)
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Optional
-from app.schemas.blog import BlogCreate, BlogUpdate, BlogResponse, Category
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from typing import List, Optional, Set, Union
+from app.schemas.blog import BlogCreate, BlogUpdate, BlogResponse, BlogSummary, Category
 from app.services.blog import (
-    create_blog, update_blog, delete_blog, get_blog_by_slug,
-    get_blogs, like_blog, get_categories
+    create_blog, update_blog, delete_blog, get_blog_view,
+    get_blogs, like_blog
 )
-from app.dependencies import get_current_active_user, get_optional_user
+from app.services.category import get_categories_with_etag
+from app.dependencies import get_current_active_user, get_optional_user, include_content, blog_fields
 from app.schemas.user import UserInDB
+from app.utils.cache import etag_matches
+from app.utils.fields import trimmed_response
 
 router = APIRouter()
 
@@ -19,41 +22,73 @@ async def create_blog_post(
     blog = await create_blog(blog_in, current_user.id)
     return blog
 
-@router.get("", response_model=List[BlogResponse])
+@router.get("", response_model=List[Union[BlogResponse, BlogSummary]])
 async def read_blogs(
+    response: Response,
     search: Optional[str] = None,
     category: Optional[str] = None,
     tag: Optional[str] = None,
     sort: Optional[str] = "desc",
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    with_content: bool = Depends(include_content),
+    fields: Optional[Set[str]] = Depends(blog_fields),
     current_user: Optional[UserInDB] = Depends(get_optional_user)
 ):
-    """Get all blogs with optional filtering"""
-    blogs = await get_blogs(
+    """Get all blogs with optional filtering.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch the next page.
+    """
+    blogs, next_cursor = await get_blogs(
         search=search,
         category=category,
         tag=tag,
         sort=sort,
         skip=skip,
         limit=limit,
-        user_id=current_user.id if current_user else None
+        user_id=current_user.id if current_user else None,
+        cursor=cursor,
+        include_content=with_content,
+        fields=fields
     )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if fields:
+        return trimmed_response(blogs, fields, headers)
+
+    response.headers.update(headers)
     return blogs
 
 @router.get("/categories", response_model=List[Category])
-async def read_categories():
+async def read_categories(request: Request, response: Response):
     """Get all categories"""
-    categories = await get_categories()
+    categories, etag = await get_categories_with_etag()
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return categories
 
 @router.get("/{slug}", response_model=BlogResponse)
 async def read_blog(
     slug: str,
+    request: Request,
+    response: Response,
+    fields: Optional[Set[str]] = Depends(blog_fields),
     current_user: Optional[UserInDB] = Depends(get_optional_user)
 ):
     """Get a blog post by slug"""
-    blog = await get_blog_by_slug(slug, current_user.id if current_user else None)
+    blog, etag = await get_blog_view(slug, current_user.id if current_user else None, fields)
+
+    # is_liked depends on who is asking
+    headers = {"ETag": etag, "Vary": "Authorization"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if fields:
+        return trimmed_response(blog, fields, headers)
+
+    response.headers.update(headers)
     return blog
 
 @router.put("/{blog_id}", response_model=BlogResponse)
@@ -1,44 +1,65 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from app.schemas.user import User, UserUpdate
-from app.schemas.blog import BlogResponse
+from app.schemas.blog import BlogResponse, BlogSummary
 from app.services.user import get_user_by_id, update_user
 from app.services.blog import get_user_blogs, get_liked_blogs
 from app.services.comment import get_user_comments
-from app.dependencies import get_current_active_user
+from app.dependencies import get_current_active_user, include_content, blog_fields, user_fields
+from app.utils.fields import trimmed_response
 from app.schemas.user import UserInDB
-from typing import List
+from typing import List, Optional, Set, Union
 from bson import ObjectId
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: UserInDB = Depends(get_current_active_user)):
+async def read_users_me(
+        fields: Optional[Set[str]] = Depends(user_fields),
+        current_user: UserInDB = Depends(get_current_active_user)
+):
     """Get current user"""
+    if fields:
+        return trimmed_response(current_user, fields)
     return current_user
 
 
 @router.put("/me", response_model=User)
 async def update_user_me(
         user_update: UserUpdate,
+        fields: Optional[Set[str]] = Depends(user_fields),
         current_user: UserInDB = Depends(get_current_active_user)
 ):
     """Update current user"""
     updated_user = await update_user(current_user.id, user_update)
+    if fields:
+        return trimmed_response(updated_user, fields)
     return updated_user
 
 
-@router.get("/blogs", response_model=List[BlogResponse])
-async def read_user_blogs(current_user: UserInDB = Depends(get_current_active_user)):
+@router.get("/blogs", response_model=List[Union[BlogResponse, BlogSummary]])
+async def read_user_blogs(
+        with_content: bool = Depends(include_content),
+        fields: Optional[Set[str]] = Depends(blog_fields),
+        current_user: UserInDB = Depends(get_current_active_user)
+):
     """Get blogs by current user"""
-    blogs = await get_user_blogs(str(current_user.id))
+    blogs = await get_user_blogs(str(current_user.id), include_content=with_content, fields=fields)
+    if fields:
+        return trimmed_response(blogs, fields)
     return blogs
 
 
-@router.get("/liked", response_model=List[BlogResponse])
-async def read_liked_blogs(current_user: UserInDB = Depends(get_current_active_user)):
+@router.get("/liked", response_model=List[Union[BlogResponse, BlogSummary]])
+async def read_liked_blogs(
+        with_content: bool = Depends(include_content),
+        fields: Optional[Set[str]] = Depends(blog_fields),
+        current_user: UserInDB = Depends(get_current_active_user)
+):
     """Get blogs liked by current user"""
-    blogs = await get_liked_blogs(str(current_user.id))
+    blogs = await get_liked_blogs(str(current_user.id), include_content=with_content, fields=fields)
+    if fields:
+        return trimmed_response(blogs, fields)
     return blogs
 
 
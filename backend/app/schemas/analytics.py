@@ -1,5 +1,5 @@
-from typing import List, Dict, Any
-from pydantic import BaseModel
+from typing import Annotated, List, Dict, Any, Literal, Optional, Union
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 class TimelinePoint(BaseModel):
@@ -26,14 +26,41 @@ class PostAnalytics(BaseModel):
     devices: List[DeviceData]
     countries: List[CountryData]
     read_time: Dict[str, Any]
+    unique_visitors: int = 0
+    granularity: str = "day"
 
 class UserAnalytics(BaseModel):
     total_posts: int
     total_views: int
     total_likes: int
     total_comments: int
+    unique_visitors: int = 0
     posts_timeline: List[TimelinePoint]
     views_timeline: List[TimelinePoint]
     likes_timeline: List[TimelinePoint]
     comments_timeline: List[TimelinePoint]
-    top_posts: List[Dict[str, Any]]
\ No newline at end of file
+    top_posts: List[Dict[str, Any]]
+    granularity: str = "day"
+
+class ViewBeaconEvent(BaseModel):
+    type: Literal["view"]
+    slug: str
+    referrer: Optional[str] = None
+    country: Optional[str] = None
+    device: Optional[str] = None
+
+class ProgressBeaconEvent(BaseModel):
+    type: Literal["progress"]
+    slug: str
+    read_percentage: int = Field(ge=0, le=100)
+    view_token: Optional[str] = None
+
+BeaconEvent = Annotated[Union[ViewBeaconEvent, ProgressBeaconEvent], Field(discriminator="type")]
+
+# One page's worth of pings; larger batches are rejected as a whole
+BeaconBatch = Annotated[List[BeaconEvent], Field(max_length=100)]
+
+class BeaconResult(BaseModel):
+    accepted: int
+    # One entry per submitted event: the view token for recorded views, otherwise null
+    view_tokens: List[Optional[str]]
@@ -38,11 +38,18 @@ class BlogUpdate(BaseModel):
     cover_image: Optional[str] = None
     published: Optional[bool] = None
 
-class BlogResponse(BlogBase):
+class BlogSummary(BaseModel):
+    """A blog as shown in list views: everything except the full content"""
     id: str
+    title: str
     slug: str
+    excerpt: str
     author: User
+    category_id: str
     category: Category
+    tags: List[str] = []
+    cover_image: Optional[str] = None
+    published: bool = True
     views_count: int
     likes_count: int
     comments_count: int
@@ -51,6 +58,9 @@ class BlogResponse(BlogBase):
     created_at: datetime
     updated_at: datetime
 
+class BlogResponse(BlogSummary):
+    content: str
+
 
 class LikeResponse(BaseModel):
     blog_id: str
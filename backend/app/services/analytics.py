@@ -1,8 +1,38 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from bson import ObjectId
 from fastapi import FastAPI
-from app.schemas.analytics import PostAnalytics, UserAnalytics, TimelinePoint, SourceData, DeviceData, CountryData
+from pymongo import ReturnDocument, UpdateOne
+from app.config import settings
+from app.schemas.analytics import (
+    BeaconEvent, BeaconResult, PostAnalytics, UserAnalytics, ViewBeaconEvent, SourceData, DeviceData, CountryData
+)
+from app.services.archive import archive_horizon, iter_archived_events
+from app.services.blog import resolve_blog_ids
+from app.services.ingest import view_buffer
+from app.services.rollups import (
+    COMPLETION_THRESHOLD, day_start, decode_key, find_rollups, local_day_split, record_read_progress,
+    record_read_progress_many, referrer_domain, referrer_source, slot_day_shift, snap_tz_offset
+)
+from app.services.view_store import view_event_filter
+from app.services.visitors import count_author_visitors, count_unique_visitors
+from app.utils.dedup import RecentKeys
+from app.utils.metrics import metrics
+from app.utils.timeline import EPOCH, Timeline, epoch_day, timeline_unit
+from app.utils.top_posts import rank_top_posts
+from app.utils.user_agent import classify_device
+
+# (blog, visitor, user-agent hash) -> view token of views recorded within the dedup window
+recent_views = RecentKeys(settings.VIEW_DEDUP_WINDOW_SECONDS, settings.VIEW_DEDUP_MAX_KEYS)
+metrics.gauge("view_dedup_keys", lambda: len(recent_views))
+
+
+def view_dedup_key(blog_id: str, user_id: Optional[str], ip_address: str, user_agent: str) -> tuple:
+    user_agent_hash = hashlib.blake2b(user_agent.encode(), digest_size=8).digest()
+    return blog_id, user_id or ip_address, user_agent_hash
 
 
 async def record_view(
@@ -13,31 +43,80 @@ async def record_view(
         referrer: Optional[str] = None,
         country: Optional[str] = None,
         device: Optional[str] = None
-) -> bool:
-    from app.main import app
-    db = app.mongodb
+) -> Optional[str]:
+    """Queue a view event; it is written, and views_count bumped, by the next buffer flush.
+
+    The referrer domain and device class are derived here once, so analytics
+    can group on them directly. ``device`` from the client is only used when
+    there is no user agent to classify. Returns the event id, which the
+    client sends back as its view token with read-progress updates.
+
+    Bot views are dropped (returning None), and so are repeat views by the
+    same visitor within VIEW_DEDUP_WINDOW_SECONDS, which return the token of
+    the view that was counted.
+    """
+    device_class = classify_device(user_agent)
+    if settings.VIEW_BOT_FILTER_ENABLED and device_class == "bot":
+        metrics.inc("views_dropped_bot")
+        return None
+
+    dedup_key = view_dedup_key(blog_id, user_id, ip_address, user_agent)
+    if settings.VIEW_DEDUP_WINDOW_SECONDS:
+        view_token = recent_views.get(dedup_key)
+        if view_token is not None:
+            metrics.inc("views_dropped_duplicate")
+            return view_token
 
-    # Create view event
     view_event = {
+        "_id": ObjectId(),
         "blog_id": ObjectId(blog_id),
         "user_id": ObjectId(user_id) if user_id else None,
         "ip_address": ip_address,
         "user_agent": user_agent,
         "referrer": referrer,
+        "referrer_domain": referrer_domain(referrer),
         "country": country,
-        "device": device,
+        "device": device if device_class == "unknown" and device else device_class,
         "created_at": datetime.utcnow()
     }
 
-    # Insert view event
-    await db.view_events.insert_one(view_event)
+    view_buffer.enqueue(view_event)
+    metrics.inc("views_recorded")
+
+    view_token = str(view_event["_id"])
+    if settings.VIEW_DEDUP_WINDOW_SECONDS:
+        recent_views.add(dedup_key, view_token)
+    return view_token
+
+
+def progress_query(
+        blog_id: ObjectId,
+        user_id: Optional[str],
+        ip_address: str,
+        view_token: Optional[str]
+) -> Tuple[dict, Optional[list]]:
+    """Filter and sort selecting the view a read-progress update applies to.
+
+    With a token the filter is ``{_id, blog_id}``, which also matches events
+    still in the ingest buffer; stored events are looked up with view_event_filter.
+    """
+    if view_token and ObjectId.is_valid(view_token):
+        return {"_id": ObjectId(view_token), "blog_id": blog_id}, None
+    # Served by the (blog_id, ip_address, user_id, created_at) index
+    query = {
+        "blog_id": blog_id,
+        "ip_address": ip_address,
+        "user_id": ObjectId(user_id) if user_id else None
+    }
+    return query, [("created_at", -1)]
 
-    # Update blog views count
-    await db.blogs.update_one(
-        {"_id": ObjectId(blog_id)},
-        {"$inc": {"views_count": 1}}
-    )
 
+def update_pending_progress(query: dict, read_percentage: int) -> bool:
+    """Apply a read-progress update to a view still in the ingest buffer, if it is there"""
+    pending = view_buffer.find_pending(lambda event: all(event.get(key) == value for key, value in query.items()))
+    if pending is None:
+        return False
+    pending["read_percentage"] = max(pending.get("read_percentage") or 0, read_percentage)
     return True
 
 
@@ -45,159 +124,554 @@ async def update_read_percentage(
         blog_id: str,
         user_id: Optional[str],
         ip_address: str,
-        read_percentage: int
+        read_percentage: int,
+        view_token: Optional[str] = None
 ) -> bool:
+    """Raise the read percentage of a view; it never goes down.
+
+    With a view token this is a single update of that event. Without one the
+    reader's most recent view of the blog is updated.
+    """
     from app.main import app
     db = app.mongodb
 
-    # Find the most recent view event for this blog and user/IP
-    query = {
-        "blog_id": ObjectId(blog_id),
-        "ip_address": ip_address
-    }
+    query, sort = progress_query(ObjectId(blog_id), user_id, ip_address, view_token)
 
-    if user_id:
-        query["user_id"] = ObjectId(user_id)
+    # The view may not have been flushed yet
+    if update_pending_progress(query, read_percentage):
+        return True
+
+    if "_id" in query:
+        query = view_event_filter(query["_id"], query["blog_id"])
 
-    view_event = await db.view_events.find_one(
+    # The previous document is returned so the rollup can be moved by the difference
+    view_event = await db.view_events.find_one_and_update(
         query,
-        sort=[("created_at", -1)]
+        {"$max": {"read_percentage": read_percentage}},
+        projection={"blog_id": 1, "created_at": 1, "read_percentage": 1},
+        sort=sort,
+        return_document=ReturnDocument.BEFORE
     )
+    if not view_event:
+        return False
+
+    previous = view_event.get("read_percentage")
+    if settings.ANALYTICS_ROLLUPS_ENABLED and (previous is None or read_percentage > previous):
+        await record_read_progress(db, view_event, read_percentage)
+    return True
+
+
+async def update_read_percentages(
+        progress: List[Tuple[ObjectId, Optional[str], int]],
+        user_id: Optional[str],
+        ip_address: str
+) -> int:
+    """Apply a batch of (blog_id, view_token, read_percentage) updates from one reader.
+
+    Old values are read with one query and all updates are written with one
+    bulk_write. Returns the number of updates that found their view.
+    """
+    from app.main import app
+    db = app.mongodb
 
-    if view_event:
-        # Update read percentage
-        await db.view_events.update_one(
-            {"_id": view_event["_id"]},
-            {"$set": {"read_percentage": read_percentage}}
+    applied = 0
+    # Stored view event id -> (blog_id, highest percentage in the batch)
+    targets: Dict[ObjectId, Tuple[ObjectId, int]] = {}
+    tokenless: Dict[ObjectId, int] = {}
+    for blog_id, view_token, read_percentage in progress:
+        query, _ = progress_query(blog_id, user_id, ip_address, view_token)
+        if update_pending_progress(query, read_percentage):
+            applied += 1
+        elif "_id" in query:
+            previous = targets.get(query["_id"], (blog_id, 0))[1]
+            targets[query["_id"]] = (blog_id, max(previous, read_percentage))
+        else:
+            tokenless[blog_id] = max(tokenless.get(blog_id, 0), read_percentage)
+
+    # The reader's latest view of each blog updated without a token
+    latest = await asyncio.gather(*(
+        db.view_events.find_one(query, {"_id": 1}, sort=sort)
+        for query, sort in (progress_query(blog_id, user_id, ip_address, None) for blog_id in tokenless)
+    ))
+    for (blog_id, read_percentage), view_event in zip(tokenless.items(), latest):
+        if view_event:
+            previous = targets.get(view_event["_id"], (blog_id, 0))[1]
+            targets[view_event["_id"]] = (blog_id, max(previous, read_percentage))
+
+    if not targets:
+        return applied
+
+    view_events = await db.view_events.find(
+        {"$or": [view_event_filter(view_id, blog_id) for view_id, (blog_id, _) in targets.items()]},
+        {"blog_id": 1, "created_at": 1, "read_percentage": 1}
+    ).to_list(length=None)
+
+    updates = []
+    changes = []
+    for view_event in view_events:
+        blog_id, read_percentage = targets[view_event["_id"]]
+        if view_event["blog_id"] != blog_id:
+            continue
+        updates.append(UpdateOne(
+            view_event_filter(view_event["_id"], blog_id, view_event["created_at"]),
+            {"$max": {"read_percentage": read_percentage}}
+        ))
+        previous = view_event.get("read_percentage")
+        if previous is None or read_percentage > previous:
+            changes.append((view_event, read_percentage))
+
+    if updates:
+        await db.view_events.bulk_write(updates, ordered=False)
+        # Old values were read before the write, so a concurrent update of the same view can skew the rollup slightly
+        if settings.ANALYTICS_ROLLUPS_ENABLED:
+            await record_read_progress_many(db, changes)
+    return applied + len(updates)
+
+
+async def record_events(
+        events: List[BeaconEvent],
+        user_id: Optional[str],
+        ip_address: str,
+        user_agent: str
+) -> BeaconResult:
+    """Record a client's batch of view and read-progress events.
+
+    Slugs are resolved together, views go to the ingest buffer and progress
+    updates are applied afterwards as one batch, so they can also land on
+    views from earlier in the same batch.
+    """
+    blog_ids = await resolve_blog_ids(event.slug for event in events)
+
+    view_tokens: List[Optional[str]] = [None] * len(events)
+    progress = []
+    for i, event in enumerate(events):
+        blog_id = blog_ids[event.slug]
+        if blog_id is None:
+            continue
+        if isinstance(event, ViewBeaconEvent):
+            view_tokens[i] = await record_view(
+                blog_id=str(blog_id),
+                user_id=user_id,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                referrer=event.referrer,
+                country=event.country,
+                device=event.device
+            )
+        else:
+            progress.append((blog_id, event.view_token, event.read_percentage))
+
+    accepted = sum(token is not None for token in view_tokens)
+    if progress:
+        accepted += await update_read_percentages(progress, user_id, ip_address)
+    return BeaconResult(accepted=accepted, view_tokens=view_tokens)
+
+
+class PostTotals:
+    """Counts behind a PostAnalytics response, accumulated from daily rollups or raw documents"""
+
+    def __init__(self):
+        self.views = Counter()
+        self.likes = Counter()
+        self.comments = Counter()
+        self.sources = Counter()
+        self.devices = Counter()
+        self.countries = Counter()
+        self.read_count = 0
+        self.read_sum = 0
+        self.read_completed = 0
+        self.unique_visitors = 0
+
+    def add_rollup(self, rollup: dict, tz_offset: int = 0):
+        # Rollup days are UTC days; in other time zones the timeline counters are taken from their slots
+        day = epoch_day(rollup["day"])
+        for counter, field in ((self.views, "views"), (self.likes, "likes"), (self.comments, "comments")):
+            if not tz_offset:
+                counter[day] += rollup.get(field, 0)
+                continue
+            for slot, count in rollup.get("slots", {}).get(field, {}).items():
+                counter[day + slot_day_shift(int(slot), tz_offset)] += count
+        for counter, field in ((self.sources, "sources"), (self.devices, "devices"), (self.countries, "countries")):
+            for key, count in rollup.get(field, {}).items():
+                counter[decode_key(key)] += count
+
+        read = rollup.get("read", {})
+        self.read_count += read.get("count", 0)
+        self.read_sum += read.get("sum", 0)
+        self.read_completed += read.get("completed", 0)
+
+    def add_view_event(self, event: dict, tz_offset: int = 0):
+        self.views[epoch_day(event["created_at"], tz_offset)] += 1
+        self.sources[referrer_source(event)] += 1
+        self.devices[event.get("device") or "unknown"] += 1
+        if event.get("country"):
+            self.countries[event["country"]] += 1
+
+        if event.get("read_percentage") is not None:
+            self.read_count += 1
+            self.read_sum += event["read_percentage"]
+            self.read_completed += event["read_percentage"] >= COMPLETION_THRESHOLD
+
+    def to_analytics(self, timeline: Timeline) -> PostAnalytics:
+        avg_read_percentage = self.read_sum / self.read_count if self.read_count else 0
+        completion_rate = self.read_completed / self.read_count * 100 if self.read_count else 0
+
+        return PostAnalytics(
+            views={
+                "total": sum(self.views.values()),
+                "timeline": timeline.points(timeline.fold(self.views))
+            },
+            likes={
+                "total": sum(self.likes.values()),
+                "timeline": timeline.points(timeline.fold(self.likes))
+            },
+            comments={
+                "total": sum(self.comments.values()),
+                "timeline": timeline.points(timeline.fold(self.comments))
+            },
+            sources=[SourceData(source=source, count=count) for source, count in self.sources.items() if count],
+            devices=[DeviceData(device=device, count=count) for device, count in self.devices.items() if count],
+            countries=[CountryData(country=country, count=count) for country, count in self.countries.items() if count],
+            read_time={
+                "average_percentage": avg_read_percentage,
+                "completion_rate": completion_rate
+            },
+            unique_visitors=self.unique_visitors,
+            granularity=timeline.unit
         )
-        return True
 
-    return False
+
+def use_rollups() -> bool:
+    return settings.ANALYTICS_ROLLUPS_ENABLED
+
+
+def analytics_tz_offset(tz_offset: int) -> int:
+    """The offset timelines are bucketed with: rollups resolve local days to their slot grid"""
+    return snap_tz_offset(tz_offset) if use_rollups() else tz_offset
 
 
-async def get_post_analytics(blog_id: str, days: int = 30) -> PostAnalytics:
+async def add_post_totals(
+        db,
+        totals: PostTotals,
+        blog_id: ObjectId,
+        start_date: datetime,
+        end_date: datetime,
+        tz_offset: int = 0
+):
+    if use_rollups():
+        # One pre-aggregated document per day in the window
+        for rollup in await find_rollups(db, [blog_id], start_date, end_date):
+            totals.add_rollup(rollup, tz_offset)
+    else:
+        await add_raw_post_totals(db, totals, blog_id, start_date, end_date, tz_offset)
+
+
+async def get_post_analytics(
+        blog_id: str,
+        days: int = 30,
+        tz_offset: int = 0,
+        granularity: str = "auto"
+) -> PostAnalytics:
     from app.main import app
     db = app.mongodb
 
     # Calculate date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
+    tz_offset = analytics_tz_offset(tz_offset)
 
     # Get blog
-    blog = await db.blogs.find_one({"_id": ObjectId(blog_id)})
+    blog = await db.blogs.find_one({"_id": ObjectId(blog_id)}, {"_id": 1})
     if not blog:
         return None
 
-    # Get view events for this blog
-    view_events = await db.view_events.find({
-        "blog_id": ObjectId(blog_id),
-        "created_at": {"$gte": start_date, "$lte": end_date}
-    }).to_list(length=None)
+    totals = PostTotals()
+    # Visitor sketches are per UTC day, whatever the timeline's offset
+    _, totals.unique_visitors = await asyncio.gather(
+        add_post_totals(db, totals, blog["_id"], start_date, end_date, tz_offset),
+        count_unique_visitors(db, [blog["_id"]], start_date, end_date)
+    )
 
-    # Get likes for this blog
-    likes = await db.likes.find({
-        "blog_id": ObjectId(blog_id),
-        "created_at": {"$gte": start_date, "$lte": end_date}
-    }).to_list(length=None)
+    unit = timeline_unit(granularity, start_date, end_date)
+    return totals.to_analytics(Timeline(start_date, end_date, unit, tz_offset))
+
+
+# Host part of an absolute referrer URL, for events recorded before referrer_domain was stored
+REFERRER_HOST_REGEX = "^[A-Za-z][A-Za-z0-9+.-]*://([^/?#]+)"
+
+
+def epoch_day_expr(field: str, tz_offset: int = 0) -> dict:
+    """Mongo expression for the local epoch day of a date field, matching Timeline.day"""
+    origin = EPOCH - timedelta(minutes=tz_offset)
+    return {"$toInt": {"$floor": {"$divide": [{"$subtract": [field, origin]}, 86400000]}}}
+
+
+def view_event_facets(tz_offset: int = 0) -> dict:
+    """$facet stage computing every post analytics breakdown of view events server-side"""
+    legacy_referrer_host = {"$let": {
+        "vars": {"match": {"$regexFind": {"input": {"$ifNull": ["$referrer", ""]}, "regex": REFERRER_HOST_REGEX}}},
+        "in": {"$arrayElemAt": ["$$match.captures", 0]}
+    }}
+    source = {"$cond": [
+        {"$eq": [{"$type": "$referrer_domain"}, "missing"]},
+        {"$ifNull": [legacy_referrer_host, "direct"]},
+        {"$ifNull": ["$referrer_domain", "direct"]}
+    ]}
+    return {"$facet": {
+        "timeline": [
+            {"$group": {"_id": epoch_day_expr("$created_at", tz_offset), "count": {"$sum": 1}}}
+        ],
+        "sources": [
+            {"$group": {
+                "_id": source,
+                "count": {"$sum": 1}
+            }}
+        ],
+        "devices": [
+            {"$group": {"_id": {"$ifNull": ["$device", "unknown"]}, "count": {"$sum": 1}}}
+        ],
+        "countries": [
+            {"$match": {"country": {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$country", "count": {"$sum": 1}}}
+        ],
+        "read": [
+            {"$match": {"read_percentage": {"$ne": None}}},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "sum": {"$sum": "$read_percentage"},
+                "completed": {"$sum": {"$cond": [{"$gte": ["$read_percentage", COMPLETION_THRESHOLD]}, 1, 0]}}
+            }}
+        ]
+    }}
+
+
+def daily_counts_pipeline(match: dict, tz_offset: int = 0) -> List[dict]:
+    return [
+        {"$match": match},
+        {"$group": {"_id": epoch_day_expr("$created_at", tz_offset), "count": {"$sum": 1}}}
+    ]
 
-    # Get comments for this blog
-    comments = await db.comments.find({
-        "blog_id": ObjectId(blog_id),
-        "created_at": {"$gte": start_date, "$lte": end_date}
-    }).to_list(length=None)
-
-    # Generate timeline data
-    views_timeline = generate_timeline(view_events, start_date, end_date)
-    likes_timeline = generate_timeline(likes, start_date, end_date)
-    comments_timeline = generate_timeline(comments, start_date, start_date, end_date)
-    comments_timeline = generate_timeline(comments, start_date, end_date)
-
-    # Calculate sources
-    sources = {}
-    for event in view_events:
-        referrer = event.get("referrer", "direct")
-        if not referrer:
-            referrer = "direct"
-
-        # Extract domain from referrer
-        if referrer != "direct":
-            from urllib.parse import urlparse
-            try:
-                domain = urlparse(referrer).netloc
-                referrer = domain if domain else "direct"
-            except:
-                referrer = "direct"
-
-        sources[referrer] = sources.get(referrer, 0) + 1
-
-    sources_data = [SourceData(source=source, count=count) for source, count in sources.items()]
-
-    # Calculate devices
-
-    devices = {}
-    for event in view_events:
-        device = event.get("device") or "unknown"  # Ensure a fallback value
-        devices[device] = devices.get(device, 0) + 1
-
-    devices_data = [DeviceData(device=str(device), count=count) for device, count in devices.items()]
-    # Calculate countries
-    countries = {}
-    for event in view_events:
-        country = event.get("country", "unknown")
-        countries[country] = countries.get(country, 0) + 1
-
-    countries_data = [
-        CountryData(country=country, count=count)
-        for country, count in countries.items()
-        if country is not None
+
+async def add_raw_post_totals(
+        db,
+        totals: PostTotals,
+        blog_id: ObjectId,
+        start_date: datetime,
+        end_date: datetime,
+        tz_offset: int = 0
+):
+    """Accumulate a post's raw view events, likes and comments in the window.
+
+    All grouping happens in Mongo, so only the grouped rows cross the wire.
+    Archived view events are streamed from their files.
+    """
+    window = {"$gte": start_date, "$lte": end_date}
+    hot_start, archived = await hot_window_start(start_date)
+
+    facets, likes, comments = await asyncio.gather(
+        db.view_events.aggregate([
+            {"$match": {"blog_id": blog_id, "created_at": {"$gte": hot_start, "$lte": end_date}}},
+            view_event_facets(tz_offset)
+        ]).to_list(length=1),
+        db.likes.aggregate(
+            daily_counts_pipeline({"blog_id": blog_id, "created_at": window}, tz_offset)
+        ).to_list(length=None),
+        # comments store blog_id as a string
+        db.comments.aggregate(
+            daily_counts_pipeline({"blog_id": str(blog_id), "created_at": window}, tz_offset)
+        ).to_list(length=None)
+    )
+
+    facets = facets[0]
+    for counter, rows in (
+            (totals.views, facets["timeline"]),
+            (totals.sources, facets["sources"]),
+            (totals.devices, facets["devices"]),
+            (totals.countries, facets["countries"]),
+            (totals.likes, likes),
+            (totals.comments, comments)
+    ):
+        for row in rows:
+            counter[row["_id"]] += row["count"]
+
+    for read in facets["read"]:
+        totals.read_count += read["count"]
+        totals.read_sum += read["sum"]
+        totals.read_completed += read["completed"]
+
+    if archived:
+        await asyncio.to_thread(add_archived_post_totals, totals, blog_id, start_date, end_date, tz_offset)
+
+
+def reaches_archive(start_date: datetime) -> bool:
+    """True if a window starting at ``start_date`` reaches back past the hot view events"""
+    if not settings.VIEW_EVENTS_ARCHIVE_AFTER_DAYS:
+        return False
+    return start_date < datetime.utcnow() - timedelta(days=settings.VIEW_EVENTS_ARCHIVE_AFTER_DAYS)
+
+
+async def hot_window_start(start_date: datetime) -> Tuple[datetime, bool]:
+    """Where the window's view events in Mongo start, and whether the archive holds the earlier ones.
+
+    Events before the archive horizon are read from the archive only, so
+    events an interrupted archive run left in both places count once.
+    """
+    if not reaches_archive(start_date):
+        return start_date, False
+    horizon = await asyncio.to_thread(archive_horizon, settings.VIEW_EVENTS_ARCHIVE_DIR)
+    if horizon is None or horizon <= start_date:
+        return start_date, False
+    return horizon, True
+
+
+def add_archived_post_totals(
+        totals: PostTotals,
+        blog_id: ObjectId,
+        start_date: datetime,
+        end_date: datetime,
+        tz_offset: int
+):
+    for event in iter_archived_events(settings.VIEW_EVENTS_ARCHIVE_DIR, start_date, end_date, {blog_id}):
+        totals.add_view_event(event, tz_offset)
+
+
+def add_archived_views(
+        per_blog: Counter,
+        per_day: Counter,
+        blog_ids: List[ObjectId],
+        start_date: datetime,
+        end_date: datetime,
+        tz_offset: int
+):
+    for event in iter_archived_events(settings.VIEW_EVENTS_ARCHIVE_DIR, start_date, end_date, set(blog_ids)):
+        per_blog[event["blog_id"]] += 1
+        per_day[epoch_day(event["created_at"], tz_offset)] += 1
+
+
+def blog_and_day_facet(
+        totals: Dict[str, Any],
+        blog_field: Any = "$blog_id",
+        day_field: str = "$created_at",
+        tz_offset: int = 0
+) -> dict:
+    """$facet stage summing ``totals`` both per blog and per local epoch day"""
+    sums = {name: {"$sum": value} for name, value in totals.items()}
+    return {"$facet": {
+        "by_blog": [{"$group": {"_id": blog_field, **sums}}],
+        "by_day": [{"$group": {"_id": epoch_day_expr(day_field, tz_offset), **sums}}]
+    }}
+
+
+def local_day_slot_stages(boundary: str) -> List[dict]:
+    """Stages summing the rollups' slot counters per UTC day and counter.
+
+    Slots from ``boundary`` on fall on the later of the two local days the
+    UTC day spans (see rollups.local_day_split), and are summed separately.
+    """
+    return [
+        {"$project": {"day": 1, "slots": {"$objectToArray": {"$ifNull": ["$slots", {}]}}}},
+        {"$unwind": "$slots"},
+        {"$project": {"day": 1, "field": "$slots.k", "counts": {"$objectToArray": "$slots.v"}}},
+        {"$unwind": "$counts"},
+        {"$group": {
+            "_id": {"day": "$day", "field": "$field", "later": {"$gte": ["$counts.k", boundary]}},
+            "count": {"$sum": "$counts.v"}
+        }}
     ]
 
-    # Calculate read time
-    read_percentages = [event.get("read_percentage", 0) for event in view_events if "read_percentage" in event]
-    avg_read_percentage = sum(read_percentages) / len(read_percentages) if read_percentages else 0
-
-    completion_count = sum(1 for p in read_percentages if p >= 80)
-    completion_rate = (completion_count / len(read_percentages) * 100) if read_percentages else 0
-
-    return PostAnalytics(
-        views={
-            "total": len(view_events),
-            "timeline": views_timeline
-        },
-        likes={
-            "total": len(likes),
-            "timeline": likes_timeline
-        },
-        comments={
-            "total": len(comments),
-            "timeline": comments_timeline
-        },
-        sources=sources_data,
-        devices=devices_data,
-        countries=countries_data,
-        read_time={
-            "average_percentage": avg_read_percentage,
-            "completion_rate": completion_rate
-        }
+
+def fold_facet(result: dict, per_blog: Dict[str, Counter], per_day: Dict[str, Counter], totals: Dict[str, str]):
+    """Add the rows of a ``blog_and_day_facet`` result to the counters named by ``totals``"""
+    for row in result["by_blog"]:
+        blog_id = row["_id"] if isinstance(row["_id"], ObjectId) else ObjectId(row["_id"])
+        for field, name in totals.items():
+            per_blog[name][blog_id] += row[field]
+    for row in result["by_day"]:
+        for field, name in totals.items():
+            per_day[name][row["_id"]] += row[field]
+
+
+async def count_user_activity(
+        db,
+        blog_ids: List[ObjectId],
+        start_date: datetime,
+        end_date: datetime,
+        tz_offset: int = 0
+):
+    """Views, likes and comments of the given blogs in the window, grouped per blog and per day server-side"""
+    per_blog = {name: Counter() for name in ("views", "likes", "comments")}
+    per_day = {name: Counter() for name in ("views", "likes", "comments")}
+
+    if use_rollups():
+        totals = {"views": "$views", "likes": "$likes", "comments": "$comments"}
+        facet = blog_and_day_facet(totals, day_field="$day")
+        if tz_offset:
+            shift, boundary = local_day_split(tz_offset)
+            facet["$facet"]["by_day"] = local_day_slot_stages(boundary)
+        results = await db.daily_blog_stats.aggregate([
+            {"$match": {"blog_id": {"$in": blog_ids}, "day": {"$gte": day_start(start_date), "$lte": end_date}}},
+            facet
+        ]).to_list(length=1)
+
+        if not tz_offset:
+            fold_facet(results[0], per_blog, per_day, {name: name for name in totals})
+            return per_blog, per_day
+        fold_facet({"by_blog": results[0]["by_blog"], "by_day": []}, per_blog, per_day, {name: name for name in totals})
+        for row in results[0]["by_day"]:
+            day = epoch_day(row["_id"]["day"]) + shift + row["_id"]["later"]
+            per_day[row["_id"]["field"]][day] += row["count"]
+        return per_blog, per_day
+
+    window = {"$gte": start_date, "$lte": end_date}
+    hot_start, archived = await hot_window_start(start_date)
+    views, likes, comments = await asyncio.gather(
+        db.view_events.aggregate([
+            {"$match": {"blog_id": {"$in": blog_ids}, "created_at": {"$gte": hot_start, "$lte": end_date}}},
+            blog_and_day_facet({"count": 1}, tz_offset=tz_offset)
+        ]).to_list(length=1),
+        db.likes.aggregate([
+            {"$match": {"blog_id": {"$in": blog_ids}, "created_at": window}},
+            blog_and_day_facet({"count": 1}, tz_offset=tz_offset)
+        ]).to_list(length=1),
+        # comments store blog_id as a string
+        db.comments.aggregate([
+            {"$match": {"blog_id": {"$in": [str(blog_id) for blog_id in blog_ids]}, "created_at": window}},
+            blog_and_day_facet({"count": 1}, tz_offset=tz_offset)
+        ]).to_list(length=1)
     )
+    fold_facet(views[0], per_blog, per_day, {"count": "views"})
+    fold_facet(likes[0], per_blog, per_day, {"count": "likes"})
+    fold_facet(comments[0], per_blog, per_day, {"count": "comments"})
+
+    if archived:
+        await asyncio.to_thread(
+            add_archived_views, per_blog["views"], per_day["views"], blog_ids, start_date, end_date, tz_offset
+        )
+    return per_blog, per_day
 
 
-async def get_user_analytics(user_id: str, days: int = 30) -> UserAnalytics:
+async def get_user_analytics(
+        user_id: str,
+        days: int = 30,
+        tz_offset: int = 0,
+        granularity: str = "auto"
+) -> UserAnalytics:
     from app.main import app
     db = app.mongodb
 
     # Calculate date range
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
+    tz_offset = analytics_tz_offset(tz_offset)
 
     # Get user's blogs
-    blogs = await db.blogs.find({
-        "author_id": user_id   #author_id in blog is string
-    }).to_list(length=None)
+    blogs = await db.blogs.find(
+        {"author_id": user_id},  # author_id in blog is string
+        {"title": 1, "slug": 1, "published_at": 1, "created_at": 1}
+    ).to_list(length=None)
 
-    blog_ids = [blog["_id"] for blog in blogs]
-
-    if not blog_ids:
+    if not blogs:
         return UserAnalytics(
             total_posts=0,
             total_views=0,
@@ -207,82 +681,30 @@ async def get_user_analytics(user_id: str, days: int = 30) -> UserAnalytics:
             views_timeline=[],
             likes_timeline=[],
             comments_timeline=[],
-            top_posts=[]
+            top_posts=[],
+            granularity=timeline_unit(granularity, start_date, end_date)
         )
 
-    # Get view events for user's blogs
-    view_events = await db.view_events.find({
-        "blog_id": {"$in": blog_ids},
-        "created_at": {"$gte": start_date, "$lte": end_date}
-    }).to_list(length=None)
-
-    # Get likes for user's blogs
-    likes = await db.likes.find({
-        "blog_id": {"$in": blog_ids},
-        "created_at": {"$gte": start_date, "$lte": end_date}
-    }).to_list(length=None)
-
-    # Get comments for user's blogs
-    comments = await db.comments.find({
-        "blog_id": str({"$in": (blog_ids)}),
-        "created_at": {"$gte": start_date, "$lte": end_date}
-    }).to_list(length=None)
-
-    # Generate timeline data
-    posts_timeline = generate_timeline(blogs, start_date, end_date, "published_at")
-    views_timeline = generate_timeline(view_events, start_date, end_date)
-    likes_timeline = generate_timeline(likes, start_date, end_date)
-    comments_timeline = generate_timeline(comments, start_date, end_date)
-
-    # Calculate top posts
-    top_posts = []
-    for blog in blogs:
-        blog_views = sum(1 for event in view_events if event["blog_id"] == blog["_id"])
-        blog_likes = sum(1 for like in likes if like["blog_id"] == blog["_id"])
-        blog_comments = sum(1 for comment in comments if comment["blog_id"] == blog["_id"])
-
-        top_posts.append({
-            "id": str(blog["_id"]),
-            "title": blog["title"],
-            "slug": blog["slug"],
-            "views": blog_views,
-            "likes": blog_likes,
-            "comments": blog_comments,
-            "published_at": blog.get("published_at", blog["created_at"])
-        })
-
-    # Sort top posts by views
-    top_posts.sort(key=lambda x: x["views"], reverse=True)
+    blog_ids = [blog["_id"] for blog in blogs]
+    (per_blog, per_day), unique_visitors = await asyncio.gather(
+        count_user_activity(db, blog_ids, start_date, end_date, tz_offset),
+        count_author_visitors(db, user_id, start_date, end_date)
+    )
+
+    timeline = Timeline(start_date, end_date, timeline_unit(granularity, start_date, end_date), tz_offset)
+    posts = timeline.count(blog["published_at"] for blog in blogs if blog.get("published_at"))
 
     return UserAnalytics(
         total_posts=len(blogs),
-        total_views=len(view_events),
-        total_likes=len(likes),
-        total_comments=len(comments),
-        posts_timeline=posts_timeline,
-        views_timeline=views_timeline,
-        likes_timeline=likes_timeline,
-        comments_timeline=comments_timeline,
-        top_posts=top_posts[:5]  # Return top 5 posts
+        total_views=sum(per_day["views"].values()),
+        total_likes=sum(per_day["likes"].values()),
+        total_comments=sum(per_day["comments"].values()),
+        unique_visitors=unique_visitors,
+        posts_timeline=timeline.points(posts),
+        views_timeline=timeline.points(timeline.fold(per_day["views"])),
+        likes_timeline=timeline.points(timeline.fold(per_day["likes"])),
+        comments_timeline=timeline.points(timeline.fold(per_day["comments"])),
+        top_posts=rank_top_posts(blogs, per_blog["views"], per_blog["likes"], per_blog["comments"], limit=5),
+        granularity=timeline.unit
     )
 
-
-def generate_timeline(events, start_date, end_date, date_field="created_at"):
-    """Generate a timeline of counts by day"""
-    # Create a dictionary of dates
-    timeline = {}
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime("%Y-%m-%d")
-        timeline[date_str] = 0
-        current_date += timedelta(days=1)
-
-    # Count events by day
-    for event in events:
-        event_date = event[date_field]
-        date_str = event_date.strftime("%Y-%m-%d")
-        if date_str in timeline:
-            timeline[date_str] += 1
-
-    # Convert to list of TimelinePoint objects
-    return [TimelinePoint(date=date, count=count) for date, count in timeline.items()]
\ No newline at end of file
@@ -0,0 +1,158 @@
+import gzip
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Collection, Iterator, List, Optional
+from bson import json_util
+from bson.json_util import JSONMode, JSONOptions
+from app.services.rollups import day_start
+
+# Dates come back as naive UTC datetimes, like the ones motor returns
+ARCHIVE_JSON_OPTIONS = JSONOptions(json_mode=JSONMode.RELAXED, tz_aware=False)
+
+# How json_util writes an event's blog_id, so lines can be filtered by blog before they are parsed
+ARCHIVED_BLOG_ID = re.compile(r'"blog_id": \{"\$oid": "([0-9a-f]{24})"\}')
+
+
+def partition_path(archive_dir: str, day: datetime) -> Path:
+    """Archive file of one UTC day of view events: <archive_dir>/YYYY/MM/YYYY-MM-DD.ndjson.gz"""
+    return Path(archive_dir) / f"{day:%Y}" / f"{day:%m}" / f"{day:%Y-%m-%d}.ndjson.gz"
+
+
+def partition_day(path: Path) -> datetime:
+    return datetime.strptime(path.name[:10], "%Y-%m-%d")
+
+
+def archived_partitions(
+        archive_dir: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+) -> List[Path]:
+    """Existing archive files, oldest first, optionally only for the days between ``start_date`` and ``end_date``"""
+    partitions = []
+    for path in sorted(Path(archive_dir).glob("*/*/*.ndjson.gz")):
+        day = partition_day(path)
+        if start_date is not None and day < day_start(start_date):
+            continue
+        if end_date is not None and day > end_date:
+            continue
+        partitions.append(path)
+    return partitions
+
+
+def archive_horizon(archive_dir: str) -> Optional[datetime]:
+    """Start of the day after the newest archive file, or None if nothing is archived.
+
+    Days are archived oldest first and a day's file is complete before any of
+    its events are deleted, so every view event before the horizon is in the
+    archive, even if an interrupted run left some of them in Mongo as well.
+    Readers take events before the horizon from the archive only.
+    """
+    partitions = archived_partitions(archive_dir)
+    if not partitions:
+        return None
+    return partition_day(partitions[-1]) + timedelta(days=1)
+
+
+def read_partition(path: Path, blog_ids: Optional[Collection[str]] = None) -> Iterator[dict]:
+    """Stream the events of one archive file, one line at a time.
+
+    With ``blog_ids`` (as hex strings) lines of other blogs are skipped
+    without parsing them, which is most of the cost of reading a file.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            if blog_ids is not None:
+                match = ARCHIVED_BLOG_ID.search(line)
+                if match and match.group(1) not in blog_ids:
+                    continue
+            yield json_util.loads(line, json_options=ARCHIVE_JSON_OPTIONS)
+
+
+def iter_archived_events(
+        archive_dir: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        blog_ids: Optional[Collection] = None
+) -> Iterator[dict]:
+    """Stream archived view events in the window, optionally only those of ``blog_ids``"""
+    wanted = {str(blog_id) for blog_id in blog_ids} if blog_ids is not None else None
+    for path in archived_partitions(archive_dir, start_date, end_date):
+        for event in read_partition(path, wanted):
+            if start_date is not None and event["created_at"] < start_date:
+                continue
+            if end_date is not None and event["created_at"] > end_date:
+                continue
+            if blog_ids is not None and event["blog_id"] not in blog_ids:
+                continue
+            yield event
+
+
+async def archive_day(db, archive_dir: str, day: datetime, batch_size: int = 1000) -> int:
+    """Move one UTC day of view events from Mongo into its archive file; returns the events moved.
+
+    The file is written completely (merged with whatever an interrupted
+    earlier run left) and atomically renamed into place before anything is
+    deleted, so a crash can only leave events in both places, never in neither.
+    """
+    window = {"created_at": {"$gte": day, "$lt": day + timedelta(days=1)}}
+    path = partition_path(archive_dir, day)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part = path.with_name(path.name + ".part")
+
+    archived_ids = set()
+    moved = 0
+    with gzip.open(part, "wt", encoding="utf-8") as out:
+        if path.exists():
+            for event in read_partition(path):
+                archived_ids.add(event["_id"])
+                out.write(json_util.dumps(event, json_options=ARCHIVE_JSON_OPTIONS) + "\n")
+
+        async for event in db.view_events.find(window).sort("_id", 1).batch_size(batch_size):
+            if event["_id"] in archived_ids:
+                continue
+            out.write(json_util.dumps(event, json_options=ARCHIVE_JSON_OPTIONS) + "\n")
+            moved += 1
+
+    if moved:
+        _fsync(part)
+        os.replace(part, path)
+    else:
+        part.unlink()
+        if not path.exists():
+            return 0
+
+    # Delete in bounded batches so the hot collection is never locked up by one huge delete
+    while True:
+        ids = [event["_id"] async for event in db.view_events.find(window, {"_id": 1}).limit(batch_size)]
+        if not ids:
+            break
+        await db.view_events.delete_many({"_id": {"$in": ids}})
+
+    return moved
+
+
+def _fsync(path: Path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+async def archive_view_events(db, archive_dir: str, before: datetime, batch_size: int = 1000) -> int:
+    """Archive every whole UTC day of view events before ``before``; returns the events moved"""
+    cutoff = day_start(before)
+    oldest = await db.view_events.find_one({"created_at": {"$lt": cutoff}}, {"created_at": 1}, sort=[("created_at", 1)])
+    if oldest is None:
+        return 0
+
+    moved = 0
+    day = day_start(oldest["created_at"])
+    while day < cutoff:
+        moved += await archive_day(db, archive_dir, day, batch_size)
+        day += timedelta(days=1)
+    return moved
@@ -2,7 +2,7 @@ from fastapi import HTTPException, status
 from datetime import datetime, timedelta
 from app.schemas.user import UserCreate, User, Token
 from app.models.user import UserModel
-from app.utils.security import get_password_hash, verify_password, create_access_token
+from app.utils.security import check_password, create_access_token, hash_password
 from app.config import settings
 from bson import ObjectId
 
@@ -20,7 +20,7 @@ async def register_user(user_in: UserCreate) -> User:
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await hash_password(user_in.password)
     user_model = UserModel(
         name=user_in.name,
         email=user_in.email,
@@ -58,23 +58,25 @@ async def authenticate_user(email: str, password: str) -> Token:
             detail="Incorrect email or password"
         )
 
-    if not verify_password(password, user["hashed_password"]):
+    if not await check_password(password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
 
-    # Create access token
-    access_token = create_access_token(str(user["_id"]))
+    return issue_token(User(
+        id=str(user["_id"]),
+        name=user["name"],
+        email=user["email"],
+        bio=user.get("bio", ""),
+        avatar=user.get("avatar", None)
+    ))
 
+
+def issue_token(user: User) -> Token:
+    """Access token for a user whose credentials were already checked"""
     return Token(
-        access_token=access_token,
+        access_token=create_access_token(user.id),
         token_type="bearer",
-        user=User(
-            id=str(user["_id"]),
-            name=user["name"],
-            email=user["email"],
-            bio=user.get("bio", ""),
-            avatar=user.get("avatar", None)
-        )
+        user=user
     )
\ No newline at end of file
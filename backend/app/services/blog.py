@@ -1,57 +1,288 @@
 from fastapi import HTTPException, status
-from typing import List, Optional
-from app.schemas.blog import BlogCreate, BlogUpdate, BlogResponse, Category
-from app.schemas.user import User
+from fastapi.encoders import jsonable_encoder
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from app.schemas.blog import BlogCreate, BlogUpdate, BlogResponse, BlogSummary, Category
 from app.models.blog import BlogModel
+from app.services.rollups import record_counter
+from app.services.category import category_registry, get_category_by_id, get_category_by_slug
+from app.services.slug import slug_matches_base, write_with_unique_slug
+from app.config import settings
+from app.utils.cache import TTLCache, make_etag
+from app.utils.cursor import decode_cursor, encode_cursor, keyset_filter
+from app.utils.fields import select_fields
 from app.utils.slugify import slugify
 from bson import ObjectId
 
+import json
 from datetime import datetime
 
+# Anonymous-view payloads of single blogs, keyed by slug: (BlogResponse, ETag)
+blog_cache = TTLCache(settings.BLOG_CACHE_SIZE, settings.BLOG_CACHE_TTL_SECONDS)
+
+
+# slug -> blog ObjectId, or None for a slug recently found not to exist
+blog_id_cache = TTLCache(settings.BLOG_ID_CACHE_SIZE, settings.BLOG_ID_CACHE_TTL_SECONDS)
+_UNRESOLVED = object()
+
+# Shown in place of a deleted author or category, so their blogs stay listed
+MISSING_AUTHOR = {"name": "Deleted user", "email": "deleted-user@example.com"}
+MISSING_CATEGORY = {"name": "Uncategorized", "slug": "uncategorized"}
+
+# Types a pagination cursor may hold for each sort key
+KEYSET_TYPES = {"score": (int, float), "published_at": (datetime, type(None)), "_id": (ObjectId,)}
+
+
+def invalidate_blog_cache(*slugs: str):
+    """Drop cached payloads after a write that changes what a blog page shows"""
+    for slug in slugs:
+        blog_cache.pop(slug)
+
+
+async def invalidate_author_blogs(db, author_id: str):
+    """Drop cached payloads of every blog by an author whose name, bio or avatar changed"""
+    async for blog in db.blogs.find({"author_id": str(author_id)}, {"slug": 1}):
+        blog_cache.pop(blog["slug"])
+
+
+def forget_blog_slugs(*slugs: str):
+    """Drop slug -> id mappings (and remembered misses) after a slug is created, changed or deleted"""
+    for slug in slugs:
+        blog_id_cache.pop(slug)
+
+
+async def resolve_blog_id(slug: str) -> Optional[ObjectId]:
+    """Resolve a slug to its blog's _id, usually without touching Mongo.
+
+    Unknown slugs are remembered for BLOG_ID_MISS_TTL_SECONDS so repeated
+    misses don't reach the database either.
+    """
+    blog_id = blog_id_cache.get(slug, _UNRESOLVED)
+    if blog_id is not _UNRESOLVED:
+        return blog_id
 
-async def create_blog(blog_in: BlogCreate, author_id: str) -> BlogResponse:
     from app.main import app
     db = app.mongodb
 
-    try:
-        category_id = ObjectId(blog_in.category_id)  # Ensure it's a valid ObjectId
+    blog = await db.blogs.find_one({"slug": slug}, {"_id": 1})
+    if blog:
+        blog_id_cache.set(slug, blog["_id"])
+        return blog["_id"]
+
+    blog_id_cache.set(slug, None, ttl=settings.BLOG_ID_MISS_TTL_SECONDS)
+    return None
+
+
+async def resolve_blog_ids(slugs: Iterable[str]) -> Dict[str, Optional[ObjectId]]:
+    """resolve_blog_id for many slugs, with one query for all cache misses"""
+    resolved = {}
+    missing = []
+    for slug in set(slugs):
+        blog_id = blog_id_cache.get(slug, _UNRESOLVED)
+        if blog_id is _UNRESOLVED:
+            missing.append(slug)
+        else:
+            resolved[slug] = blog_id
+
+    if missing:
+        from app.main import app
+        db = app.mongodb
+
+        async for blog in db.blogs.find({"slug": {"$in": missing}}, {"_id": 1, "slug": 1}):
+            blog_id_cache.set(blog["slug"], blog["_id"])
+            resolved[blog["slug"]] = blog["_id"]
+        for slug in missing:
+            if slug not in resolved:
+                blog_id_cache.set(slug, None, ttl=settings.BLOG_ID_MISS_TTL_SECONDS)
+                resolved[slug] = None
+
+    return resolved
+
+
+def blog_response_stages(
+        user_id: Optional[str] = None,
+        is_liked: bool = False,
+        include_content: bool = True,
+        fields: Optional[Set[str]] = None
+) -> List[dict]:
+    """Aggregation stages that join a blog's author and project it into the BlogResponse shape.
+
+    The category is attached afterwards from the in-memory category registry.
+    When ``user_id`` is given, ``is_liked`` is resolved with a lookup on
+    ``likes``; otherwise it is the constant ``is_liked``. Without
+    ``include_content`` the result has the BlogSummary shape instead.
+
+    ``fields`` restricts the projection to those response fields (plus the
+    keys needed for hydration and cursors), and skips the author and like
+    lookups when they are not requested.
+    """
+    if fields is not None:
+        include_content = "content" in fields
+        if "is_liked" not in fields:
+            user_id = None
+
+    if user_id:
+        like_stages = [{
+            "$lookup": {
+                "from": "likes",
+                "let": {"blog_id": "$_id"},
+                "pipeline": [
+                    {"$match": {
+                        "user_id": ObjectId(user_id),
+                        "$expr": {"$eq": ["$blog_id", "$$blog_id"]}
+                    }},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}}
+                ],
+                "as": "user_like"
+            }
+        }]
+        is_liked_expr = {"$gt": [{"$size": "$user_like"}, 0]}
+    else:
+        like_stages = []
+        is_liked_expr = {"$literal": is_liked}
+
+    projection = {
+        "_id": 0,
+        "id": {"$toString": "$_id"},
+        "title": 1,
+        "slug": 1,
+        "excerpt": 1,
+        # A blog whose author no longer exists is shown under a placeholder author
+        "author": {
+            "id": {"$ifNull": [{"$toString": "$author._id"}, "$author_id"]},
+            "name": {"$ifNull": ["$author.name", MISSING_AUTHOR["name"]]},
+            "email": {"$ifNull": ["$author.email", MISSING_AUTHOR["email"]]},
+            "bio": {"$ifNull": ["$author.bio", ""]},
+            "avatar": {"$ifNull": ["$author.avatar", None]}
+        },
+        "category_id": 1,
+        "tags": {"$ifNull": ["$tags", []]},
+        "cover_image": {"$ifNull": ["$cover_image", None]},
+        "published": {"$ifNull": ["$published", True]},
+        "views_count": {"$ifNull": ["$views_count", 0]},
+        "likes_count": {"$ifNull": ["$likes_count", 0]},
+        "comments_count": {"$ifNull": ["$comments_count", 0]},
+        "is_liked": is_liked_expr,
+        "published_at": {"$ifNull": ["$published_at", None]},
+        "created_at": 1,
+        "updated_at": 1,
+        # Text search relevance, kept for building pagination cursors
+        "score": 1
+    }
+    if include_content:
+        projection["content"] = 1
+
+    author_stages = [
+        # author_id is stored as a string
+        {"$addFields": {"author_oid": {"$toObjectId": "$author_id"}}},
+        {"$lookup": {"from": "users", "localField": "author_oid", "foreignField": "_id", "as": "author"}},
+        {"$unwind": {"path": "$author", "preserveNullAndEmptyArrays": True}}
+    ]
+
+    if fields is not None:
+        keep = fields | {"_id", "id", "category_id", "published_at", "score"}
+        projection = {key: value for key, value in projection.items() if key in keep}
+        # The author stages never drop a blog (the $unwind preserves missing
+        # authors), so skipping them cannot change which blogs are returned
+        if "author" not in fields:
+            author_stages = []
+
+    return [
+        *author_stages,
+        *like_stages,
+        {"$project": projection}
+    ]
+
+
+def build_blog_pipeline(
+        match: dict,
+        sort: Optional[dict] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        user_id: Optional[str] = None,
+        stages: Optional[List[dict]] = None,
+        include_content: bool = True,
+        fields: Optional[Set[str]] = None
+) -> List[dict]:
+    """Build a single-query aggregation that returns blogs already shaped as BlogResponse documents.
+
+    ``stages`` run between the initial ``$match`` and the sort.
+    """
+    pipeline = [{"$match": match}, *(stages or [])]
+    if sort:
+        pipeline.append({"$sort": sort})
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit:
+        pipeline.append({"$limit": limit})
+
+    return pipeline + blog_response_stages(user_id, include_content=include_content, fields=fields)
+
+
+def blog_from_doc(doc: dict, fields: Optional[Set[str]] = None) -> Union[BlogSummary, dict]:
+    """Map a document produced by ``blog_response_stages`` to a BlogResponse, or a BlogSummary if it has no content.
+
+    With ``fields`` a plain dict holding only those fields is returned instead,
+    without pydantic validation. A category missing from the category
+    registry is replaced by a placeholder.
+    """
+    category = category_registry.by_id.get(doc["category_id"])
+    if category is None:
+        category = Category(id=doc["category_id"], **MISSING_CATEGORY)
+
+    if fields is not None:
+        doc = {**doc, "category": category.model_dump()}
+        return {field: doc[field] for field in fields if field in doc}
+
+    model = BlogResponse if "content" in doc else BlogSummary
+    return model.model_validate({**doc, "category": category})
+
+
+async def blogs_from_docs(docs: List[dict], fields: Optional[Set[str]] = None) -> List[Union[BlogSummary, dict]]:
+    await category_registry.refresh()
+    if any(doc["category_id"] not in category_registry.by_id for doc in docs):
+        await category_registry.refresh(force=True)
+
+    return [blog_from_doc(doc, fields) for doc in docs]
+
+
+async def find_blog(
+        db,
+        match: dict,
+        user_id: Optional[str] = None,
+        fields: Optional[Set[str]] = None
+) -> Optional[Union[BlogResponse, dict]]:
+    pipeline = build_blog_pipeline(match, limit=1, user_id=user_id, fields=fields)
+    docs = await db.blogs.aggregate(pipeline).to_list(length=1)
+    blogs = await blogs_from_docs(docs, fields)
+    return blogs[0] if blogs else None
 
-    except Exception as e:
-        raise ValueError(f"Invalid category_id: {blog_in.category_id}") from e
+
+async def create_blog(blog_in: BlogCreate, author_id: str) -> BlogResponse:
+    from app.main import app
+    db = app.mongodb
 
     # Check if category exists
-    category = await db.categories.find_one({"_id": category_id})
+    category = await get_category_by_id(blog_in.category_id)
     if not category:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Category not found"
         )
 
-    # Generate slug
-    base_slug = slugify(blog_in.title)
-    slug = base_slug
-
-    # Check if slug already exists
-    count = 1
-    while await db.blogs.find_one({"slug": slug}):
-        slug = f"{base_slug}-{count}"
-        count += 1
-
-    # Create blog
-    published_at = datetime.utcnow() if blog_in.published else None
-
-    # Get author
-    # Fetch author details
-    author = await db.users.find_one({"_id": ObjectId(author_id)})
+    author = await db.users.find_one({"_id": ObjectId(author_id)}, {"_id": 1})
     if not author:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Author not found"
         )
 
+    # Create blog
+    published_at = datetime.utcnow() if blog_in.published else None
+
     blog_model = BlogModel(
         title=blog_in.title,
-        slug=slug,
+        slug=slugify(blog_in.title),
         content=blog_in.content,
         excerpt=blog_in.excerpt,
         author_id=author_id,
@@ -61,42 +292,16 @@ async def create_blog(blog_in: BlogCreate, author_id: str) -> BlogResponse:
         published=blog_in.published,
         published_at=published_at
     )
+    blog_doc = blog_model.model_dump(by_alias=True)
 
-    result = await db.blogs.insert_one(blog_model.model_dump(by_alias=True))
+    # Insert under a freshly allocated slug, retrying if the slug index rejects it
+    async def insert_blog(slug: str):
+        await db.blogs.insert_one({**blog_doc, "slug": slug})
 
-    #create blogresponse
+    slug = await write_with_unique_slug(db, blog_model.slug, insert_blog)
+    forget_blog_slugs(slug)
 
-    blogresponse = BlogResponse(
-        id=str(result.inserted_id),
-        title=blog_in.title,
-        slug=slug,
-        content=blog_in.content,
-        excerpt=blog_in.excerpt,
-        author=User(
-            id=str(author["_id"]),
-            name=author["name"],
-            email=author["email"],
-            bio=author.get("bio", ""),
-            avatar=author.get("avatar", None)
-        ),
-        category_id=str(category["_id"]),
-        category=Category(
-            id=str(category["_id"]),
-            name=category["name"],
-            slug=category["slug"]
-        ),
-        tags=blog_in.tags,
-        cover_image=blog_in.cover_image,
-        published=blog_in.published,
-        views_count=0,
-        likes_count=0,
-        comments_count=0,
-        published_at=published_at,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
-
-    return blogresponse
+    return await find_blog(db, {"_id": blog_doc["_id"]})
 
 
 async def update_blog(blog_id: str, blog_update: BlogUpdate, author_id: str) -> BlogResponse:
@@ -120,26 +325,13 @@ async def update_blog(blog_id: str, blog_update: BlogUpdate, author_id: str) ->
     # Prepare update data
     update_data = {k: v for k, v in blog_update.dict().items() if v is not None}
 
-    # Update slug if title is changed
-    if "title" in update_data:
-        base_slug = slugify(update_data["title"])
-        slug = base_slug
-
-        # Check if slug already exists (excluding current blog)
-        count = 1
-        while await db.blogs.find_one({"slug": slug, "_id": {"$ne": ObjectId(blog_id)}}):
-            slug = f"{base_slug}-{count}"
-            count += 1
-
-        update_data["slug"] = slug
-
     # Update published_at if published status changes
     if "published" in update_data and update_data["published"] and not blog.get("published_at"):
         update_data["published_at"] = datetime.utcnow()
 
     # Update category if provided
     if "category_id" in update_data:
-        category = await db.categories.find_one({"_id": ObjectId(update_data["category_id"])})
+        category = await get_category_by_id(update_data["category_id"])
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -148,49 +340,25 @@ async def update_blog(blog_id: str, blog_update: BlogUpdate, author_id: str) ->
 
     # Update blog
     update_data["updated_at"] = datetime.utcnow()
-    await db.blogs.update_one(
-        {"_id": ObjectId(blog_id)},
-        {"$set": update_data}
-    )
+
+    async def write_update(slug: Optional[str] = None):
+        changes = {**update_data, "slug": slug} if slug else update_data
+        await db.blogs.update_one(
+            {"_id": ObjectId(blog_id)},
+            {"$set": changes}
+        )
+
+    # Update slug if title is changed, keeping the current one if it still fits the title
+    base_slug = slugify(update_data["title"]) if "title" in update_data else None
+    if base_slug is not None and not slug_matches_base(blog["slug"], base_slug):
+        slug = await write_with_unique_slug(db, base_slug, write_update)
+        forget_blog_slugs(blog["slug"], slug)
+    else:
+        await write_update()
+    invalidate_blog_cache(blog["slug"])
 
     # Get updated blog
-    updated_blog = await db.blogs.find_one({"_id": ObjectId(blog_id)})
-
-    # Get author
-    author = await db.users.find_one({"_id": ObjectId(updated_blog["author_id"])})
-
-    # Get category
-    category = await db.categories.find_one({"_id": ObjectId(updated_blog["category_id"])})
-
-    return BlogResponse(
-        id=str(updated_blog["_id"]),
-        title=updated_blog["title"],
-        slug=updated_blog["slug"],
-        content=updated_blog["content"],
-        excerpt=updated_blog["excerpt"],
-        author=User(
-            id=str(author["_id"]),
-            name=author["name"],
-            email=author["email"],
-            bio=author.get("bio", ""),
-            avatar=author.get("avatar", None)
-        ),
-        category_id=str(category["_id"]),
-        category=Category(
-            id=str(category["_id"]),
-            name=category["name"],
-            slug=category["slug"]
-        ),
-        tags=updated_blog.get("tags", []),
-        cover_image=updated_blog.get("cover_image"),
-        published=updated_blog.get("published", True),
-        views_count=updated_blog.get("views_count", 0),
-        likes_count=updated_blog.get("likes_count", 0),
-        comments_count=updated_blog.get("comments_count", 0),
-        published_at=updated_blog.get("published_at"),
-        created_at=updated_blog.get("created_at"),
-        updated_at=updated_blog.get("updated_at")
-    )
+    return await find_blog(db, {"_id": ObjectId(blog_id)})
 
 
 async def delete_blog(blog_id: str, author_id: str) -> bool:
@@ -213,71 +381,92 @@ async def delete_blog(blog_id: str, author_id: str) -> bool:
 
     # Delete blog
     result = await db.blogs.delete_one({"_id": ObjectId(blog_id)})
+    invalidate_blog_cache(blog["slug"])
+    forget_blog_slugs(blog["slug"])
 
-    # Delete related comments and likes
+    # Delete related comments, likes and analytics rollups
     await db.comments.delete_many({"blog_id": ObjectId(blog_id)})
     await db.likes.delete_many({"blog_id": ObjectId(blog_id)})
+    await db.daily_blog_stats.delete_many({"blog_id": ObjectId(blog_id)})
+    await db.visitor_sketches.delete_many({"blog_id": ObjectId(blog_id)})
 
     return result.deleted_count > 0
 
 
-async def get_blog_by_slug(slug: str, user_id: Optional[str] = None) -> BlogResponse:
+async def get_blog_by_slug(
+        slug: str,
+        user_id: Optional[str] = None,
+        fields: Optional[Set[str]] = None
+) -> Union[BlogResponse, dict]:
     from app.main import app
     db = app.mongodb
 
-    # Get blog
-    blog = await db.blogs.find_one({"slug": slug})
+    # Get blog together with its author, category and like status
+    blog = await find_blog(db, {"slug": slug}, user_id, fields)
     if not blog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog not found"
         )
 
-    # Get author
-    author = await db.users.find_one({"_id": ObjectId(blog["author_id"])})
+    return blog
 
-    # Get category
-    category = await db.categories.find_one({"_id": ObjectId(blog["category_id"])})
 
-    # Check if user has liked the blog
-    is_liked = False
-    if user_id:
-        like = await db.likes.find_one({
-            "blog_id": blog["_id"],
-            "user_id": ObjectId(user_id)
-        })
-        is_liked = like is not None
-
-    return BlogResponse(
-        id=str(blog["_id"]),
-        title=blog["title"],
-        slug=blog["slug"],
-        content=blog["content"],
-        excerpt=blog["excerpt"],
-        author=User(
-            id=str(author["_id"]),
-            name=author["name"],
-            email=author["email"],
-            bio=author.get("bio", ""),
-            avatar=author.get("avatar", None)
-        ),
-        category_id=str(category["_id"]),
-        category=Category(
-            id=str(category["_id"]),
-            name=category["name"],
-            slug=category["slug"]
-        ),
-        tags=blog.get("tags", []),
-        cover_image=blog.get("cover_image"),
-        published=blog.get("published", True),
-        views_count=blog.get("views_count", 0),
-        likes_count=blog.get("likes_count", 0),
-        comments_count=blog.get("comments_count", 0),
-        is_liked=is_liked,
-        published_at=blog.get("published_at"),
-        created_at=blog.get("created_at"),
-        updated_at=blog.get("updated_at")
-    )
+async def get_blog_view(
+        slug: str,
+        user_id: Optional[str] = None,
+        fields: Optional[Set[str]] = None
+) -> Tuple[Union[BlogResponse, dict], str]:
+    """Get a blog post for display together with its ETag.
+
+    The anonymous payload is cached per slug; the caller's like status is
+    overlaid on a copy afterwards. A ``fields`` selection is trimmed from the
+    cached payload when there is one, and otherwise read with a narrowed
+    projection (without caching), so it never loads the content it doesn't need.
+    """
+    from app.main import app
+    db = app.mongodb
+
+    cached = blog_cache.get(slug)
+    if cached is None and fields is not None:
+        blog = await find_blog(db, {"slug": slug}, user_id, fields)
+        if not blog:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Blog not found"
+            )
+        return blog, fields_etag(blog)
+
+    if cached is None:
+        blog = await find_blog(db, {"slug": slug})
+        if not blog:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Blog not found"
+            )
+        cached = (blog, make_etag(blog.model_dump_json()))
+        blog_cache.set(slug, cached)
+
+    blog, etag = cached
+    if user_id and (fields is None or "is_liked" in fields):
+        like = await db.likes.find_one(
+            {"blog_id": ObjectId(blog.id), "user_id": ObjectId(user_id)},
+            {"_id": 1}
+        )
+        if like:
+            blog = blog.model_copy(update={"is_liked": True})
+            etag = f'{etag[:-1]}-liked"'
+
+    if fields is not None:
+        blog = select_fields(blog, fields)
+        return blog, fields_etag(blog)
+    return blog, etag
+
+
+def fields_etag(blog: dict) -> str:
+    """ETag of a field selection, so it is the same whether trimmed from the cache or read narrowed"""
+    return make_etag(json.dumps(jsonable_encoder(blog), sort_keys=True))
+
 
 async def get_blogs(
         search: Optional[str] = None,
@@ -286,8 +475,18 @@ async def get_blogs(
         sort: Optional[str] = "desc",
         skip: int = 0,
         limit: int = 10,
-        user_id: Optional[str] = None
-) -> List[BlogResponse]:
+        user_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_content: bool = False,
+        fields: Optional[Set[str]] = None
+) -> Tuple[List[Union[BlogSummary, dict]], Optional[str]]:
+    """Get a page of published blogs and the cursor for the page after it.
+
+    With ``cursor`` the page starts right after the last blog of the previous
+    page (keyset pagination) and ``skip`` is ignored. Blogs are BlogSummary
+    objects unless ``include_content`` is set, or plain dicts restricted to
+    ``fields`` when a field selection is given.
+    """
     from app.main import app
     db = app.mongodb
 
@@ -299,123 +498,71 @@ async def get_blogs(
         query["$text"] = {"$search": search}
 
     if category:
-        category_obj = await db.categories.find_one({"slug": category})
+        category_obj = await get_category_by_slug(category)
         if category_obj:
-            query["category_id"] = str(category_obj["_id"])
+            query["category_id"] = category_obj.id
 
     if tag:
         query["tags"] = {"$in": [tag]}
 
-    # Sort by published_at or relevance score if searching
-    sort_options = {}
+    # Sort by published_at or relevance score if searching, with _id as tie-breaker
+    sort_direction = -1 if sort == "desc" else 1
+    stages = []
     if search:
-        sort_options["score"] = {"$meta": "textScore"}
-        blogs_cursor = db.blogs.find(query, {"score": {"$meta": "textScore"}}).sort([
-            ("score", {"$meta": "textScore"}),
-            ("published_at", -1 if sort == "desc" else 1)
-        ]).skip(skip).limit(limit)
+        stages.append({"$addFields": {"score": {"$meta": "textScore"}}})
+        keyset_fields = ["score", "published_at", "_id"]
+        keyset_directions = [-1, sort_direction, sort_direction]
     else:
-        sort_direction = -1 if sort == "desc" else 1
-        blogs_cursor = db.blogs.find(query).sort("published_at", sort_direction).skip(skip).limit(limit)
-
-    blogs = await blogs_cursor.to_list(length=limit)
-
-    # Get authors and categories
-    blog_responses = []
-    for blog in blogs:
-        author = await db.users.find_one({"_id": ObjectId(blog["author_id"])})
-        category = await db.categories.find_one({"_id": ObjectId(blog["category_id"])})
-
-        # Check if user has liked the blog
-        is_liked = False
-        if user_id:
-            like = await db.likes.find_one({
-                "blog_id": blog["_id"],
-                "user_id": ObjectId(user_id)
-            })
-            is_liked = like is not None
-
-        blog_responses.append(BlogResponse(
-            id=str(blog["_id"]),
-            title=blog["title"],
-            slug=blog["slug"],
-            content=blog["content"],
-            excerpt=blog["excerpt"],
-            author=User(
-                id=str(author["_id"]),
-                name=author["name"],
-                email=author["email"],
-                bio=author.get("bio", ""),
-                avatar=author.get("avatar", None)
-            ),
-            category_id=str(category["_id"]),
-            category=Category(
-                id=str(category["_id"]),
-                name=category["name"],
-                slug=category["slug"]
-            ),
-            tags=blog.get("tags", []),
-            cover_image=blog.get("cover_image"),
-            published=blog.get("published", True),
-            views_count=blog.get("views_count", 0),
-            likes_count=blog.get("likes_count", 0),
-            comments_count=blog.get("comments_count", 0),
-            is_liked=is_liked,
-            published_at=blog.get("published_at"),
-            created_at=blog.get("created_at"),
-            updated_at=blog.get("updated_at")
-        ))
-
-    return blog_responses
-
-
-async def get_user_blogs(user_id: str) -> List[BlogResponse]:
+        keyset_fields = ["published_at", "_id"]
+        keyset_directions = [sort_direction, sort_direction]
+    sort_options = dict(zip(keyset_fields, keyset_directions))
+
+    if cursor:
+        try:
+            cursor_values = decode_cursor(cursor, [KEYSET_TYPES[field] for field in keyset_fields])
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        keyset = keyset_filter(keyset_fields, cursor_values, keyset_directions)
+        if search:
+            # score only exists after $addFields, so the keyset is applied as a later stage
+            stages.append({"$match": keyset})
+        else:
+            query = {"$and": [query, keyset]}
+        skip = 0
+
+    pipeline = build_blog_pipeline(query, sort_options, skip, limit, user_id, stages, include_content, fields)
+    blogs = await db.blogs.aggregate(pipeline).to_list(length=limit)
+
+    next_cursor = None
+    if len(blogs) == limit:
+        last = blogs[-1]
+        values = {"score": last.get("score"), "published_at": last.get("published_at"), "_id": ObjectId(last["id"])}
+        next_cursor = encode_cursor([values[field] for field in keyset_fields])
+
+    return await blogs_from_docs(blogs, fields), next_cursor
+
+
+async def get_user_blogs(
+        user_id: str,
+        include_content: bool = False,
+        fields: Optional[Set[str]] = None
+) -> List[Union[BlogSummary, dict]]:
     from app.main import app
     db = app.mongodb
 
     # Get blogs by user
-    blogs_cursor = db.blogs.find({"author_id": str(user_id)}).sort("created_at", -1)
-    blogs = await blogs_cursor.to_list(length=None)
-
-    # Get categories
-    blog_responses = []
-    for blog in blogs:
-        category = await db.categories.find_one({"_id": ObjectId(blog["category_id"])})
-
-        # Get author
-        author = await db.users.find_one({"_id": ObjectId(blog["author_id"])})
-
-        blog_responses.append(BlogResponse(
-            id=str(blog["_id"]),
-            title=blog["title"],
-            slug=blog["slug"],
-            content=blog["content"],
-            excerpt=blog["excerpt"],
-            category_id=str(category["_id"]),
-            author=User(
-                id=str(author["_id"]),
-                name=author["name"],
-                email=author["email"],
-                bio=author.get("bio", ""),
-                avatar=author.get("avatar", None)
-            ),
-            category=Category(
-                id=str(category["_id"]),
-                name=category["name"],
-                slug=category["slug"]
-            ),
-            tags=blog.get("tags", []),
-            cover_image=blog.get("cover_image"),
-            published=blog.get("published", True),
-            views_count=blog.get("views_count", 0),
-            likes_count=blog.get("likes_count", 0),
-            comments_count=blog.get("comments_count", 0),
-            published_at=blog.get("published_at"),
-            created_at=blog.get("created_at"),
-            updated_at=blog.get("updated_at")
-        ))
-
-    return blog_responses
+    pipeline = build_blog_pipeline(
+        {"author_id": str(user_id)},
+        {"created_at": -1},
+        include_content=include_content,
+        fields=fields
+    )
+    blogs = await db.blogs.aggregate(pipeline).to_list(length=None)
+
+    return await blogs_from_docs(blogs, fields)
 
 
 async def like_blog(slug: str, user_id: str) -> bool:
@@ -443,17 +590,24 @@ async def like_blog(slug: str, user_id: str) -> bool:
             {"_id": blog["_id"]},
             {"$inc": {"likes_count": -1}}
         )
+        invalidate_blog_cache(slug)
+        if settings.ANALYTICS_ROLLUPS_ENABLED:
+            await record_counter(db, blog["_id"], like["created_at"], "likes", -1)
     else:
         # Like the blog
+        liked_at = datetime.utcnow()
         await db.likes.insert_one({
             "blog_id": blog["_id"],
             "user_id": ObjectId(user_id),
-            "created_at": datetime.utcnow()
+            "created_at": liked_at
         })
         await db.blogs.update_one(
             {"_id": blog["_id"]},
             {"$inc": {"likes_count": 1}}
         )
+        invalidate_blog_cache(slug)
+        if settings.ANALYTICS_ROLLUPS_ENABLED:
+            await record_counter(db, blog["_id"], liked_at, "likes")
 
         # Send notification if liking (not unliking)
         try:
@@ -476,65 +630,23 @@ async def like_blog(slug: str, user_id: str) -> bool:
     return True
 
 
-async def get_liked_blogs(user_id: str) -> List[BlogResponse]:
+async def get_liked_blogs(
+        user_id: str,
+        include_content: bool = False,
+        fields: Optional[Set[str]] = None
+) -> List[Union[BlogSummary, dict]]:
     from app.main import app
     db = app.mongodb
 
-    # Get likes by user
-    likes_cursor = db.likes.find({"user_id": ObjectId(user_id)}).sort("created_at", -1)
-    likes = await likes_cursor.to_list(length=None)
-
-    # Get blogs
-    blog_responses = []
-    for like in likes:
-        blog = await db.blogs.find_one({"_id": like["blog_id"]})
-        if blog:
-            author = await db.users.find_one({"_id": ObjectId(blog["author_id"])})
-            category = await db.categories.find_one({"_id": ObjectId(blog["category_id"])})
-
-            blog_responses.append(BlogResponse(
-                id=str(blog["_id"]),
-                title=blog["title"],
-                slug=blog["slug"],
-                content=blog["content"],
-                excerpt=blog["excerpt"],
-                author=User(
-                    id=str(author["_id"]),
-                    name=author["name"],
-                    email=author["email"],
-                    bio=author.get("bio", ""),
-                    avatar=author.get("avatar", None)
-                ),
-                category_id=str(category["_id"]),
-                category=Category(
-                    id=str(category["_id"]),
-                    name=category["name"],
-                    slug=category["slug"]
-                ),
-                tags=blog.get("tags", []),
-                cover_image=blog.get("cover_image"),
-                published=blog.get("published", True),
-                views_count=blog.get("views_count", 0),
-                likes_count=blog.get("likes_count", 0),
-                comments_count=blog.get("comments_count", 0),
-                is_liked=True,
-                published_at=blog.get("published_at"),
-                created_at=blog.get("created_at"),
-                updated_at=blog.get("updated_at")
-            ))
-
-    return blog_responses
-
-
-async def get_categories():
-    from app.main import app
-    db = app.mongodb
-
-    categories_cursor = db.categories.find().sort("name", 1)
-    categories = await categories_cursor.to_list(length=None)
-
-    return [Category(
-        id=str(category["_id"]),
-        name=category["name"],
-        slug=category["slug"]
-    ) for category in categories]
\ No newline at end of file
+    # Get liked blogs, most recently liked first
+    pipeline = [
+        {"$match": {"user_id": ObjectId(user_id)}},
+        {"$sort": {"created_at": -1}},
+        {"$lookup": {"from": "blogs", "localField": "blog_id", "foreignField": "_id", "as": "blog"}},
+        {"$unwind": "$blog"},
+        {"$replaceRoot": {"newRoot": "$blog"}},
+        *blog_response_stages(is_liked=True, include_content=include_content, fields=fields)
+    ]
+    blogs = await db.likes.aggregate(pipeline).to_list(length=None)
+
+    return await blogs_from_docs(blogs, fields)
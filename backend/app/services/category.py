@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.schemas.blog import Category
+from app.utils.cache import make_etag
+
+# Forced reloads (on an unknown id) are rate limited so bad ids can't hammer Mongo
+MIN_FORCED_RELOAD_INTERVAL = 5
+
+
+class CategoryRegistry:
+    """Process-local copy of the categories collection, indexed by id and by slug.
+
+    Categories change rarely and the app never writes them (they are seeded by
+    init_db.py), so reads are served from memory and the registry is simply
+    reloaded once it is older than ``ttl`` seconds. An unknown id forces an
+    early, rate-limited reload.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.categories: List[Category] = []
+        self.by_id: Dict[str, Category] = {}
+        self.by_slug: Dict[str, Category] = {}
+        self.etag: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def age(self) -> float:
+        return float("inf") if self.loaded_at is None else time.monotonic() - self.loaded_at
+
+    @property
+    def is_stale(self) -> bool:
+        return self.age > self.ttl
+
+    async def load(self, db):
+        categories_cursor = db.categories.find({}, {"name": 1, "slug": 1}).sort("name", 1)
+        categories = [Category(
+            id=str(category["_id"]),
+            name=category["name"],
+            slug=category["slug"]
+        ) for category in await categories_cursor.to_list(length=None)]
+
+        payload = json.dumps([category.model_dump() for category in categories], sort_keys=True)
+
+        self.categories = categories
+        self.by_id = {category.id: category for category in categories}
+        self.by_slug = {category.slug: category for category in categories}
+        self.etag = make_etag(payload)
+        self.loaded_at = time.monotonic()
+
+    def _needs_reload(self, force: bool) -> bool:
+        if force:
+            return self.age > MIN_FORCED_RELOAD_INTERVAL
+        return self.is_stale
+
+    async def refresh(self, force: bool = False):
+        if not self._needs_reload(force):
+            return
+
+        async with self._lock:
+            # Another request may have reloaded while we waited for the lock
+            if not self._needs_reload(force):
+                return
+
+            from app.main import app
+            await self.load(app.mongodb)
+
+
+category_registry = CategoryRegistry(settings.CATEGORY_CACHE_TTL_SECONDS)
+
+
+async def get_categories_with_etag() -> Tuple[List[Category], str]:
+    await category_registry.refresh()
+    return category_registry.categories, category_registry.etag
+
+
+async def get_category_by_id(category_id: str) -> Optional[Category]:
+    await category_registry.refresh()
+    category = category_registry.by_id.get(category_id)
+    if category is None:
+        # The category may have been created since the last load
+        await category_registry.refresh(force=True)
+        category = category_registry.by_id.get(category_id)
+    return category
+
+
+async def get_category_by_slug(slug: str) -> Optional[Category]:
+    await category_registry.refresh()
+    return category_registry.by_slug.get(slug)
@@ -3,6 +3,9 @@ from typing import List
 from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse
 from app.schemas.user import User
 from app.models.comment import CommentModel
+from app.services.blog import invalidate_blog_cache
+from app.services.rollups import record_counter
+from app.config import settings
 from bson import ObjectId
 from datetime import datetime
 
@@ -34,6 +37,9 @@ async def create_comment(comment_in: CommentCreate, user_id: str) -> CommentResp
         {"_id": ObjectId(comment_in.blog_id)},
         {"$inc": {"comments_count": 1}}
     )
+    invalidate_blog_cache(blog["slug"])
+    if settings.ANALYTICS_ROLLUPS_ENABLED:
+        await record_counter(db, blog["_id"], comment_model.created_at, "comments")
 
     # Get user
     user = await db.users.find_one({"_id": ObjectId(user_id)})
@@ -144,11 +150,16 @@ async def delete_comment(comment_id: str, user_id: str) -> bool:
     # Delete comment
     result = await db.comments.delete_one({"_id": ObjectId(comment_id)})
 
-    # Update blog comments count
-    await db.blogs.update_one(
-        {"_id": comment["blog_id"]},
-        {"$inc": {"comments_count": -1}}
+    # Update blog comments count (comments store blog_id as a string)
+    blog = await db.blogs.find_one_and_update(
+        {"_id": ObjectId(comment["blog_id"])},
+        {"$inc": {"comments_count": -1}},
+        projection={"slug": 1}
     )
+    if blog:
+        invalidate_blog_cache(blog["slug"])
+        if settings.ANALYTICS_ROLLUPS_ENABLED:
+            await record_counter(db, blog["_id"], comment["created_at"], "comments", -1)
 
     return result.deleted_count > 0
 
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Callable, List, Optional, Set
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.services.rollups import record_view_events
+from app.services.view_store import view_event_filter
+from app.services.visitors import record_visitors
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ViewEventBuffer:
+    """Write-behind buffer for view events.
+
+    Requests only append to an in-memory list. The buffer is flushed when it
+    reaches ``max_size`` or every ``flush_interval`` seconds: events go to
+    ``view_events`` with one ``insert_many``, the per-blog ``views_count``
+    increments are merged into one ``bulk_write`` and the visitors are folded
+    into the daily unique-visitor sketches. Only events that were actually
+    inserted by the flush are counted; events that could not be written are
+    kept for the next flush, up to ``max_backlog`` events.
+    """
+
+    def __init__(self, max_size: int, flush_interval: float, max_backlog: int):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_backlog = max_backlog
+        self._events: List[dict] = []
+        # The batch being written by a flush, still visible to find_pending
+        self._in_flight: List[dict] = []
+        # Ids of requeued events whose failed write may have stored them anyway
+        self._unconfirmed: Set[ObjectId] = set()
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._events) + len(self._in_flight)
+
+    def enqueue(self, event: dict):
+        self._events.append(event)
+        if len(self._events) >= self.max_size and (self._pending_flush is None or self._pending_flush.done()):
+            self._pending_flush = asyncio.create_task(self.flush())
+
+    def find_pending(self, predicate: Callable[[dict], bool]) -> Optional[dict]:
+        """Most recent buffered or in-flight event matching ``predicate``"""
+        for event in reversed(self._events):
+            if predicate(event):
+                return event
+        for event in reversed(self._in_flight):
+            if predicate(event):
+                return event
+        return None
+
+    async def flush(self):
+        async with self._flush_lock:
+            events, self._events = self._events, []
+            if not events:
+                return
+
+            from app.main import app
+            db = app.mongodb
+
+            # Progress updates may still change the in-flight events, so a copy is written
+            self._in_flight = events
+            try:
+                events = self._in_flight = await self._skip_written(db, events)
+                written = [dict(event) for event in events]
+                inserted = await self._insert(db, written) if events else []
+                await self._write_late_progress(db, events, written, inserted)
+            finally:
+                self._in_flight = []
+
+            events = [written[i] for i in inserted]
+            if not events:
+                return
+
+            views = Counter(event["blog_id"] for event in events)
+            try:
+                await db.blogs.bulk_write(
+                    [UpdateOne({"_id": blog_id}, {"$inc": {"views_count": count}}) for blog_id, count in views.items()],
+                    ordered=False
+                )
+            except Exception as e:
+                logger.error(f"Failed to update views_count for {len(views)} blogs: {e}")
+
+            if settings.ANALYTICS_ROLLUPS_ENABLED:
+                try:
+                    await record_view_events(db, events)
+                except Exception as e:
+                    logger.error(f"Failed to roll up {len(events)} view events: {e}")
+
+            try:
+                await record_visitors(db, events)
+            except Exception as e:
+                logger.error(f"Failed to update visitor sketches for {len(events)} view events: {e}")
+
+    async def _skip_written(self, db, events: List[dict]) -> List[dict]:
+        """Drop requeued events that the failed flush wrote after all.
+
+        When a write fails without saying which events it wrote, the whole
+        batch is requeued. A regular view_events rejects the ones that were
+        written by their unique _id, but a time-series collection has no
+        unique index, so they are looked up here by _id within their blogs
+        and time range, which both collection types index. Like duplicate
+        key rejections, they are not counted.
+        """
+        retried = [event for event in events if event["_id"] in self._unconfirmed]
+        if not retried:
+            return events
+
+        try:
+            written = {view_event["_id"] async for view_event in db.view_events.find({
+                "_id": {"$in": [event["_id"] for event in retried]},
+                "blog_id": {"$in": list({event["blog_id"] for event in retried})},
+                "created_at": {
+                    "$gte": min(event["created_at"] for event in retried),
+                    "$lte": max(event["created_at"] for event in retried)
+                }
+            }, {"_id": 1})}
+        except Exception as e:
+            self._requeue(events, e)
+            return []
+
+        self._unconfirmed.difference_update(event["_id"] for event in retried)
+        return [event for event in events if event["_id"] not in written]
+
+    async def _insert(self, db, events: List[dict]) -> List[int]:
+        """Insert a batch and return the positions of the events this call inserted.
+
+        Events rejected with a duplicate key were already written by an
+        earlier flush whose acknowledgement was lost, so they are neither
+        counted again nor retried; events that failed otherwise are requeued.
+        """
+        try:
+            await db.view_events.insert_many(events, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            failed = {error["index"] for error in errors}
+            retry = [self._in_flight[error["index"]] for error in errors if error["code"] != DUPLICATE_KEY_ERROR]
+            if retry:
+                self._requeue(retry, e)
+            return [i for i in range(len(events)) if i not in failed]
+        except Exception as e:
+            # Some of the events may have been written anyway
+            self._requeue(self._in_flight, e, unconfirmed=True)
+            return []
+        return list(range(len(events)))
+
+    async def _write_late_progress(self, db, events: List[dict], written: List[dict], inserted: List[int]):
+        """Write read progress that reached in-flight events after their copies were taken"""
+        while True:
+            late = [i for i in inserted if events[i].get("read_percentage") != written[i].get("read_percentage")]
+            # No await between this check and the caller clearing _in_flight, so nothing can slip in
+            if not late:
+                return
+            for i in late:
+                written[i]["read_percentage"] = events[i]["read_percentage"]
+            try:
+                await db.view_events.bulk_write([
+                    UpdateOne(
+                        view_event_filter(written[i]["_id"], written[i]["blog_id"], written[i]["created_at"]),
+                        {"$max": {"read_percentage": written[i]["read_percentage"]}}
+                    )
+                    for i in late
+                ], ordered=False)
+            except Exception as e:
+                logger.error(f"Failed to write read progress of {len(late)} view events: {e}")
+                return
+
+    def _requeue(self, events: List[dict], error: Exception, unconfirmed: bool = False):
+        room = self.max_backlog - len(self._events)
+        kept = events[:max(room, 0)]
+        self._events[:0] = kept
+        if unconfirmed:
+            self._unconfirmed.update(event["_id"] for event in kept)
+        logger.error(f"Failed to flush {len(events)} view events, {len(events) - len(kept)} dropped: {error}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # Shielded so stop() cancelling the timer can't abandon a batch mid-write
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                logger.error(f"View event flush failed: {e}")
+
+    def start(self):
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush timer and drain whatever is still buffered.
+
+        A timer flush that is already running carries on; the final flush
+        waits for it on the flush lock.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        if self._pending_flush is not None:
+            await asyncio.gather(self._pending_flush, return_exceptions=True)
+        await self.flush()
+
+
+view_buffer = ViewEventBuffer(
+    max_size=settings.VIEW_BUFFER_MAX_SIZE,
+    flush_interval=settings.VIEW_BUFFER_FLUSH_INTERVAL_SECONDS,
+    max_backlog=settings.VIEW_BUFFER_MAX_BACKLOG
+)
+metrics.gauge("view_buffer_size", lambda: len(view_buffer))
@@ -0,0 +1,266 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# A read counts as completed from this percentage on
+COMPLETION_THRESHOLD = 80
+
+# Read depth is bucketed by the deepest point a view reached: 0, 25, 50, 75, 100
+READ_DEPTH_BUCKET = 25
+
+
+# Views, likes and comments are also counted per 15-minute slot of the UTC day, which every
+# real UTC offset is a whole number of, so they can be moved into an author's local days
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+TIMELINE_COUNTERS = ("views", "likes", "comments")
+
+
+def day_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def slot_key(moment: datetime) -> str:
+    """Slot of the UTC day ``moment`` falls in, zero-padded so keys compare in time order"""
+    return f"{(moment.hour * 60 + moment.minute) // SLOT_MINUTES:02d}"
+
+
+def snap_tz_offset(tz_offset: int) -> int:
+    """Round a UTC offset in minutes to the slot grid"""
+    return round(tz_offset / SLOT_MINUTES) * SLOT_MINUTES
+
+
+def slot_day_shift(slot: int, tz_offset: int) -> int:
+    """Days between a UTC day and the local day its ``slot`` falls on under ``tz_offset``"""
+    return (slot * SLOT_MINUTES + tz_offset) // (24 * 60)
+
+
+def local_day_split(tz_offset: int) -> Tuple[int, str]:
+    """How a UTC day's slots fall into local days under ``tz_offset`` (on the slot grid).
+
+    A UTC day spans at most two local days: slots keyed before the returned
+    key are on the UTC day plus the returned shift, the others on the day after that.
+    """
+    shifts = [slot_day_shift(slot, tz_offset) for slot in range(SLOTS_PER_DAY)]
+    boundary = next((slot for slot, shift in enumerate(shifts) if shift != shifts[0]), SLOTS_PER_DAY)
+    return shifts[0], f"{boundary:02d}"
+
+
+def encode_key(value: str) -> str:
+    """Make a value usable as a field name in a rollup counter map"""
+    return value.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def decode_key(key: str) -> str:
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+
+def referrer_domain(referrer: Optional[str]) -> Optional[str]:
+    """Normalized host of a referrer URL: lowercase, without port or a leading "www." """
+    if not referrer:
+        return None
+    try:
+        host = urlparse(referrer).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def referrer_source(event: dict) -> str:
+    """Traffic source of a view event: its referrer domain, or "direct" """
+    if "referrer_domain" in event:
+        return event["referrer_domain"] or "direct"
+    # Recorded before the domain was stored at ingest
+    return referrer_domain(event.get("referrer")) or "direct"
+
+
+def read_depth_bucket(read_percentage: int) -> str:
+    return str(min(max(read_percentage, 0) // READ_DEPTH_BUCKET * READ_DEPTH_BUCKET, 100))
+
+
+def read_progress_inc(old: Optional[int], new: int) -> Dict[str, int]:
+    """Counter changes for a view whose read percentage moves from ``old`` to ``new``"""
+    inc = defaultdict(int)
+    inc["read.sum"] += new - (old or 0)
+    inc[f"read_depth.{read_depth_bucket(new)}"] += 1
+    if old is None:
+        inc["read.count"] += 1
+    else:
+        inc[f"read_depth.{read_depth_bucket(old)}"] -= 1
+    completed = (new >= COMPLETION_THRESHOLD) - (old is not None and old >= COMPLETION_THRESHOLD)
+    if completed:
+        inc["read.completed"] += completed
+    return {field: value for field, value in inc.items() if value}
+
+
+def view_events_inc(events: Iterable[dict]) -> Dict[tuple, Dict[str, int]]:
+    """Merge view events into counter increments per (blog_id, day)"""
+    incs: Dict[tuple, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for event in events:
+        inc = incs[(event["blog_id"], day_start(event["created_at"]))]
+        inc["views"] += 1
+        inc[f"slots.views.{slot_key(event['created_at'])}"] += 1
+        inc[f"sources.{encode_key(referrer_source(event))}"] += 1
+        inc[f"devices.{encode_key(event.get('device') or 'unknown')}"] += 1
+        if event.get("country"):
+            inc[f"countries.{encode_key(event['country'])}"] += 1
+        if event.get("read_percentage") is not None:
+            for field, value in read_progress_inc(None, event["read_percentage"]).items():
+                inc[field] += value
+    return incs
+
+
+def rollup_update(blog_id: ObjectId, day: datetime, inc: Dict[str, int]) -> UpdateOne:
+    return UpdateOne({"blog_id": blog_id, "day": day}, {"$inc": inc}, upsert=True)
+
+
+async def record_view_events(db, events: List[dict]):
+    """Fold a batch of freshly written view events into the daily rollups"""
+    updates = [rollup_update(blog_id, day, inc) for (blog_id, day), inc in view_events_inc(events).items()]
+    if updates:
+        await db.daily_blog_stats.bulk_write(updates, ordered=False)
+
+
+async def record_counter(db, blog_id, moment: datetime, field: str, amount: int = 1):
+    """Bump one counter (likes or comments) of a blog's rollup, and its slot, for the day of ``moment``"""
+    await db.daily_blog_stats.update_one(
+        {"blog_id": ObjectId(blog_id), "day": day_start(moment)},
+        {"$inc": {field: amount, f"slots.{field}.{slot_key(moment)}": amount}},
+        upsert=True
+    )
+
+
+async def record_read_progress(db, view_event: dict, read_percentage: int):
+    """Apply a read percentage change of an already written view event to its rollup"""
+    inc = read_progress_inc(view_event.get("read_percentage"), read_percentage)
+    if inc:
+        await db.daily_blog_stats.update_one(
+            {"blog_id": view_event["blog_id"], "day": day_start(view_event["created_at"])},
+            {"$inc": inc},
+            upsert=True
+        )
+
+
+async def record_read_progress_many(db, changes: Iterable[tuple]):
+    """record_read_progress for many (view_event, read_percentage) pairs, with one bulk_write"""
+    incs: Dict[tuple, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for view_event, read_percentage in changes:
+        inc = incs[(view_event["blog_id"], day_start(view_event["created_at"]))]
+        for field, value in read_progress_inc(view_event.get("read_percentage"), read_percentage).items():
+            inc[field] += value
+
+    updates = []
+    for (blog_id, day), inc in incs.items():
+        inc = {field: value for field, value in inc.items() if value}
+        if inc:
+            updates.append(rollup_update(blog_id, day, inc))
+    if updates:
+        await db.daily_blog_stats.bulk_write(updates, ordered=False)
+
+
+async def find_rollups(db, blog_ids: List[ObjectId], start_date: datetime, end_date: datetime) -> List[dict]:
+    return await db.daily_blog_stats.find({
+        "blog_id": {"$in": blog_ids},
+        "day": {"$gte": day_start(start_date), "$lte": end_date}
+    }).to_list(length=None)
+
+
+def check_rebuild_window(since: Optional[datetime], history_start: Optional[datetime]):
+    """Refuse to rebuild days whose raw view events have (partly) expired.
+
+    Rebuilding them would replace the rollups, the only complete record of
+    those days, with counts of whatever raw events are left.
+    """
+    if history_start is not None and (since is None or since < history_start):
+        raise ValueError(
+            f"Raw view events before {history_start:%Y-%m-%d} have expired; "
+            f"rebuild from that day on instead"
+        )
+
+
+async def rebuild_rollups(
+        db,
+        since: Optional[datetime] = None,
+        batch_size: int = 1000,
+        archived_events: Iterable[dict] = (),
+        history_start: Optional[datetime] = None,
+        archived_until: Optional[datetime] = None
+) -> int:
+    """Recompute daily_blog_stats from raw view events, likes and comments.
+
+    Rollups on or after ``since`` (or all of them) are replaced. View events
+    that were moved out of Mongo must be passed as ``archived_events``, and
+    view events in Mongo before ``archived_until`` (the archive horizon) are
+    skipped, as the archive already holds them. ``history_start`` is the
+    first day whose raw events are complete (see view_store.raw_history_start);
+    a window reaching before it raises ValueError. Returns the number of
+    rollup documents written.
+    """
+    since = day_start(since) if since else None
+    check_rebuild_window(since, history_start)
+    created_filter = {"created_at": {"$gte": since}} if since else {}
+
+    incs: Dict[tuple, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    batch = []
+    async for event in db.view_events.find(hot_events_filter(since, archived_until)):
+        batch.append(event)
+        if len(batch) >= batch_size:
+            _merge(incs, view_events_inc(batch))
+            batch = []
+    for event in archived_events:
+        batch.append(event)
+        if len(batch) >= batch_size:
+            _merge(incs, view_events_inc(batch))
+            batch = []
+    _merge(incs, view_events_inc(batch))
+
+    slot_expr = {"$dateTrunc": {"date": "$created_at", "unit": "minute", "binSize": SLOT_MINUTES}}
+    # comments store blog_id as a string
+    for field, collection, blog_expr in (
+            ("likes", db.likes, "$blog_id"),
+            ("comments", db.comments, {"$toObjectId": "$blog_id"})
+    ):
+        async for row in collection.aggregate([
+            {"$match": created_filter},
+            {"$group": {"_id": {"blog_id": blog_expr, "slot": slot_expr}, "count": {"$sum": 1}}}
+        ]):
+            inc = incs[(row["_id"]["blog_id"], day_start(row["_id"]["slot"]))]
+            inc[field] += row["count"]
+            inc[f"slots.{field}.{slot_key(row['_id']['slot'])}"] += row["count"]
+
+    await db.daily_blog_stats.delete_many({"day": {"$gte": since}} if since else {})
+
+    documents = [_rollup_document(blog_id, day, inc) for (blog_id, day), inc in incs.items()]
+    for i in range(0, len(documents), batch_size):
+        await db.daily_blog_stats.insert_many(documents[i:i + batch_size], ordered=False)
+    return len(documents)
+
+
+def hot_events_filter(since: Optional[datetime], archived_until: Optional[datetime]) -> dict:
+    """Filter for the view events a rebuild reads from Mongo rather than from the archive"""
+    start = max(filter(None, (since, archived_until)), default=None)
+    return {"created_at": {"$gte": start}} if start else {}
+
+
+def _merge(target: Dict[tuple, Dict[str, int]], incs: Dict[tuple, Dict[str, int]]):
+    for key, inc in incs.items():
+        for field, value in inc.items():
+            target[key][field] += value
+
+
+def _rollup_document(blog_id: ObjectId, day: datetime, inc: Dict[str, int]) -> dict:
+    document = {"blog_id": blog_id, "day": day}
+    for path, value in inc.items():
+        *parents, leaf = path.split(".")
+        node = document
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[leaf] = value
+    return document
+
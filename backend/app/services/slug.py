@@ -0,0 +1,70 @@
+import re
+from typing import Any, Awaitable, Callable
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Collisions are only expected for slugs written before the counters existed
+SLUG_MAX_ATTEMPTS = 5
+
+
+def slug_matches_base(slug: str, base_slug: str) -> bool:
+    """True if ``slug`` is ``base_slug`` or ``base_slug`` with a numeric suffix"""
+    return re.fullmatch(f"{re.escape(base_slug)}(-[0-9]+)?", slug) is not None
+
+
+async def next_slug(db, base_slug: str) -> str:
+    """Reserve the next slug for ``base_slug`` with one atomic counter increment.
+
+    The first caller gets ``base_slug`` itself, later ones ``base_slug-1``,
+    ``base_slug-2`` and so on.
+    """
+    counter = await db.slug_counters.find_one_and_update(
+        {"_id": base_slug},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    seq = counter["seq"] - 1
+    return f"{base_slug}-{seq}" if seq else base_slug
+
+
+async def sync_slug_counter(db, base_slug: str):
+    """Move the counter for ``base_slug`` past every slug already taken for it"""
+    # Anchored prefix regex, so this is a range scan on the slug index
+    pattern = f"^{re.escape(base_slug)}(-[0-9]+)?$"
+    taken = 0
+    async for blog in db.blogs.find({"slug": {"$regex": pattern}}, {"slug": 1}):
+        suffix = blog["slug"][len(base_slug):]
+        taken = max(taken, int(suffix[1:]) + 1 if suffix else 1)
+
+    await db.slug_counters.update_one(
+        {"_id": base_slug},
+        {"$max": {"seq": taken}},
+        upsert=True
+    )
+
+
+def is_slug_conflict(error: DuplicateKeyError) -> bool:
+    return "slug" in (error.details or {}).get("keyPattern", {"slug": 1})
+
+
+async def write_with_unique_slug(db, base_slug: str, write: Callable[[str], Awaitable[Any]]) -> str:
+    """Call ``write(slug)`` with freshly allocated slugs until it doesn't hit the unique slug index.
+
+    Returns the slug that was written.
+    """
+    for _ in range(SLUG_MAX_ATTEMPTS):
+        slug = await next_slug(db, base_slug)
+        try:
+            await write(slug)
+            return slug
+        except DuplicateKeyError as e:
+            if not is_slug_conflict(e):
+                raise
+            await sync_slug_counter(db, base_slug)
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Could not allocate a unique slug"
+    )
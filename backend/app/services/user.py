@@ -1,8 +1,37 @@
 from fastapi import HTTPException, status
-from app.schemas.user import UserUpdate, User
+from typing import Optional
+from app.config import settings
+from app.schemas.user import UserUpdate, User, UserInDB
+from app.services.blog import invalidate_author_blogs
+from app.utils.cache import TTLCache
 from bson import ObjectId
 from datetime import datetime
 
+# Authenticated users resolved from their tokens, keyed by user id
+principal_cache = TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+def invalidate_principal(user_id: str):
+    principal_cache.pop(user_id)
+
+
+async def get_principal(user_id: str) -> Optional[UserInDB]:
+    """The user behind an access token, served from a short-lived cache when possible"""
+    user = principal_cache.get(user_id)
+    if user is not None:
+        return user
+
+    from app.main import app
+    db = app.mongodb
+    user = await db["users"].find_one({"_id": ObjectId(user_id)})
+    if not user:
+        return None
+
+    user["id"] = str(user.pop("_id"))  # Convert ObjectId to string and rename _id -> id
+    principal = UserInDB(**user)
+    principal_cache.set(user_id, principal)
+    return principal
+
 
 async def get_user_by_id(user_id: str) -> User:
     from app.main import app
@@ -48,6 +77,9 @@ async def update_user(user_id: str, user_update: UserUpdate) -> User:
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+        invalidate_principal(user_id)
+        # Blog pages embed the author's profile
+        await invalidate_author_blogs(db, user_id)
 
     # Get updated user
     updated_user = await db.users.find_one({"_id": ObjectId(user_id)})
@@ -71,5 +103,7 @@ async def update_user_avatar(user_id: str, avatar_path: str) -> bool:
         {"_id": ObjectId(user_id)},
         {"$set": {"avatar": avatar_path, "updated_at": datetime.utcnow()}}
     )
+    invalidate_principal(user_id)
+    await invalidate_author_blogs(db, user_id)
 
     return result.modified_count > 0
\ No newline at end of file
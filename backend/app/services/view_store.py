@@ -0,0 +1,114 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from bson import ObjectId
+from app.services.archive import archived_partitions, partition_day
+from app.services.rollups import day_start
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 24 * 60 * 60
+
+# Most a view event's created_at can be apart from the timestamp in its _id
+VIEW_ID_MAX_SKEW = timedelta(seconds=5)
+
+
+def timeseries_options(retention_days: int = 0) -> dict:
+    """create_collection options for view_events as a time-series collection"""
+    options = {"timeseries": {"timeField": "created_at", "metaField": "blog_id", "granularity": "minutes"}}
+    if retention_days:
+        options["expireAfterSeconds"] = retention_days * DAY_SECONDS
+    return options
+
+
+def view_event_filter(view_id: ObjectId, blog_id: ObjectId, created_at: Optional[datetime] = None) -> dict:
+    """Filter selecting one stored view event by its _id.
+
+    A time-series view_events neither indexes _id nor enforces its
+    uniqueness, so the filter also pins blog_id and created_at, which both
+    collection types index. Without ``created_at`` it is bounded by the _id's
+    own timestamp, since the two are generated together at ingest.
+    """
+    if created_at is None:
+        generated = view_id.generation_time.replace(tzinfo=None)
+        created_at = {"$gte": generated - VIEW_ID_MAX_SKEW, "$lt": generated + VIEW_ID_MAX_SKEW}
+    return {"_id": view_id, "blog_id": blog_id, "created_at": created_at}
+
+
+async def collection_type(db, name: str) -> Optional[str]:
+    """"collection" or "timeseries", or None if ``name`` does not exist yet"""
+    cursor = await db.list_collections(filter={"name": name})
+    for info in await cursor.to_list(length=1):
+        return info.get("type", "collection")
+    return None
+
+
+async def setup_view_events(db, timeseries: bool = False, retention_days: int = 0):
+    """Create view_events and its indexes, and apply the raw-event retention.
+
+    A missing collection is created as a time-series collection if
+    ``timeseries`` is set; an existing regular collection is left as it is
+    (see migrate_view_events.py). ``retention_days`` of 0 keeps raw events forever.
+    """
+    kind = await collection_type(db, "view_events")
+    if kind is None and timeseries:
+        await db.create_collection("view_events", **timeseries_options(retention_days))
+        kind = "timeseries"
+    elif kind != "timeseries" and timeseries:
+        logger.warning("view_events is a regular collection; run migrate_view_events.py to convert it")
+
+    # Analytics always filter on one or more blogs and a time range
+    await db.view_events.create_index([("blog_id", 1), ("created_at", 1)])
+    # which also serves everything the single-field blog_id index of older deployments did
+    indexes = await db.view_events.index_information()
+    for name, index in indexes.items():
+        if index["key"] == [("blog_id", 1)]:
+            await db.view_events.drop_index(name)
+    # Read-progress updates from clients without a view token look up the reader's latest view
+    await db.view_events.create_index([("blog_id", 1), ("ip_address", 1), ("user_id", 1), ("created_at", -1)])
+
+    if kind == "timeseries":
+        await db.command(
+            "collMod", "view_events",
+            expireAfterSeconds=retention_days * DAY_SECONDS if retention_days else "off"
+        )
+        return
+
+    await apply_ttl_index(db, retention_days)
+
+
+async def apply_ttl_index(db, retention_days: int):
+    """Make the created_at index of a regular view_events collection expire events after ``retention_days``.
+
+    The index is kept without a retention too: archiving and rollup rebuilds
+    scan by created_at across all blogs.
+    """
+    expire_after = retention_days * DAY_SECONDS if retention_days else None
+    indexes = await db.view_events.index_information()
+    current = next((index for index in indexes.values() if index["key"] == [("created_at", 1)]), None)
+    if current is not None and current.get("expireAfterSeconds") == expire_after:
+        return
+
+    if current is not None:
+        await db.view_events.drop_index([("created_at", 1)])
+    if expire_after:
+        await db.view_events.create_index("created_at", expireAfterSeconds=expire_after)
+    else:
+        await db.view_events.create_index("created_at")
+
+
+def raw_history_start(retention_days: int, archive_dir: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """First UTC day whose raw view events are all still readable, or None if none have expired.
+
+    With a retention period Mongo only holds complete days after the
+    expiry cutoff; days before that are only complete if they were archived
+    (archive_view_events.py must run with a shorter age than the retention).
+    """
+    if not retention_days:
+        return None
+    now = datetime.utcnow() if now is None else now
+    start = day_start(now - timedelta(days=retention_days)) + timedelta(days=1)
+    partitions = archived_partitions(archive_dir)
+    if partitions:
+        start = min(start, partition_day(partitions[0]))
+    return start
@@ -0,0 +1,171 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from bson import Binary, ObjectId
+from pymongo.errors import DuplicateKeyError
+from app.services.rollups import check_rebuild_window, day_start, hot_events_filter
+from app.utils.hyperloglog import HyperLogLog
+
+# Sketches are merged read-modify-write; a lost race is retried against the new version
+SKETCH_MAX_ATTEMPTS = 10
+
+
+def visitor_key(event: dict) -> str:
+    """Identity a view is counted under: the user if signed in, otherwise IP + user agent"""
+    if event.get("user_id"):
+        return f"user:{event['user_id']}"
+    return f"anon:{event.get('ip_address', '')}|{event.get('user_agent', '')}"
+
+
+def view_events_sketches(
+        events: Iterable[dict],
+        owner: Callable[[dict], Any] = lambda event: event["blog_id"]
+) -> Dict[tuple, HyperLogLog]:
+    """One sketch of the visitors per (owner, day) of a batch of view events; the owner is the blog by default.
+
+    Events whose owner is None are skipped.
+    """
+    sketches: Dict[tuple, HyperLogLog] = defaultdict(HyperLogLog)
+    for event in events:
+        key = owner(event)
+        if key is not None:
+            sketches[(key, day_start(event["created_at"]))].add(visitor_key(event))
+    return sketches
+
+
+async def merge_sketch(collection, owner: dict, day: datetime, sketch: HyperLogLog):
+    """Merge ``sketch`` into the stored sketch of ``owner`` (e.g. ``{"blog_id": ...}``) for a day.
+
+    Mongo cannot take the register-wise maximum of two binaries, so the stored
+    sketch is read, merged and written back guarded by its version.
+    """
+    for _ in range(SKETCH_MAX_ATTEMPTS):
+        stored = await collection.find_one({**owner, "day": day})
+        if stored is None:
+            try:
+                await collection.insert_one({
+                    **owner,
+                    "day": day,
+                    "registers": Binary(sketch.to_bytes()),
+                    "version": 0
+                })
+                return
+            except DuplicateKeyError:
+                continue
+
+        merged = HyperLogLog(stored["registers"]).merge(sketch).to_bytes()
+        if merged == stored["registers"]:
+            return
+        result = await collection.update_one(
+            {"_id": stored["_id"], "version": stored["version"]},
+            {"$set": {"registers": Binary(merged)}, "$inc": {"version": 1}}
+        )
+        if result.modified_count:
+            return
+
+    raise RuntimeError(f"Could not merge visitor sketch of {owner} for {day:%Y-%m-%d}")
+
+
+async def blog_authors(db, blog_ids: Iterable[ObjectId]) -> Dict[ObjectId, str]:
+    """author_id of each of the blogs that still exist"""
+    return {
+        blog["_id"]: blog["author_id"]
+        async for blog in db.blogs.find({"_id": {"$in": list(set(blog_ids))}}, {"author_id": 1})
+        if blog.get("author_id")
+    }
+
+
+async def record_visitors(db, events: List[dict]):
+    """Fold the visitors of a batch of freshly written view events into the daily blog and author sketches"""
+    authors = await blog_authors(db, (event["blog_id"] for event in events))
+    await asyncio.gather(
+        *(
+            merge_sketch(db.visitor_sketches, {"blog_id": blog_id}, day, sketch)
+            for (blog_id, day), sketch in view_events_sketches(events).items()
+        ),
+        *(
+            merge_sketch(db.author_visitor_sketches, {"author_id": author_id}, day, sketch)
+            for (author_id, day), sketch in view_events_sketches(
+                events, lambda event: authors.get(event["blog_id"])
+            ).items()
+        )
+    )
+
+
+async def _count_visitors(collection, owner_filter: dict, start_date: datetime, end_date: datetime) -> int:
+    sketches = [
+        stored["registers"]
+        async for stored in collection.find(
+            {**owner_filter, "day": {"$gte": day_start(start_date), "$lte": end_date}},
+            {"registers": 1}
+        )
+    ]
+    # A year of sketches is a few MB of registers to merge, so keep it off the event loop
+    total = await asyncio.to_thread(HyperLogLog.union, sketches)
+    return total.count()
+
+
+async def count_unique_visitors(db, blog_ids: List[ObjectId], start_date: datetime, end_date: datetime) -> int:
+    """Approximate distinct visitors of the blogs over the window, from one sketch per blog and day"""
+    return await _count_visitors(db.visitor_sketches, {"blog_id": {"$in": blog_ids}}, start_date, end_date)
+
+
+async def count_author_visitors(db, author_id: str, start_date: datetime, end_date: datetime) -> int:
+    """Approximate distinct visitors of all of an author's blogs over the window.
+
+    Reads one sketch per day however many posts the author has. Visitors of
+    blogs deleted since stay in these sketches.
+    """
+    return await _count_visitors(db.author_visitor_sketches, {"author_id": author_id}, start_date, end_date)
+
+
+async def rebuild_visitor_sketches(
+        db,
+        since: Optional[datetime] = None,
+        batch_size: int = 1000,
+        archived_events: Iterable[dict] = (),
+        history_start: Optional[datetime] = None,
+        archived_until: Optional[datetime] = None
+) -> int:
+    """Recompute visitor_sketches and author_visitor_sketches from raw view events, including ``archived_events``.
+
+    Like rebuild_rollups, skips Mongo events before ``archived_until`` and
+    refuses a window reaching before ``history_start``. Returns the number
+    of sketches written.
+    """
+    since = day_start(since) if since else None
+    check_rebuild_window(since, history_start)
+    authors = {blog["_id"]: blog.get("author_id") async for blog in db.blogs.find({}, {"author_id": 1})}
+    blog_sketches: Dict[tuple, HyperLogLog] = defaultdict(HyperLogLog)
+    author_sketches: Dict[tuple, HyperLogLog] = defaultdict(HyperLogLog)
+
+    def add(event: dict):
+        day = day_start(event["created_at"])
+        visitor = visitor_key(event)
+        blog_sketches[(event["blog_id"], day)].add(visitor)
+        if authors.get(event["blog_id"]):
+            author_sketches[(authors[event["blog_id"]], day)].add(visitor)
+
+    async for event in db.view_events.find(
+            hot_events_filter(since, archived_until),
+            {"blog_id": 1, "created_at": 1, "user_id": 1, "ip_address": 1, "user_agent": 1}
+    ):
+        add(event)
+    for event in archived_events:
+        add(event)
+
+    written = 0
+    for collection, owner_field, sketches in (
+            (db.visitor_sketches, "blog_id", blog_sketches),
+            (db.author_visitor_sketches, "author_id", author_sketches)
+    ):
+        await collection.delete_many({"day": {"$gte": since}} if since else {})
+        documents = [
+            {owner_field: owner, "day": day, "registers": Binary(sketch.to_bytes()), "version": 0}
+            for (owner, day), sketch in sketches.items()
+        ]
+        for i in range(0, len(documents), batch_size):
+            await collection.insert_many(documents[i:i + batch_size], ordered=False)
+        written += len(documents)
+    return written
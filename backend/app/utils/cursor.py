@@ -0,0 +1,64 @@
+import base64
+from typing import Any, List, Sequence, Tuple
+from bson import json_util
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last item on a page as an opaque, URL-safe cursor.
+    """
+    raw = json_util.dumps(list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[Tuple[type, ...]]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor, holding one value of ``types[i]``
+    for each sort key. Raises ValueError if it is malformed.
+
+    The values end up in query clauses, so anything else (e.g. an operator
+    document in a crafted cursor) is rejected here.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    for value, allowed in zip(values, types):
+        # bool is an int subclass but never a sort key value
+        if isinstance(value, bool) or not isinstance(value, allowed):
+            raise ValueError("Invalid cursor")
+    return values
+
+
+def _after(field: str, value: Any, direction: int) -> dict:
+    # Mongo sorts null before every other value and range operators never match null
+    if direction < 0:
+        if value is None:
+            return {}
+        return {"$or": [{field: {"$lt": value}}, {field: None}]}
+    if value is None:
+        return {field: {"$ne": None}}
+    return {field: {"$gt": value}}
+
+
+def keyset_filter(fields: Sequence[str], values: Sequence[Any], directions: Sequence[int]) -> dict:
+    """
+    Build a filter matching documents that sort strictly after ``values``
+    under the sort ``fields``/``directions``. The last field must be unique.
+    """
+    clauses = []
+    for i, (field, value, direction) in enumerate(zip(fields, values, directions)):
+        after = _after(field, value, direction)
+        if not after:
+            continue
+        equal = [{prev_field: prev_value} for prev_field, prev_value in zip(fields[:i], values[:i])]
+        clauses.append({"$and": equal + [after]} if equal else after)
+
+    if not clauses:
+        # Nothing sorts after the cursor
+        return {"_id": {"$exists": False}}
+    return {"$or": clauses}
@@ -0,0 +1,43 @@
+import time
+from typing import Any, Hashable
+
+_MISSING = object()
+
+
+class RecentKeys:
+    """
+    Remembers keys for ``window`` seconds in two rotating dict generations.
+    Memory is bounded by ``max_keys``: a full generation is rotated out early,
+    which only shortens the window under extreme load.
+    """
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.generation_size = max(max_keys // 2, 1)
+        self._current: dict = {}
+        self._previous: dict = {}
+        self._rotated_at = time.monotonic()
+
+    def _rotate(self, now: float):
+        if now - self._rotated_at >= self.window or len(self._current) >= self.generation_size:
+            self._previous, self._current = self._current, {}
+            self._rotated_at = now
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Value stored for ``key`` if it was added within the window"""
+        now = time.monotonic()
+        self._rotate(now)
+        entry = self._current.get(key, _MISSING)
+        if entry is _MISSING:
+            entry = self._previous.get(key, _MISSING)
+        if entry is _MISSING or now - entry[0] >= self.window:
+            return default
+        return entry[1]
+
+    def add(self, key: Hashable, value: Any = True):
+        now = time.monotonic()
+        self._rotate(now)
+        self._current[key] = (now, value)
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._previous)
@@ -0,0 +1,40 @@
+from typing import Any, Collection, Dict, Optional, Set
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def parse_fields(fields: Optional[str], allowed: Collection[str]) -> Optional[Set[str]]:
+    """
+    Parse a comma-separated ``fields=`` value. Returns None when no selection
+    was requested and raises ValueError on unknown field names.
+    """
+    if not fields:
+        return None
+
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected or None
+
+
+def select_fields(item: Any, fields: Set[str]) -> Dict[str, Any]:
+    """
+    Keep only ``fields`` of a model or dict, without validating it again.
+    """
+    if isinstance(item, BaseModel):
+        return item.model_dump(include=fields)
+    return {field: item[field] for field in fields if field in item}
+
+
+def trimmed_response(items: Any, fields: Set[str], headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    """
+    Serialize one item or a list of items restricted to ``fields``, bypassing
+    the route's response_model.
+    """
+    if isinstance(items, (list, tuple)):
+        content: Any = [select_fields(item, fields) for item in items]
+    else:
+        content = select_fields(items, fields)
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
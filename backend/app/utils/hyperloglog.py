@@ -0,0 +1,74 @@
+import hashlib
+import math
+from typing import Iterable, Optional
+
+# 2^12 one-byte registers: a 4 KiB sketch with a standard error of about 1.6%
+HLL_PRECISION = 12
+
+_HASH_BITS = 64
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality sketch stored as one byte per register.
+    Sketches of the same precision merge losslessly by taking the register-wise maximum.
+    """
+
+    def __init__(self, registers: Optional[bytes] = None, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.size)
+        elif len(registers) != self.size:
+            raise ValueError(f"Expected {self.size} registers, got {len(registers)}")
+        else:
+            self.registers = bytearray(registers)
+
+    def add(self, value: str):
+        hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+        rest_bits = _HASH_BITS - self.precision
+        index = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = rest_bits - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[str]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    @classmethod
+    def union(cls, sketches: Iterable[bytes], precision: int = HLL_PRECISION) -> "HyperLogLog":
+        """Merge many stored sketches in one pass over the registers, much faster than merging them pairwise"""
+        sketches = list(sketches)
+        size = 1 << precision
+        for registers in sketches:
+            if len(registers) != size:
+                raise ValueError(f"Expected {size} registers, got {len(registers)}")
+        if len(sketches) < 2:
+            return cls(sketches[0] if sketches else None, precision)
+        return cls(bytes(map(max, *sketches)), precision)
+
+    def count(self) -> int:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    def __bool__(self) -> bool:
+        return any(self.registers)
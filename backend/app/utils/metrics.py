@@ -0,0 +1,29 @@
+from collections import Counter
+from typing import Callable, Dict
+
+
+class Metrics:
+    """
+    Process-local counters and gauges, reported by the /api/metrics endpoint.
+    Each worker process keeps its own values.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def gauge(self, name: str, read: Callable[[], float]):
+        """Report ``read()`` under ``name`` whenever a snapshot is taken"""
+        self._gauges[name] = read
+
+    def snapshot(self) -> Dict[str, float]:
+        values = dict(self.counters)
+        for name, read in self._gauges.items():
+            values[name] = read()
+        return values
+
+
+metrics = Metrics()
@@ -0,0 +1,66 @@
+import time
+from typing import Dict, Hashable, List, Optional
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by client, holding only ``[tokens, updated_at]`` per key.
+    A missing bucket counts as full, so buckets idle for ``sweep_interval``
+    seconds (enough to refill a per-minute limit) are swept out, and past
+    ``maxsize`` the least recently used bucket is dropped.
+    """
+
+    def __init__(self, maxsize: int, sweep_interval: float = 60):
+        self.maxsize = maxsize
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[Hashable, List[float]] = {}
+        self._swept_at = time.monotonic()
+
+    def peek(self, key: Hashable, rate: float, capacity: float, now: Optional[float] = None) -> float:
+        """Like ``take``, but only report the wait without taking a token"""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        return 0 if tokens >= 1 else (1 - tokens) / rate
+
+    def take(self, key: Hashable, rate: float, capacity: float, now: Optional[float] = None) -> float:
+        """Take one token from ``key``'s bucket, refilling at ``rate`` tokens per second up to ``capacity``.
+
+        Returns 0 if a token was available, otherwise the seconds until one will be.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self._swept_at >= self.sweep_interval:
+            self.sweep(now)
+
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            bucket = [capacity, now]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        # Re-inserted so dict order is least recently used first
+        self._buckets[key] = bucket
+        if len(self._buckets) > self.maxsize:
+            del self._buckets[next(iter(self._buckets))]
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / rate
+
+    def sweep(self, now: Optional[float] = None, max_idle: Optional[float] = None):
+        """Drop buckets untouched for ``max_idle`` seconds (default: the sweep interval)"""
+        now = time.monotonic() if now is None else now
+        max_idle = self.sweep_interval if max_idle is None else max_idle
+        # Least recently used first, so stop at the first bucket that is still fresh
+        expired = []
+        for key, bucket in self._buckets.items():
+            if now - bucket[1] < max_idle:
+                break
+            expired.append(key)
+        for key in expired:
+            del self._buckets[key]
+        self._swept_at = now
+
+    def __len__(self) -> int:
+        return len(self._buckets)
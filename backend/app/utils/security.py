@@ -1,8 +1,14 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import metrics
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -12,6 +18,69 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+
+class PasswordPool:
+    """
+    Runs bcrypt on a small dedicated thread pool so it never blocks the event loop.
+    At most ``max_queue`` jobs may be running or waiting; beyond that requests get 503.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.max_queue = max_queue
+        self.jobs = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.jobs >= self.max_queue:
+            metrics.inc("password_jobs_rejected")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        self.jobs += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.jobs -= 1
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+password_pool = PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+metrics.gauge("password_queue_depth", lambda: password_pool.jobs)
+
+async def check_password(plain_password, hashed_password) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+async def hash_password(password) -> str:
+    return await password_pool.run(get_password_hash, password)
+
+# Recently verified access tokens -> user id, never kept past the token's expiry
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
+
+def token_subject(token: str) -> Optional[str]:
+    """User id of a valid access token, or None"""
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+
+    ttl = token_cache.ttl
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
 def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None):
     to_encode = {"sub": user_id}
     if expires_delta:
@@ -0,0 +1,93 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Mapping
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+ONE_DAY = timedelta(days=1)
+
+TIMELINE_UNITS = ("day", "week", "month")
+
+# Upper bound on the points "auto" granularity produces
+MAX_TIMELINE_POINTS = 120
+
+
+def epoch_day(moment: datetime, tz_offset: int = 0) -> int:
+    """Days since 1970-01-01 of a naive UTC datetime, in a zone ``tz_offset`` minutes east of UTC"""
+    return (moment - EPOCH + timedelta(minutes=tz_offset)) // ONE_DAY
+
+
+def day_date(day: int) -> date:
+    return date.fromordinal(EPOCH_ORDINAL + day)
+
+
+def timeline_unit(granularity: str, start: datetime, end: datetime, max_points: int = MAX_TIMELINE_POINTS) -> str:
+    """Resolve ``granularity`` to a unit, picking the finest one within ``max_points`` for "auto" """
+    if granularity != "auto":
+        return granularity
+    days = (end - start) // ONE_DAY + 1
+    if days <= max_points:
+        return "day"
+    if days // 7 + 1 <= max_points:
+        return "week"
+    return "month"
+
+
+class Timeline:
+    """Fixed day, week or month buckets covering ``start``..``end`` in an author's local time.
+
+    Timestamps are reduced to integer epoch days with a single timedelta floor
+    division each; only the distinct days are then mapped onto buckets, so
+    calendar arithmetic never runs per event. Weeks start on Monday and every
+    bucket is labelled with the local date it starts on.
+    """
+
+    def __init__(self, start: datetime, end: datetime, unit: str = "day", tz_offset: int = 0):
+        if unit not in TIMELINE_UNITS:
+            raise ValueError(f"Unknown timeline unit: {unit}")
+        self.unit = unit
+        self.tz_offset = tz_offset
+        # Local midnight of epoch day 0, expressed in UTC
+        self.origin = EPOCH - timedelta(minutes=tz_offset)
+        self.first_day = self.day(start)
+        self.last_day = self.day(end)
+        self.first = self.bucket(self.first_day)
+        self.size = self.bucket(self.last_day) - self.first + 1
+
+    def day(self, moment: datetime) -> int:
+        return (moment - self.origin) // ONE_DAY
+
+    def bucket(self, day: int) -> int:
+        if self.unit == "day":
+            return day
+        if self.unit == "week":
+            # Epoch day 0 was a Thursday
+            return (day + 3) // 7
+        local = day_date(day)
+        return local.year * 12 + local.month - 1
+
+    def bucket_start(self, bucket: int) -> date:
+        if self.unit == "day":
+            return day_date(bucket)
+        if self.unit == "week":
+            return day_date(bucket * 7 - 3)
+        return date(bucket // 12, bucket % 12 + 1, 1)
+
+    def count(self, timestamps: Iterable[datetime]) -> List[int]:
+        """Bucket counts of raw timestamps"""
+        return self.fold(Counter(map(self.day, timestamps)))
+
+    def fold(self, day_counts: Mapping[int, int]) -> List[int]:
+        """Bucket counts from counts keyed by epoch day; days outside the range are ignored"""
+        counts = [0] * self.size
+        for day, count in day_counts.items():
+            if self.first_day <= day <= self.last_day:
+                counts[self.bucket(day) - self.first] += count
+        return counts
+
+    def labels(self) -> List[str]:
+        return [self.bucket_start(bucket).isoformat() for bucket in range(self.first, self.first + self.size)]
+
+    def points(self, counts: List[int]) -> List[Dict[str, object]]:
+        """Timeline points for the response, validated by the response model in one pass"""
+        return [{"date": label, "count": count} for label, count in zip(self.labels(), counts)]
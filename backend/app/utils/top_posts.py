@@ -0,0 +1,25 @@
+import heapq
+from typing import Any, Dict, Hashable, Iterable, List, Mapping
+
+
+def rank_top_posts(
+        blogs: Iterable[dict],
+        views: Mapping[Hashable, int],
+        likes: Mapping[Hashable, int],
+        comments: Mapping[Hashable, int],
+        limit: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Pick the ``limit`` most viewed blogs given per-blog counts keyed by blog _id.
+    Uses a bounded heap, so it is O(posts * log(limit)) rather than a full sort.
+    """
+    top = heapq.nlargest(limit, blogs, key=lambda blog: views.get(blog["_id"], 0))
+    return [{
+        "id": str(blog["_id"]),
+        "title": blog["title"],
+        "slug": blog["slug"],
+        "views": views.get(blog["_id"], 0),
+        "likes": likes.get(blog["_id"], 0),
+        "comments": comments.get(blog["_id"], 0),
+        "published_at": blog.get("published_at") or blog["created_at"]
+    } for blog in top]
@@ -0,0 +1,24 @@
+import re
+from functools import lru_cache
+
+# The same few thousand user-agent strings account for nearly all traffic
+USER_AGENT_CACHE_SIZE = 4096
+
+_BOT = re.compile(r"bot|crawl|spider|slurp|preview|headless|curl|wget|python-requests|httpclient", re.IGNORECASE)
+_TABLET = re.compile(r"ipad|tablet|kindle|silk|playbook|android(?!.*mobile)", re.IGNORECASE)
+_MOBILE = re.compile(r"mobi|iphone|ipod|android|blackberry|opera mini|iemobile|windows phone", re.IGNORECASE)
+
+
+@lru_cache(maxsize=USER_AGENT_CACHE_SIZE)
+def classify_device(user_agent: str) -> str:
+    """Device class of a user-agent string: bot, tablet, mobile, desktop or unknown"""
+    if not user_agent:
+        return "unknown"
+    if _BOT.search(user_agent):
+        return "bot"
+    if _TABLET.search(user_agent):
+        return "tablet"
+    if _MOBILE.search(user_agent):
+        return "mobile"
+    return "desktop"
+
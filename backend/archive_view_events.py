@@ -0,0 +1,30 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+from app.services.archive import archive_view_events
+import os
+
+async def archive(days, archive_dir):
+    # Connect to MongoDB
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("MONGODB_DB_NAME", "blogmind")]
+
+    # Whole UTC days older than the hot window are moved, one day file at a time
+    before = datetime.utcnow() - timedelta(days=days)
+    moved = await archive_view_events(db, archive_dir, before)
+
+    print(f"Archived {moved} view events to {archive_dir}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old view events from MongoDB to compressed day files")
+    parser.add_argument("--days", type=int, default=int(os.getenv("VIEW_EVENTS_ARCHIVE_AFTER_DAYS", "0")),
+                        help="Keep the last N days in MongoDB (default: VIEW_EVENTS_ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--dir", default=os.getenv("VIEW_EVENTS_ARCHIVE_DIR", "archive/view_events"),
+                        help="Archive directory (default: VIEW_EVENTS_ARCHIVE_DIR)")
+    args = parser.parse_args()
+    if args.days <= 0:
+        parser.error("--days must be positive")
+    asyncio.run(archive(args.days, args.dir))
@@ -0,0 +1,121 @@
+"""
+Synthetic analytics data in a scratch MongoDB database, shared by the benchmarks.
+
+One author owns ``--posts`` blogs, which get ``--events`` view events spread
+over the last ``--days`` days, with a like per 20 views and a comment per 50.
+Traffic is skewed like real traffic: a few posts get most of the views. The
+rollups and visitor sketches are built with the same rebuild functions as
+rebuild_rollups.py, so every read path the endpoints use has its data.
+
+The database is dropped afterwards unless ``--keep`` is passed, and an
+existing seed of the same size is reused with ``--reuse``.
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.services.rollups import rebuild_rollups
+from app.services.view_store import setup_view_events
+from app.services.visitors import rebuild_visitor_sketches
+
+AUTHOR_ID = "65f000000000000000000001"
+
+DEVICES = ["desktop", "mobile", "tablet"]
+REFERRERS = [None, "google.com", "news.ycombinator.com", "twitter.com", "reddit.com"]
+COUNTRIES = [None, "US", "IN", "DE", "BR", "JP"]
+
+
+def add_database_arguments(parser: argparse.ArgumentParser, events: int = 1_000_000):
+    parser.add_argument("--mongodb-url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db", default="blogmind_benchmark", help="Scratch database, dropped afterwards")
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--events", type=int, default=events)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--reuse", action="store_true", help="Keep an existing seed of the same size")
+    parser.add_argument("--keep", action="store_true", help="Don't drop the database afterwards")
+
+
+async def prepare(args) -> Tuple[AsyncIOMotorClient, object]:
+    """Connect, seed if needed, and install the database as app.mongodb for the services"""
+    from app.main import app
+
+    client = AsyncIOMotorClient(args.mongodb_url)
+    db = client[args.db]
+    app.mongodb = db
+
+    seeded = await db.view_events.estimated_document_count()
+    if args.reuse and seeded == args.events and await db.blogs.count_documents({}) == args.posts:
+        print(f"Reusing {seeded} view events in {args.db}")
+        return client, db
+
+    await client.drop_database(args.db)
+    started = datetime.utcnow()
+    await seed(db, args.posts, args.events, args.days)
+    print(f"Seeded {args.posts} posts and {args.events} view events in {(datetime.utcnow() - started).total_seconds():.0f}s")
+    return client, db
+
+
+async def finish(client: AsyncIOMotorClient, args):
+    if not args.keep:
+        await client.drop_database(args.db)
+    client.close()
+
+
+async def seed(db, posts: int, events: int, days: int, batch_size: int = 10_000):
+    random.seed(42)
+    now = datetime.utcnow()
+    # A day short of the window, so no event sits on its edge
+    span = (days - 1) * 24 * 60 * 60
+
+    await setup_view_events(db)
+    await db.blogs.create_index("author_id")
+    await db.likes.create_index([("blog_id", 1), ("user_id", 1)])
+    await db.comments.create_index("blog_id")
+    await db.daily_blog_stats.create_index([("blog_id", 1), ("day", 1)], unique=True)
+    await db.visitor_sketches.create_index([("blog_id", 1), ("day", 1)], unique=True)
+    await db.author_visitor_sketches.create_index([("author_id", 1), ("day", 1)], unique=True)
+
+    blogs = [{
+        "_id": ObjectId(),
+        "title": f"Post {i}",
+        "slug": f"post-{i}",
+        "author_id": AUTHOR_ID,
+        "published": True,
+        "published_at": now - timedelta(days=i % days),
+        "created_at": now - timedelta(days=i % days),
+        "views_count": 0
+    } for i in range(posts)]
+    await db.blogs.insert_many(blogs)
+    blog_ids = [blog["_id"] for blog in blogs]
+    weights = [1 / (rank + 1) for rank in range(posts)]
+
+    def moment() -> datetime:
+        return now - timedelta(seconds=random.random() * span)
+
+    for start in range(0, events, batch_size):
+        await db.view_events.insert_many([{
+            "blog_id": blog_id,
+            "user_id": None,
+            "ip_address": f"10.{random.randrange(256)}.{random.randrange(256)}.{random.randrange(256)}",
+            "user_agent": "Mozilla/5.0",
+            "referrer_domain": random.choice(REFERRERS),
+            "country": random.choice(COUNTRIES),
+            "device": random.choice(DEVICES),
+            "read_percentage": random.choice([None, random.randrange(101)]),
+            "created_at": moment()
+        } for blog_id in random.choices(blog_ids, weights, k=min(batch_size, events - start))], ordered=False)
+
+    likes = [{"blog_id": blog_id, "user_id": ObjectId(), "created_at": moment()}
+             for blog_id in random.choices(blog_ids, weights, k=events // 20)]
+    comments = [{"blog_id": str(blog_id), "user_id": ObjectId(), "content": "Nice post", "created_at": moment()}
+                for blog_id in random.choices(blog_ids, weights, k=events // 50)]
+    for start in range(0, len(likes), batch_size):
+        await db.likes.insert_many(likes[start:start + batch_size], ordered=False)
+    for start in range(0, len(comments), batch_size):
+        await db.comments.insert_many(comments[start:start + batch_size], ordered=False)
+
+    await rebuild_rollups(db)
+    await rebuild_visitor_sketches(db)
@@ -0,0 +1,93 @@
+"""
+Time the user analytics views timeline against MongoDB: the old strftime
+generate_timeline over loaded events against the epoch-day Timeline fed by
+count_user_activity.
+
+    python -m benchmarks.timeline [--events 1000000] [--days 365] [--mongodb-url ...]
+
+count_user_activity is timed on raw view events and on the daily rollups,
+in UTC and in UTC+05:30.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from benchmarks.seed import AUTHOR_ID, add_database_arguments, finish, prepare
+from app.config import settings
+from app.schemas.analytics import TimelinePoint
+from app.services.analytics import count_user_activity
+from app.utils.timeline import Timeline
+
+
+def generate_timeline(events, start_date, end_date, date_field="created_at"):
+    """The timeline helper analytics used before, verbatim"""
+    # Create a dictionary of dates
+    timeline = {}
+    current_date = start_date
+    while current_date <= end_date:
+        date_str = current_date.strftime("%Y-%m-%d")
+        timeline[date_str] = 0
+        current_date += timedelta(days=1)
+
+    # Count events by day
+    for event in events:
+        event_date = event[date_field]
+        date_str = event_date.strftime("%Y-%m-%d")
+        if date_str in timeline:
+            timeline[date_str] += 1
+
+    # Convert to list of TimelinePoint objects
+    return [TimelinePoint(date=date, count=count) for date, count in timeline.items()]
+
+
+async def new_timeline(db, blog_ids, start_date, end_date, tz_offset: int, rollups: bool):
+    settings.ANALYTICS_ROLLUPS_ENABLED = rollups
+    _, per_day = await count_user_activity(db, blog_ids, start_date, end_date, tz_offset)
+    timeline = Timeline(start_date, end_date, "day", tz_offset)
+    return TypeAdapter(List[TimelinePoint]).validate_python(timeline.points(timeline.fold(per_day["views"])))
+
+
+async def timed(label: str, coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    elapsed = time.perf_counter() - started
+    print(f"{label:<42}{elapsed:10.3f}s")
+    return result, elapsed
+
+
+async def load_and_generate(db, blog_ids, start_date, end_date):
+    events = await db.view_events.find(
+        {"blog_id": {"$in": blog_ids}, "created_at": {"$gte": start_date, "$lte": end_date}},
+        {"created_at": 1}
+    ).to_list(length=None)
+    return generate_timeline(events, start_date, end_date)
+
+
+async def main(args):
+    client, db = await prepare(args)
+    try:
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=args.days)
+        blog_ids = [blog["_id"] async for blog in db.blogs.find({"author_id": AUTHOR_ID}, {"_id": 1})]
+
+        print(f"{args.events} view events over {args.days} days")
+        old, old_time = await timed("old: load events + generate_timeline:", load_and_generate(db, blog_ids, start_date, end_date))
+        raw, raw_time = await timed("raw events, UTC:", new_timeline(db, blog_ids, start_date, end_date, 0, False))
+        await timed("raw events, +05:30:", new_timeline(db, blog_ids, start_date, end_date, 330, False))
+        rolled_up, rollup_time = await timed("rollups, UTC:", new_timeline(db, blog_ids, start_date, end_date, 0, True))
+        await timed("rollups, +05:30:", new_timeline(db, blog_ids, start_date, end_date, 330, True))
+    finally:
+        await finish(client, args)
+
+    assert [(p.date, p.count) for p in old] == [(p.date, p.count) for p in raw]
+    # Rollups count whole UTC days, so only the window's first day may differ
+    assert [(p.date, p.count) for p in old[1:]] == [(p.date, p.count) for p in rolled_up[1:]]
+    print(f"speedup: {old_time / raw_time:.1f}x on raw events, {old_time / rollup_time:.1f}x on rollups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_database_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""
+Time the user analytics endpoint's top posts against MongoDB: the old
+load-everything-and-scan-per-post code against get_user_analytics.
+
+    python -m benchmarks.top_posts [--posts 500] [--events 1000000] [--mongodb-url ...]
+
+The old per-post scans are timed on a slice of the posts and extrapolated
+linearly. get_user_analytics is timed on raw view events (grouped
+server-side) and on the daily rollups.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from benchmarks.seed import AUTHOR_ID, add_database_arguments, finish, prepare
+from app.config import settings
+from app.services.analytics import get_user_analytics
+
+
+async def old_top_posts(db, days: int, sample: int):
+    """The top posts part of get_user_analytics before it grouped server-side (with the comments query fixed)"""
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+    window = {"$gte": start_date, "$lte": end_date}
+
+    blogs = await db.blogs.find({"author_id": AUTHOR_ID}).to_list(length=None)
+    blog_ids = [blog["_id"] for blog in blogs]
+    started = time.perf_counter()
+    view_events = await db.view_events.find({"blog_id": {"$in": blog_ids}, "created_at": window}).to_list(length=None)
+    likes = await db.likes.find({"blog_id": {"$in": blog_ids}, "created_at": window}).to_list(length=None)
+    comments = await db.comments.find(
+        {"blog_id": {"$in": [str(blog_id) for blog_id in blog_ids]}, "created_at": window}
+    ).to_list(length=None)
+    loaded = time.perf_counter() - started
+
+    started = time.perf_counter()
+    top_posts = []
+    for blog in blogs[:sample]:
+        top_posts.append({
+            "id": str(blog["_id"]),
+            "views": sum(1 for event in view_events if event["blog_id"] == blog["_id"]),
+            "likes": sum(1 for like in likes if like["blog_id"] == blog["_id"]),
+            "comments": sum(1 for comment in comments if comment["blog_id"] == str(blog["_id"]))
+        })
+    scanned = (time.perf_counter() - started) * len(blogs) / sample
+
+    views = Counter(event["blog_id"] for event in view_events)
+    return loaded, scanned, [count for _, count in views.most_common(5)]
+
+
+async def timed_user_analytics(days: int, rollups: bool):
+    settings.ANALYTICS_ROLLUPS_ENABLED = rollups
+    started = time.perf_counter()
+    analytics = await get_user_analytics(AUTHOR_ID, days)
+    return time.perf_counter() - started, analytics
+
+
+async def main(args):
+    client, db = await prepare(args)
+    try:
+        loaded, scanned, expected = await old_top_posts(db, args.days, args.sample)
+        raw, raw_analytics = await timed_user_analytics(args.days, rollups=False)
+        rolled_up, rollup_analytics = await timed_user_analytics(args.days, rollups=True)
+    finally:
+        await finish(client, args)
+
+    # The winners have to be the most viewed posts, whichever path counted them
+    assert [post["views"] for post in raw_analytics.top_posts] == expected
+    assert [post["views"] for post in rollup_analytics.top_posts] == expected
+
+    old = loaded + scanned
+    print(f"{args.posts} posts, {args.events} view events over {args.days} days")
+    print(f"old: load events:                   {loaded:10.3f}s")
+    print(f"old: per-post scans (extrapolated): {scanned:10.3f}s")
+    print(f"get_user_analytics, raw events:     {raw:10.3f}s  ({old / raw:.1f}x)")
+    print(f"get_user_analytics, rollups:        {rolled_up:10.3f}s  ({old / rolled_up:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_database_arguments(parser)
+    parser.add_argument("--sample", type=int, default=10, help="Posts the old per-post scans are timed on")
+    asyncio.run(main(parser.parse_args()))
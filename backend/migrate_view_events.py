@@ -0,0 +1,61 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+import argparse
+import asyncio
+from app.services.view_store import collection_type, setup_view_events, timeseries_options
+import os
+
+# Limits of view_events as a time-series collection:
+# - _id is neither indexed nor enforced unique. Read-progress updates by view token therefore
+#   also match on blog_id and created_at (view_event_filter), and a buffer flush retried after a
+#   failed write looks up which events were stored instead of relying on duplicate-key errors.
+#   Events must keep a created_at within VIEW_ID_MAX_SKEW of their _id timestamp (as they are at
+#   ingest and in this copy), or their view tokens stop matching.
+# - Updating read_percentage and deleting archived events need MongoDB 7.0 or later.
+# - Raw events expire by the collection's expireAfterSeconds instead of a TTL index.
+
+async def migrate(retention_days=0, batch_size=1000):
+    # Connect to MongoDB
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("MONGODB_DB_NAME", "blogmind")]
+
+    kind = await collection_type(db, "view_events")
+    if kind == "timeseries":
+        print("view_events is already a time-series collection.")
+        return
+    if kind is None:
+        await setup_view_events(db, timeseries=True, retention_days=retention_days)
+        print("Created view_events as a time-series collection.")
+        return
+
+    # Copy into a new time-series collection, then swap the names.
+    # Run this while view ingest is paused, events recorded during the copy are not carried over.
+    if await collection_type(db, "view_events_timeseries") is not None:
+        await db.view_events_timeseries.drop()
+    await db.create_collection("view_events_timeseries", **timeseries_options(retention_days))
+
+    copied = 0
+    batch = []
+    async for event in db.view_events.find().sort("_id", 1):
+        batch.append(event)
+        if len(batch) >= batch_size:
+            await db.view_events_timeseries.insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+    if batch:
+        await db.view_events_timeseries.insert_many(batch, ordered=False)
+        copied += len(batch)
+
+    await db.view_events.rename("view_events_legacy")
+    await db.view_events_timeseries.rename("view_events")
+    await setup_view_events(db, timeseries=True, retention_days=retention_days)
+
+    print(f"Copied {copied} view events. The old collection was kept as view_events_legacy, drop it once verified.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert view_events to a time-series collection")
+    parser.add_argument("--retention-days", type=int, default=int(os.getenv("VIEW_EVENTS_RETENTION_DAYS", "0")),
+                        help="Expire raw events after N days (default: VIEW_EVENTS_RETENTION_DAYS, 0 keeps them)")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.retention_days))
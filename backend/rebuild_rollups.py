@@ -0,0 +1,55 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+from app.services.archive import archive_horizon, iter_archived_events
+from app.services.rollups import day_start, rebuild_rollups
+from app.services.view_store import raw_history_start
+from app.services.visitors import rebuild_visitor_sketches
+import os
+import sys
+
+async def rebuild(days=None):
+    # Connect to MongoDB
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client[os.getenv("MONGODB_DB_NAME", "blogmind")]
+
+    await db.daily_blog_stats.create_index([("blog_id", 1), ("day", 1)], unique=True)
+    await db.visitor_sketches.create_index([("blog_id", 1), ("day", 1)], unique=True)
+    await db.author_visitor_sketches.create_index([("author_id", 1), ("day", 1)], unique=True)
+
+    # Rollups are recomputed from the raw events, so run this while view ingest is paused
+    # Events already moved to the cold archive are read back from their files
+    archive_dir = os.getenv("VIEW_EVENTS_ARCHIVE_DIR", "archive/view_events")
+    # Days whose raw events have expired are only recorded in the rollups and sketches, so they are kept
+    history_start = raw_history_start(int(os.getenv("VIEW_EVENTS_RETENTION_DAYS", "0")), archive_dir)
+    since = day_start(datetime.utcnow() - timedelta(days=days)) if days else history_start
+    # Events an interrupted archive run left in MongoDB too are only read from the archive
+    archived_until = archive_horizon(archive_dir)
+    try:
+        count = await rebuild_rollups(
+            db, since,
+            archived_events=iter_archived_events(archive_dir, since),
+            history_start=history_start,
+            archived_until=archived_until
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+
+    print(f"Rebuilt {count} daily rollups.")
+
+    count = await rebuild_visitor_sketches(
+        db, since,
+        archived_events=iter_archived_events(archive_dir, since),
+        history_start=history_start,
+        archived_until=archived_until
+    )
+    print(f"Rebuilt {count} daily blog and author visitor sketches.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the daily_blog_stats analytics rollups and blog and author visitor sketches")
+    parser.add_argument("--days", type=int, help="Only rebuild the last N days (default: every day whose raw events are still kept)")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.days))
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+# app.config reads these at import time
+TEST_ENVIRONMENT = {
+    "MONGODB_URL": "mongodb://localhost:27017",
+    "MONGODB_DB_NAME": "blogmind_test",
+    "SECRET_KEY": "test-secret",
+    "API_URL": "http://localhost:8000",
+    "FRONTEND_URL": "http://localhost:3000",
+    "UPLOAD_DIR": tempfile.mkdtemp(prefix="blogmind-uploads-"),
+    "MAIL_USERNAME": "blogmind",
+    "MAIL_PASSWORD": "blogmind",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_PORT": "587",
+    "MAIL_SERVER": "localhost",
+}
+for name, value in TEST_ENVIRONMENT.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database, also installed as app.mongodb for the services"""
+    from app.main import app
+
+    database = AsyncMongoMockClient()["blogmind_test"]
+    monkeypatch.setattr(app, "mongodb", database, raising=False)
+    return database
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """HTTP client for the app on the test database, with empty process-local caches and buffers.
+
+    Startup isn't run, so nothing connects to a real MongoDB.
+    """
+    import httpx
+    from app.main import app
+    from app.services import analytics, blog
+    from app.services.ingest import view_buffer
+    from app.utils.cache import TTLCache
+    from app.utils.dedup import RecentKeys
+
+    monkeypatch.setattr(blog, "blog_id_cache", TTLCache(100, 60))
+    monkeypatch.setattr(analytics, "recent_views", RecentKeys(60, 100))
+    monkeypatch.setattr(view_buffer, "_events", [])
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
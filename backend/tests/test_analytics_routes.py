@@ -0,0 +1,126 @@
+import json
+
+import pytest
+from bson import ObjectId
+
+from app.config import settings
+from app.services.ingest import view_buffer
+from app.utils.security import create_access_token
+
+BROWSER = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+
+@pytest.fixture
+async def blog(db):
+    blog = {"_id": ObjectId(), "slug": "hello-world", "title": "Hello", "views_count": 0}
+    await db.blogs.insert_one(blog)
+    return blog
+
+
+@pytest.mark.anyio
+async def test_anonymous_beacon_is_recorded(client, blog):
+    # sendBeacon can't set an Authorization header and posts strings as text/plain
+    response = await client.post(
+        "/api/analytics/events",
+        content=json.dumps([{"type": "view", "slug": "hello-world"}]),
+        headers={"Content-Type": "text/plain;charset=UTF-8", "User-Agent": BROWSER}
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["accepted"] == 1
+    assert len(view_buffer) == 1
+    pending = view_buffer._events[0]
+    assert str(pending["_id"]) == result["view_tokens"][0]
+    assert pending["blog_id"] == blog["_id"]
+    assert pending["user_id"] is None
+
+
+@pytest.mark.anyio
+async def test_anonymous_view_is_recorded(client, blog):
+    response = await client.post("/api/analytics/view/hello-world", headers={"User-Agent": BROWSER})
+
+    assert response.status_code == 200
+    assert response.json()["view_token"] == str(view_buffer._events[0]["_id"])
+
+
+@pytest.mark.anyio
+async def test_view_is_attributed_to_a_signed_in_reader(client, db, blog):
+    user_id = ObjectId()
+    await db.users.insert_one({"_id": user_id, "name": "Reader", "email": "reader@example.com", "hashed_password": "x"})
+
+    response = await client.post(
+        "/api/analytics/view/hello-world",
+        headers={"User-Agent": BROWSER, "Authorization": f"Bearer {create_access_token(str(user_id))}"}
+    )
+
+    assert response.status_code == 200
+    assert view_buffer._events[0]["user_id"] == user_id
+
+
+@pytest.mark.anyio
+async def test_invalid_token_is_treated_as_anonymous(client, blog):
+    response = await client.post(
+        "/api/analytics/view/hello-world",
+        headers={"User-Agent": BROWSER, "Authorization": "Bearer not-a-token"}
+    )
+
+    assert response.status_code == 200
+    assert view_buffer._events[0]["user_id"] is None
+
+
+@pytest.mark.anyio
+async def test_beacon_rejects_malformed_batches(client, blog):
+    response = await client.post(
+        "/api/analytics/events",
+        content=json.dumps([{"type": "progress", "slug": "hello-world", "read_percentage": 150}]),
+        headers={"Content-Type": "text/plain"}
+    )
+    assert response.status_code == 422
+    assert len(view_buffer) == 0
+
+
+@pytest.mark.anyio
+async def test_unknown_slug_is_not_found(client, db):
+    response = await client.post("/api/analytics/view/missing", headers={"User-Agent": BROWSER})
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_readers_behind_the_proxy_are_told_apart(client, blog, monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HEADER", "X-Forwarded-For")
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_COUNT", 1)
+
+    for reader in ["1.2.3.4", "5.6.7.8", "1.2.3.4"]:
+        response = await client.post(
+            "/api/analytics/view/hello-world",
+            headers={"User-Agent": BROWSER, "X-Forwarded-For": reader}
+        )
+        assert response.status_code == 200
+
+    # The repeat view from the first reader is dropped, the second reader's is not
+    assert [event["ip_address"] for event in view_buffer._events] == ["1.2.3.4", "5.6.7.8"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("read_percentage", [-10, 101, 10 ** 9])
+async def test_read_progress_out_of_range_is_rejected(client, db, blog, read_percentage):
+    response = await client.post(
+        "/api/analytics/read-progress/hello-world",
+        params={"read_percentage": read_percentage}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_read_progress_updates_the_pending_view(client, blog):
+    response = await client.post("/api/analytics/view/hello-world", headers={"User-Agent": BROWSER})
+    view_token = response.json()["view_token"]
+
+    response = await client.post(
+        "/api/analytics/read-progress/hello-world",
+        params={"read_percentage": 60, "view_token": view_token}
+    )
+
+    assert response.status_code == 200
+    assert view_buffer._events[0]["read_percentage"] == 60
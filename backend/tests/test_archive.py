@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services.archive import archive_horizon, archive_view_events, iter_archived_events, partition_path
+from app.services.rollups import rebuild_rollups
+
+DAY = datetime(2024, 3, 1)
+
+
+def view_events(blog_id, count, day=DAY):
+    return [
+        {"_id": ObjectId(), "blog_id": blog_id, "created_at": day + timedelta(hours=i), "ip_address": f"10.0.0.{i}"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    return str(tmp_path / "view_events")
+
+
+@pytest.mark.anyio
+async def test_archive_moves_whole_days(db, archive_dir):
+    blog_id = ObjectId()
+    await db.view_events.insert_many(view_events(blog_id, 3) + view_events(blog_id, 2, DAY + timedelta(days=1)))
+
+    moved = await archive_view_events(db, archive_dir, DAY + timedelta(days=1, hours=12))
+
+    assert moved == 3
+    assert await db.view_events.count_documents({}) == 2
+    assert len(list(iter_archived_events(archive_dir))) == 3
+    assert archive_horizon(archive_dir) == DAY + timedelta(days=1)
+
+
+@pytest.mark.anyio
+async def test_restart_finishes_an_interrupted_delete(db, archive_dir):
+    blog_id = ObjectId()
+    events = view_events(blog_id, 3)
+    await db.view_events.insert_many(events)
+    await archive_view_events(db, archive_dir, DAY + timedelta(days=1))
+
+    # A crash between writing the file and deleting leaves the events in both places
+    await db.view_events.insert_many(events)
+    moved = await archive_view_events(db, archive_dir, DAY + timedelta(days=1))
+
+    assert moved == 0
+    assert await db.view_events.count_documents({}) == 0
+    assert sorted(event["_id"] for event in iter_archived_events(archive_dir)) == sorted(event["_id"] for event in events)
+
+
+@pytest.mark.anyio
+async def test_rebuild_counts_events_left_in_both_places_once(db, archive_dir):
+    blog_id = ObjectId()
+    events = view_events(blog_id, 3)
+    await db.view_events.insert_many(events)
+    await archive_view_events(db, archive_dir, DAY + timedelta(days=1))
+    await db.view_events.insert_many(events)
+
+    await rebuild_rollups(
+        db,
+        archived_events=iter_archived_events(archive_dir),
+        archived_until=archive_horizon(archive_dir)
+    )
+
+    assert (await db.daily_blog_stats.find_one({"blog_id": blog_id, "day": DAY}))["views"] == 3
+
+def test_no_archive_has_no_horizon(archive_dir):
+    assert archive_horizon(archive_dir) is None
+    assert partition_path(archive_dir, DAY).name == "2024-03-01.ndjson.gz"
+
+
+@pytest.mark.anyio
+async def test_raw_analytics_read_mongo_only_after_the_horizon(db, archive_dir, monkeypatch):
+    from app.config import settings
+    from app.services.analytics import hot_window_start
+
+    monkeypatch.setattr(settings, "VIEW_EVENTS_ARCHIVE_AFTER_DAYS", 7)
+    monkeypatch.setattr(settings, "VIEW_EVENTS_ARCHIVE_DIR", archive_dir)
+    await db.view_events.insert_many(view_events(ObjectId(), 2))
+    await archive_view_events(db, archive_dir, DAY + timedelta(days=1))
+
+    assert await hot_window_start(DAY - timedelta(days=5)) == (DAY + timedelta(days=1), True)
+    assert await hot_window_start(DAY + timedelta(days=3)) == (DAY + timedelta(days=3), False)
+
+
+@pytest.mark.anyio
+async def test_blog_filter_skips_other_blogs(db, archive_dir):
+    blog_id, other_id = ObjectId(), ObjectId()
+    await db.view_events.insert_many(view_events(blog_id, 2) + view_events(other_id, 3))
+    await archive_view_events(db, archive_dir, DAY + timedelta(days=1))
+
+    events = list(iter_archived_events(archive_dir, blog_ids={blog_id}))
+
+    assert len(events) == 2
+    assert {event["blog_id"] for event in events} == {blog_id}
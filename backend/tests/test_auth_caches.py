@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services.user import get_principal, invalidate_principal, principal_cache
+from app.utils.security import create_access_token, token_cache, token_subject
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    token_cache.clear()
+    principal_cache.clear()
+    yield
+    token_cache.clear()
+    principal_cache.clear()
+
+
+def test_token_subject_is_cached_until_expiry():
+    token = create_access_token("user-1", timedelta(minutes=5))
+
+    assert token_subject(token) == "user-1"
+    assert token_cache.get(token) == "user-1"
+    # Never cached past the token's own expiry
+    assert token_cache._data[token][0] <= time.monotonic() + 5 * 60
+
+
+def test_invalid_and_expired_tokens_are_not_cached():
+    expired = create_access_token("user-1", timedelta(seconds=-10))
+
+    assert token_subject("not-a-token") is None
+    assert token_subject(expired) is None
+    assert len(token_cache) == 0
+
+
+@pytest.mark.anyio
+async def test_principal_is_served_from_cache_until_invalidated(db):
+    user_id = ObjectId()
+    await db.users.insert_one({"_id": user_id, "name": "Ada", "email": "ada@example.com", "hashed_password": "x"})
+
+    principal = await get_principal(str(user_id))
+    assert principal.name == "Ada"
+
+    await db.users.update_one({"_id": user_id}, {"$set": {"name": "Ada L."}})
+    assert (await get_principal(str(user_id))).name == "Ada"
+
+    invalidate_principal(str(user_id))
+    assert (await get_principal(str(user_id))).name == "Ada L."
+
+
+@pytest.mark.anyio
+async def test_unknown_principal(db):
+    assert await get_principal(str(ObjectId())) is None
+    assert len(principal_cache) == 0
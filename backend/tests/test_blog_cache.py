@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.schemas.blog import BlogResponse
+from app.services import blog as blog_service
+from app.services.blog import blog_cache, get_blog_view
+from app.services.user import update_user_avatar
+from app.utils.cache import make_etag
+
+
+def cached_blog(slug: str, author_id: str) -> BlogResponse:
+    blog = BlogResponse(
+        id=str(ObjectId()),
+        title="Hello",
+        slug=slug,
+        content="Long content",
+        excerpt="Short",
+        author={"id": author_id, "name": "Ada", "email": "ada@example.com"},
+        category_id="c1",
+        category={"id": "c1", "name": "Tech", "slug": "tech"},
+        views_count=0,
+        likes_count=0,
+        comments_count=0,
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+    )
+    blog_cache.set(slug, (blog, make_etag(blog.model_dump_json())))
+    return blog
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    blog_cache.clear()
+    yield
+    blog_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_field_selection_is_trimmed_from_the_cache(db):
+    cached_blog("hello", "a1")
+
+    blog, etag = await get_blog_view("hello", fields={"title", "slug"})
+
+    assert blog == {"title": "Hello", "slug": "hello"}
+    assert etag == blog_service.fields_etag({"slug": "hello", "title": "Hello"})
+
+
+@pytest.mark.anyio
+async def test_uncached_field_selection_uses_a_narrowed_query(db, monkeypatch):
+    calls = []
+
+    async def find_blog(db, match, user_id=None, fields=None):
+        calls.append(fields)
+        return {field: "x" for field in fields}
+
+    monkeypatch.setattr(blog_service, "find_blog", find_blog)
+
+    blog, etag = await get_blog_view("hello", fields={"title"})
+
+    assert calls == [{"title"}]
+    assert blog == {"title": "x"}
+    # Nothing is cached from a partial read
+    assert "hello" not in blog_cache
+
+
+@pytest.mark.anyio
+async def test_profile_change_evicts_the_authors_blogs(db):
+    author_id = ObjectId()
+    await db.users.insert_one({"_id": author_id, "name": "Ada", "email": "ada@example.com"})
+    await db.blogs.insert_many([
+        {"slug": "mine", "author_id": str(author_id)},
+        {"slug": "theirs", "author_id": str(ObjectId())},
+    ])
+    cached_blog("mine", str(author_id))
+    cached_blog("theirs", "someone-else")
+
+    await update_user_avatar(str(author_id), "/static/uploads/ada.png")
+
+    assert "mine" not in blog_cache
+    assert "theirs" in blog_cache
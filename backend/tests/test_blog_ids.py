@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.services import blog
+from app.services.blog import forget_blog_slugs, resolve_blog_id, resolve_blog_ids
+from app.utils import cache
+from app.utils.cache import TTLCache
+
+
+class CountingBlogs:
+    """db.blogs that counts the queries reaching it"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.queries = 0
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def find_one(self, *args, **kwargs):
+        self.queries += 1
+        return self.collection.find_one(*args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        self.queries += 1
+        return self.collection.find(*args, **kwargs)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now.value)
+    return now
+
+
+@pytest.fixture
+def blogs(db, monkeypatch, clock):
+    monkeypatch.setattr(blog, "blog_id_cache", TTLCache(100, 3600))
+    counting = CountingBlogs(db.blogs)
+    monkeypatch.setattr(db, "blogs", counting, raising=False)
+    return counting
+
+
+@pytest.mark.anyio
+async def test_known_slugs_are_resolved_once(blogs):
+    blog_id = ObjectId()
+    await blogs.insert_one({"_id": blog_id, "slug": "hello"})
+
+    assert await resolve_blog_id("hello") == blog_id
+    assert await resolve_blog_id("hello") == blog_id
+    assert blogs.queries == 1
+
+
+@pytest.mark.anyio
+async def test_misses_are_remembered_briefly(blogs, clock, monkeypatch):
+    monkeypatch.setattr(blog.settings, "BLOG_ID_MISS_TTL_SECONDS", 30)
+
+    assert await resolve_blog_id("nope") is None
+    blog_id = ObjectId()
+    await blogs.insert_one({"_id": blog_id, "slug": "nope"})
+    assert await resolve_blog_id("nope") is None
+    assert blogs.queries == 1
+
+    clock.value += 31
+    assert await resolve_blog_id("nope") == blog_id
+    assert blogs.queries == 2
+
+
+@pytest.mark.anyio
+async def test_forgotten_slugs_are_looked_up_again(blogs):
+    assert await resolve_blog_id("new-post") is None
+    blog_id = ObjectId()
+    await blogs.insert_one({"_id": blog_id, "slug": "new-post"})
+
+    forget_blog_slugs("new-post")
+    assert await resolve_blog_id("new-post") == blog_id
+
+
+@pytest.mark.anyio
+async def test_many_slugs_take_one_query(blogs):
+    ids = {slug: ObjectId() for slug in ("a", "b", "c")}
+    await blogs.insert_many([{"_id": blog_id, "slug": slug} for slug, blog_id in ids.items()])
+    assert await resolve_blog_id("a") == ids["a"]
+
+    resolved = await resolve_blog_ids(["a", "b", "c", "missing", "b"])
+
+    assert resolved == {**ids, "missing": None}
+    assert blogs.queries == 2
+
+    assert await resolve_blog_ids(["c", "missing"]) == {"c": ids["c"], "missing": None}
+    assert blogs.queries == 2
@@ -0,0 +1,32 @@
+import pytest
+
+from app.services.blog import MISSING_CATEGORY, blog_from_doc, build_blog_pipeline
+
+
+def filtering_stages(pipeline):
+    """Stages that can change which blogs come out of the pipeline"""
+    stages = []
+    for stage in pipeline:
+        name, spec = next(iter(stage.items()))
+        if name in ("$match", "$skip", "$limit"):
+            stages.append(stage)
+        elif name == "$unwind" and not (isinstance(spec, dict) and spec.get("preserveNullAndEmptyArrays")):
+            stages.append(stage)
+    return stages
+
+
+@pytest.mark.parametrize("fields", [{"title"}, {"title", "author"}, {"is_liked"}, {"content", "category"}])
+def test_field_selection_does_not_change_membership(fields):
+    match = {"published": True}
+    full = build_blog_pipeline(match, {"published_at": -1}, 10, 20, user_id="0" * 24)
+    selected = build_blog_pipeline(match, {"published_at": -1}, 10, 20, user_id="0" * 24, fields=fields)
+
+    assert filtering_stages(selected) == filtering_stages(full)
+
+
+def test_missing_category_gets_a_placeholder():
+    doc = {"id": "b1", "title": "Hello", "category_id": "deleted-category"}
+
+    blog = blog_from_doc(doc, fields={"id", "category"})
+
+    assert blog["category"] == {"id": "deleted-category", **MISSING_CATEGORY}
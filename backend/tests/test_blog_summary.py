@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from app.dependencies import include_content
+from app.schemas.blog import BlogResponse, BlogSummary
+from app.services.blog import blog_from_doc, build_blog_pipeline
+
+
+def projection(pipeline):
+    return next(stage["$project"] for stage in reversed(pipeline) if "$project" in stage)
+
+
+def blog_doc(**extra):
+    return {
+        "id": "b1",
+        "title": "Hello",
+        "slug": "hello",
+        "excerpt": "Short",
+        "author": {"id": "u1", "name": "Ada", "email": "ada@example.com", "bio": "", "avatar": None},
+        "category_id": "c1",
+        "tags": [],
+        "views_count": 0,
+        "likes_count": 0,
+        "comments_count": 0,
+        "is_liked": False,
+        "created_at": datetime(2024, 3, 1),
+        "updated_at": datetime(2024, 3, 1),
+        **extra
+    }
+
+
+def test_summaries_do_not_load_content():
+    assert "content" not in projection(build_blog_pipeline({}, include_content=False))
+    assert projection(build_blog_pipeline({}, include_content=True))["content"] == 1
+
+
+def test_content_follows_the_field_selection():
+    assert "content" in projection(build_blog_pipeline({}, include_content=False, fields={"content"}))
+    assert "content" not in projection(build_blog_pipeline({}, include_content=True, fields={"title"}))
+
+
+def test_documents_map_to_summary_or_full_response():
+    summary = blog_from_doc(blog_doc())
+    full = blog_from_doc(blog_doc(content="Long"))
+
+    assert type(summary) is BlogSummary
+    assert "content" not in summary.model_dump()
+    assert type(full) is BlogResponse
+    assert full.content == "Long"
+
+
+def test_include_content_parameter():
+    assert include_content(None) is False
+    assert include_content("content") is True
+    assert include_content("tags,content") is True
+    assert include_content("contents") is False
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import cache
+from app.utils.cache import TTLCache, etag_matches, make_etag
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now.value)
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    entries = TTLCache(maxsize=10, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2, ttl=5)
+
+    clock.value += 10
+    assert entries.get("a") == 1
+    assert entries.get("b") is None
+    assert "b" not in entries
+
+    clock.value += 50
+    assert entries.get("a", "gone") == "gone"
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    entries = TTLCache(maxsize=2, ttl=60)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    entries.get("a")
+    entries.set("c", 3)
+
+    assert "a" in entries and "c" in entries
+    assert "b" not in entries
+    assert len(entries) == 2
+
+
+def test_pop_returns_and_removes(clock):
+    entries = TTLCache(maxsize=2, ttl=60)
+    entries.set("a", 1)
+    assert entries.pop("a") == 1
+    assert entries.pop("a", "missing") == "missing"
+
+
+def test_etag_is_stable_and_quoted():
+    assert make_etag('{"a": 1}') == make_etag('{"a": 1}')
+    assert make_etag('{"a": 1}') != make_etag('{"a": 2}')
+    assert make_etag("x").startswith('"') and make_etag("x").endswith('"')
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ('"other"', False),
+    ("*", True),
+])
+def test_etag_matches_if_none_match(header, matches):
+    headers = {"if-none-match": header} if header else {}
+    request = SimpleNamespace(headers=headers)
+    assert etag_matches(request, '"abc"') is matches
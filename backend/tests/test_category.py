@@ -0,0 +1,51 @@
+import pytest
+from bson import ObjectId
+
+from app.services import category as category_module
+from app.services.category import CategoryRegistry, get_category_by_id, get_category_by_slug
+
+
+@pytest.fixture
+async def registry(db, monkeypatch):
+    await db.categories.insert_many([
+        {"_id": ObjectId(), "name": "Travel", "slug": "travel"},
+        {"_id": ObjectId(), "name": "Food", "slug": "food"},
+    ])
+    registry = CategoryRegistry(ttl=300)
+    monkeypatch.setattr(category_module, "category_registry", registry)
+    return registry
+
+
+@pytest.mark.anyio
+async def test_load_indexes_by_id_and_slug(db, registry):
+    await registry.load(db)
+
+    assert [category.name for category in registry.categories] == ["Food", "Travel"]
+    food = registry.by_slug["food"]
+    assert registry.by_id[food.id] is food
+    assert registry.etag.startswith('"')
+
+
+@pytest.mark.anyio
+async def test_reads_are_served_from_memory_until_stale(db, registry):
+    food = await get_category_by_slug("food")
+    await db.categories.update_one({"slug": "food"}, {"$set": {"name": "Cooking"}})
+
+    assert (await get_category_by_slug("food")).name == "Food"
+
+    registry.loaded_at -= registry.ttl + 1
+    assert (await get_category_by_id(food.id)).name == "Cooking"
+
+
+@pytest.mark.anyio
+async def test_unknown_id_forces_a_rate_limited_reload(db, registry):
+    await registry.load(db)
+    created = ObjectId()
+    await db.categories.insert_one({"_id": created, "name": "Music", "slug": "music"})
+
+    # Just loaded: an unknown id doesn't reload yet
+    assert await get_category_by_id(str(created)) is None
+
+    registry.loaded_at -= category_module.MIN_FORCED_RELOAD_INTERVAL + 1
+    assert (await get_category_by_id(str(created))).name == "Music"
+    assert await get_category_by_id(str(ObjectId())) is None
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.utils.cursor import decode_cursor, encode_cursor, keyset_filter
+
+PAGE_TYPES = [(datetime, type(None)), (ObjectId,)]
+
+
+def test_cursor_round_trip():
+    values = [datetime(2024, 5, 1, 12, 30), ObjectId()]
+    assert decode_cursor(encode_cursor(values), PAGE_TYPES) == values
+
+
+def test_unpublished_sort_key_round_trips():
+    values = [None, ObjectId()]
+    assert decode_cursor(encode_cursor(values), PAGE_TYPES) == values
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor([1, 2, 3]),
+    encode_cursor([]),
+    # Operator documents and wrongly typed values must never reach the query
+    encode_cursor([{"$ne": None}, ObjectId()]),
+    encode_cursor([datetime(2024, 5, 1), {"$gt": ""}]),
+    encode_cursor(["2024-05-01", ObjectId()]),
+    encode_cursor([True, ObjectId()]),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, PAGE_TYPES)
+
+
+@pytest.mark.anyio
+async def test_crafted_cursor_is_a_bad_request(client):
+    cursor = encode_cursor([{"$where": "sleep(1000)"}, ObjectId()])
+    response = await client.get("/api/blogs", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("direction", [-1, 1])
+async def test_keyset_pages_cover_every_document_once(db, direction):
+    start = datetime(2024, 1, 1)
+    # Ties on published_at and unpublished (null) dates are the interesting cases
+    docs = [{"_id": ObjectId(), "published_at": start + timedelta(days=i // 3)} for i in range(10)]
+    docs += [{"_id": ObjectId(), "published_at": None} for _ in range(3)]
+    await db.blogs.insert_many(docs)
+
+    fields, directions = ["published_at", "_id"], [direction, direction]
+    seen, query = [], {}
+    while True:
+        page = await db.blogs.find(query).sort(list(zip(fields, directions))).limit(4).to_list(length=4)
+        seen += [doc["_id"] for doc in page]
+        if len(page) < 4:
+            break
+        cursor = encode_cursor([page[-1]["published_at"], page[-1]["_id"]])
+        query = keyset_filter(fields, decode_cursor(cursor, PAGE_TYPES), directions)
+
+    expected = await db.blogs.find().sort(list(zip(fields, directions))).to_list(length=None)
+    assert seen == [doc["_id"] for doc in expected]
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import dedup
+from app.utils.dedup import RecentKeys
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(dedup.time, "monotonic", lambda: now.value)
+    return now
+
+
+def test_keys_are_remembered_for_the_window(clock):
+    keys = RecentKeys(window=60, max_keys=100)
+    keys.add("a", "token")
+
+    clock.value += 59
+    assert keys.get("a") == "token"
+
+    clock.value += 1
+    assert keys.get("a") is None
+
+
+def test_key_survives_one_rotation(clock):
+    keys = RecentKeys(window=60, max_keys=100)
+    clock.value += 50
+    keys.add("a")
+
+    # Rotated into the previous generation, but still inside its own window
+    clock.value += 20
+    keys.add("b")
+    assert keys.get("a") is True
+
+    # The next rotation drops it
+    clock.value += 60
+    keys.add("c")
+    assert keys.get("a") is None
+    assert len(keys) == 2
+
+
+def test_full_generation_rotates_early(clock):
+    keys = RecentKeys(window=60, max_keys=4)
+    for key in "abcde":
+        keys.add(key)
+
+    assert len(keys) <= 4
+    assert keys.get("e") is True
+    assert keys.get("a") is None
@@ -0,0 +1,56 @@
+import pytest
+
+from app.utils.hyperloglog import HyperLogLog
+
+
+@pytest.mark.parametrize("cardinality", [10, 1000, 50000])
+def test_count_is_within_a_few_percent(cardinality):
+    sketch = HyperLogLog()
+    sketch.update(f"visitor-{i}" for i in range(cardinality))
+    # Repeats must not change the estimate
+    sketch.update(f"visitor-{i}" for i in range(cardinality // 2))
+
+    assert abs(sketch.count() - cardinality) <= max(1, cardinality * 0.05)
+
+
+def test_merge_equals_sketch_of_the_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    left.update(f"visitor-{i}" for i in range(0, 6000))
+    right.update(f"visitor-{i}" for i in range(4000, 10000))
+    union.update(f"visitor-{i}" for i in range(0, 10000))
+
+    assert left.merge(right).to_bytes() == union.to_bytes()
+
+
+def test_round_trips_through_bytes():
+    sketch = HyperLogLog()
+    sketch.update(["a", "b", "c"])
+    assert HyperLogLog(sketch.to_bytes()).count() == sketch.count() == 3
+
+
+def test_rejects_mismatched_registers():
+    with pytest.raises(ValueError):
+        HyperLogLog(b"\x00" * 10)
+    with pytest.raises(ValueError):
+        HyperLogLog().merge(HyperLogLog(precision=10))
+
+
+def test_empty_sketch():
+    assert not HyperLogLog()
+    assert HyperLogLog().count() == 0
+
+
+def test_union_equals_pairwise_merges():
+    sketches = []
+    for part in range(5):
+        sketch = HyperLogLog()
+        sketch.update(f"visitor-{i}" for i in range(part * 1000, part * 1000 + 1500))
+        sketches.append(sketch)
+
+    merged = HyperLogLog()
+    for sketch in sketches:
+        merged.merge(sketch)
+
+    assert HyperLogLog.union(sketch.to_bytes() for sketch in sketches).to_bytes() == merged.to_bytes()
+    assert HyperLogLog.union([sketches[0].to_bytes()]).to_bytes() == sketches[0].to_bytes()
+    assert not HyperLogLog.union([])
@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from app.main import app
+from app.services.ingest import ViewEventBuffer
+
+
+def view_event(blog_id, **fields):
+    return {"_id": ObjectId(), "blog_id": blog_id, "created_at": datetime(2024, 3, 1, 12), "ip_address": "1.2.3.4", **fields}
+
+
+class FlakyViewEvents:
+    """view_events whose insert_many can fail some events or pause mid-write"""
+
+    def __init__(self, collection, fail=(), paused=None):
+        self.collection = collection
+        self.fail = set(fail)
+        self.paused = paused
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def insert_many(self, events, ordered=True):
+        if self.paused is not None:
+            await self.paused.wait()
+        errors = [{"index": i, "code": 2, "errmsg": "failed"} for i, event in enumerate(events) if event["_id"] in self.fail]
+        await self.collection.insert_many([event for event in events if event["_id"] not in self.fail], ordered=False)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(events) - len(errors)})
+
+
+class FlakyDatabase:
+    def __init__(self, db, view_events):
+        self.db = db
+        self.view_events = view_events
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+@pytest.fixture
+def blog_id():
+    return ObjectId()
+
+
+@pytest.fixture
+async def blog(db, blog_id):
+    await db.blogs.insert_one({"_id": blog_id, "views_count": 0})
+
+
+def buffer():
+    return ViewEventBuffer(max_size=100, flush_interval=60, max_backlog=100)
+
+
+@pytest.mark.anyio
+async def test_flush_writes_and_counts_events(db, blog, blog_id):
+    views = buffer()
+    for _ in range(3):
+        views.enqueue(view_event(blog_id))
+    await views.flush()
+
+    assert len(views) == 0
+    assert await db.view_events.count_documents({}) == 3
+    assert (await db.blogs.find_one({"_id": blog_id}))["views_count"] == 3
+    assert (await db.daily_blog_stats.find_one({"blog_id": blog_id}))["views"] == 3
+    assert await db.visitor_sketches.count_documents({"blog_id": blog_id}) == 1
+
+
+@pytest.mark.anyio
+async def test_duplicates_from_an_earlier_flush_are_not_counted_again(db, blog, blog_id):
+    already_written = view_event(blog_id)
+    await db.view_events.insert_one(dict(already_written))
+
+    views = buffer()
+    views.enqueue(already_written)
+    views.enqueue(view_event(blog_id))
+    await views.flush()
+
+    assert len(views) == 0
+    assert await db.view_events.count_documents({}) == 2
+    assert (await db.blogs.find_one({"_id": blog_id}))["views_count"] == 1
+    assert (await db.daily_blog_stats.find_one({"blog_id": blog_id}))["views"] == 1
+
+
+@pytest.mark.anyio
+async def test_partial_failure_counts_inserted_events_and_requeues_the_rest(db, blog, blog_id):
+    events = [view_event(blog_id) for _ in range(3)]
+    app.mongodb = FlakyDatabase(db, FlakyViewEvents(db.view_events, fail=[events[1]["_id"]]))
+
+    views = buffer()
+    for event in events:
+        views.enqueue(event)
+    await views.flush()
+
+    assert (await db.blogs.find_one({"_id": blog_id}))["views_count"] == 2
+    assert views.find_pending(lambda event: True) is events[1]
+
+    # The retry only adds the event that failed
+    app.mongodb = db
+    await views.flush()
+    assert (await db.blogs.find_one({"_id": blog_id}))["views_count"] == 3
+    assert (await db.daily_blog_stats.find_one({"blog_id": blog_id}))["views"] == 3
+
+
+@pytest.mark.anyio
+async def test_failed_write_requeues_the_batch(db, blog, blog_id):
+    class Down:
+        async def insert_many(self, events, ordered=True):
+            raise AutoReconnect("down")
+
+    app.mongodb = FlakyDatabase(db, Down())
+    views = buffer()
+    views.enqueue(view_event(blog_id))
+    await views.flush()
+
+    assert len(views) == 1
+    assert (await db.blogs.find_one({"_id": blog_id}))["views_count"] == 0
+
+
+@pytest.mark.anyio
+async def test_in_flight_events_stay_searchable_and_keep_late_progress(db, blog, blog_id):
+    paused = asyncio.Event()
+    app.mongodb = FlakyDatabase(db, FlakyViewEvents(db.view_events, paused=paused))
+
+    views = buffer()
+    event = view_event(blog_id)
+    views.enqueue(event)
+    flush = asyncio.create_task(views.flush())
+    await asyncio.sleep(0)
+
+    # The flush has taken the batch but not written it yet
+    pending = views.find_pending(lambda candidate: candidate["_id"] == event["_id"])
+    assert pending is event
+    pending["read_percentage"] = 90
+
+    paused.set()
+    await flush
+
+    assert views.find_pending(lambda candidate: True) is None
+    assert (await db.view_events.find_one({"_id": event["_id"]}))["read_percentage"] == 90
+    rollup = await db.daily_blog_stats.find_one({"blog_id": blog_id})
+    assert rollup["read"] == {"sum": 90, "count": 1, "completed": 1}
+
+
+@pytest.mark.anyio
+async def test_retry_after_unknown_outcome_skips_events_that_were_written(db, blog, blog_id):
+    events = [view_event(blog_id) for _ in range(2)]
+
+    class LostAck:
+        async def insert_many(self, batch, ordered=True):
+            # The first event reaches the server, then the connection drops
+            await db.view_events.insert_one(dict(batch[0]))
+            raise AutoReconnect("connection closed")
+
+    app.mongodb = FlakyDatabase(db, LostAck())
+    views = buffer()
+    for event in events:
+        views.enqueue(event)
+    await views.flush()
+    assert len(views) == 2
+
+    # A time-series collection would not reject the first event again, so it must not be resent
+    inserted = []
+
+    class Recording(FlakyViewEvents):
+        async def insert_many(self, batch, ordered=True):
+            inserted.extend(event["_id"] for event in batch)
+            await super().insert_many(batch, ordered)
+
+    app.mongodb = FlakyDatabase(db, Recording(db.view_events))
+    await views.flush()
+
+    assert inserted == [events[1]["_id"]]
+    assert len(views) == 0
+    assert await db.view_events.count_documents({"_id": events[0]["_id"]}) == 1
+    assert await db.view_events.count_documents({"_id": events[1]["_id"]}) == 1
+    assert (await db.blogs.find_one({"_id": blog_id}))["views_count"] == 1
+
+
+@pytest.mark.anyio
+async def test_stop_during_a_timer_flush_keeps_the_batch(db, blog, blog_id):
+    paused = asyncio.Event()
+    app.mongodb = FlakyDatabase(db, FlakyViewEvents(db.view_events, paused=paused))
+
+    views = ViewEventBuffer(max_size=100, flush_interval=0.01, max_backlog=100)
+    for _ in range(10):
+        views.enqueue(view_event(blog_id))
+    views.start()
+    while not views._in_flight:
+        await asyncio.sleep(0.01)
+
+    # Shutdown arrives while the timer's flush is still writing
+    stop = asyncio.create_task(views.stop())
+    await asyncio.sleep(0.01)
+    paused.set()
+    await stop
+
+    assert len(views) == 0
+    assert await db.view_events.count_documents({}) == 10
+    assert (await db.blogs.find_one({"_id": blog_id}))["views_count"] == 10
@@ -0,0 +1,70 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services.analytics import PostTotals, count_user_activity
+from app.services.rollups import (
+    local_day_split, record_counter, record_view_events, slot_day_shift, slot_key, snap_tz_offset
+)
+from app.utils.timeline import epoch_day
+
+# Around local midnight in UTC-5, UTC+5:30 and UTC+14
+MOMENTS = [datetime(2024, 3, 1, hour, minute) for hour in (0, 4, 5, 9, 10, 18, 23) for minute in (0, 29, 30, 59)]
+OFFSETS = [0, -300, 330, 345, 840, -720]
+
+
+def test_slot_keys_sort_in_time_order():
+    assert slot_key(datetime(2024, 3, 1, 0, 14)) == "00"
+    assert slot_key(datetime(2024, 3, 1, 2, 30)) == "10"
+    assert slot_key(datetime(2024, 3, 1, 23, 59)) == "95"
+
+
+@pytest.mark.parametrize("tz_offset, snapped", [(0, 0), (330, 330), (337, 330), (338, 345), (-7, 0)])
+def test_offsets_snap_to_the_slot_grid(tz_offset, snapped):
+    assert snap_tz_offset(tz_offset) == snapped
+
+
+@pytest.mark.parametrize("tz_offset", OFFSETS)
+def test_slots_land_on_the_local_day_of_their_events(tz_offset):
+    shift, boundary = local_day_split(tz_offset)
+    for moment in MOMENTS:
+        slot = slot_key(moment)
+        expected = epoch_day(moment, tz_offset) - epoch_day(moment)
+        assert slot_day_shift(int(slot), tz_offset) == expected
+        assert shift + (slot >= boundary) == expected
+
+
+def events_of(blog_id):
+    return [{"_id": ObjectId(), "blog_id": blog_id, "created_at": moment} for moment in MOMENTS]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("tz_offset", OFFSETS)
+async def test_post_timeline_from_rollups_matches_raw_events(db, tz_offset):
+    blog_id = ObjectId()
+    events = events_of(blog_id)
+    await record_view_events(db, events)
+    await record_counter(db, blog_id, datetime(2024, 3, 1, 23, 50), "likes")
+
+    totals = PostTotals()
+    async for rollup in db.daily_blog_stats.find({"blog_id": blog_id}):
+        totals.add_rollup(rollup, tz_offset)
+
+    assert totals.views == Counter(epoch_day(event["created_at"], tz_offset) for event in events)
+    assert totals.likes == Counter({epoch_day(datetime(2024, 3, 1, 23, 50), tz_offset): 1})
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("tz_offset", [-300, 330])
+async def test_user_activity_from_rollups_in_local_days(db, tz_offset):
+    blog_ids = [ObjectId(), ObjectId()]
+    events = events_of(blog_ids[0]) + events_of(blog_ids[1])[:5]
+    await record_view_events(db, events)
+
+    start = datetime(2024, 2, 28)
+    per_blog, per_day = await count_user_activity(db, blog_ids, start, start + timedelta(days=3), tz_offset)
+
+    assert per_blog["views"] == Counter({blog_ids[0]: len(MOMENTS), blog_ids[1]: 5})
+    assert per_day["views"] == Counter(epoch_day(event["created_at"], tz_offset) for event in events)
@@ -0,0 +1,38 @@
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.dependencies import require_metrics_token
+from app.utils.metrics import Metrics
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_is_hidden_without_a_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    with pytest.raises(HTTPException) as error:
+        await require_metrics_token("anything")
+    assert error.value.status_code == 404
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("presented", [None, "", "wrong"])
+async def test_metrics_endpoint_rejects_a_wrong_token(monkeypatch, presented):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    with pytest.raises(HTTPException) as error:
+        await require_metrics_token(presented)
+    assert error.value.status_code == 403
+
+
+@pytest.mark.anyio
+async def test_metrics_endpoint_accepts_the_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    await require_metrics_token("s3cret")
+
+
+def test_snapshot_includes_counters_and_gauges():
+    metrics = Metrics()
+    metrics.inc("views_recorded")
+    metrics.inc("views_recorded", 2)
+    metrics.gauge("queue", lambda: 7)
+
+    assert metrics.snapshot() == {"views_recorded": 3, "queue": 7}
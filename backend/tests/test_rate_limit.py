@@ -0,0 +1,109 @@
+import re
+
+from app import middleware
+from app.config import settings
+from app.middleware import RateLimitMiddleware, RouteLimit, client_ip
+from app.utils.rate_limit import TokenBuckets
+from app.utils.security import create_access_token
+
+
+def scope_for(path="/api/blogs/", method="POST", client=("10.0.0.1", 50000), headers=()):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "client": client,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+    }
+
+
+def test_take_refills_over_time():
+    buckets = TokenBuckets(maxsize=10)
+    assert buckets.take("a", rate=1, capacity=2, now=0) == 0
+    assert buckets.take("a", rate=1, capacity=2, now=0) == 0
+    assert buckets.take("a", rate=1, capacity=2, now=0) == 1
+    assert buckets.take("a", rate=1, capacity=2, now=1) == 0
+
+
+def test_peek_does_not_take_a_token():
+    buckets = TokenBuckets(maxsize=10)
+    buckets.take("a", rate=1, capacity=1, now=0)
+
+    assert buckets.peek("a", rate=1, capacity=1, now=0.5) == 0.5
+    assert buckets.peek("a", rate=1, capacity=1, now=1) == 0
+    assert buckets.take("a", rate=1, capacity=1, now=1) == 0
+    assert buckets.peek("missing", rate=1, capacity=1, now=1) == 0
+    assert "missing" not in buckets._buckets
+
+
+def test_least_recently_used_bucket_is_dropped():
+    buckets = TokenBuckets(maxsize=2)
+    buckets.take("a", rate=1, capacity=5, now=0)
+    buckets.take("b", rate=1, capacity=5, now=0)
+    buckets.take("a", rate=1, capacity=5, now=1)
+    buckets.take("c", rate=1, capacity=5, now=1)
+
+    assert list(buckets._buckets) == ["a", "c"]
+
+
+def test_sweep_drops_idle_buckets():
+    buckets = TokenBuckets(maxsize=10, sweep_interval=60)
+    buckets.take("a", rate=1, capacity=5, now=0)
+    buckets.take("b", rate=1, capacity=5, now=30)
+    buckets.sweep(now=70)
+
+    assert list(buckets._buckets) == ["b"]
+
+
+def test_client_ip_uses_the_peer_without_a_trusted_header(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HEADER", "")
+    scope = scope_for(headers=[("X-Forwarded-For", "1.2.3.4")])
+    assert client_ip(scope) == "10.0.0.1"
+
+
+def test_client_ip_skips_client_supplied_forwarded_entries(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HEADER", "X-Forwarded-For")
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_COUNT", 1)
+    scope = scope_for(headers=[("X-Forwarded-For", "6.6.6.6, 1.2.3.4")])
+    assert client_ip(scope) == "1.2.3.4"
+
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_COUNT", 2)
+    scope = scope_for(headers=[("X-Forwarded-For", "6.6.6.6"), ("X-Forwarded-For", "1.2.3.4, 10.0.0.2")])
+    assert client_ip(scope) == "1.2.3.4"
+
+
+def test_client_ip_falls_back_to_the_peer_when_the_header_is_short(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HEADER", "X-Forwarded-For")
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_COUNT", 2)
+    assert client_ip(scope_for(headers=[("X-Forwarded-For", "1.2.3.4")])) == "10.0.0.1"
+    assert client_ip(scope_for()) == "10.0.0.1"
+
+
+def limiter(monkeypatch, per_minute):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HEADER", "")
+    monkeypatch.setattr(middleware, "route_limits", lambda: [
+        RouteLimit("write", "POST", re.compile(r"^/api/blogs/$"), per_minute)
+    ])
+    return RateLimitMiddleware(app=None)
+
+
+def test_refused_requests_do_not_debit_the_other_bucket(monkeypatch):
+    limit = limiter(monkeypatch, per_minute=3)
+    auth = [("Authorization", f"Bearer {create_access_token('user-1')}")]
+    home, office = ("10.0.0.1", 50000), ("10.0.0.2", 50000)
+
+    # The user's allowance is spent with one request left on the home IP
+    assert limit.check_limits(scope_for(client=home, headers=auth)) == 0
+    assert limit.check_limits(scope_for(client=home, headers=auth)) == 0
+    assert limit.check_limits(scope_for(client=office, headers=auth)) == 0
+    for _ in range(5):
+        assert limit.check_limits(scope_for(client=home, headers=auth)) > 0
+
+    assert limit.check_limits(scope_for(client=home)) == 0
+    assert limit.check_limits(scope_for(client=home)) > 0
+
+
+def test_unmatched_routes_are_not_limited(monkeypatch):
+    limit = limiter(monkeypatch, per_minute=1)
+    for _ in range(3):
+        assert limit.check_limits(scope_for(method="GET")) == 0
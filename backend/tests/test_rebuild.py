@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.archive import partition_path
+from app.services.rollups import check_rebuild_window, rebuild_rollups
+from app.services.view_store import raw_history_start
+from app.services.visitors import rebuild_visitor_sketches
+
+NOW = datetime(2024, 3, 31, 15)
+
+
+def test_nothing_expires_without_retention(tmp_path):
+    assert raw_history_start(0, str(tmp_path), NOW) is None
+
+
+def test_history_starts_after_the_expiry_cutoff(tmp_path):
+    # Events of 2024-03-01 are partly expired at 15:00 on 2024-03-31
+    assert raw_history_start(30, str(tmp_path), NOW) == datetime(2024, 3, 2)
+
+
+def test_archive_extends_the_history(tmp_path):
+    path = partition_path(str(tmp_path), datetime(2024, 1, 15))
+    path.parent.mkdir(parents=True)
+    path.touch()
+
+    assert raw_history_start(30, str(tmp_path), NOW) == datetime(2024, 1, 15)
+
+
+@pytest.mark.parametrize("since", [None, datetime(2024, 3, 1)])
+def test_rebuild_past_the_history_is_refused(since):
+    with pytest.raises(ValueError):
+        check_rebuild_window(since, datetime(2024, 3, 2))
+
+
+def test_rebuild_within_the_history_is_allowed():
+    check_rebuild_window(datetime(2024, 3, 2), datetime(2024, 3, 2))
+    check_rebuild_window(None, None)
+
+
+@pytest.mark.anyio
+async def test_refused_rebuild_keeps_existing_rollups(db):
+    blog_id = ObjectId()
+    await db.daily_blog_stats.insert_one({"blog_id": blog_id, "day": datetime(2024, 2, 1), "views": 40})
+    await db.visitor_sketches.insert_one({"blog_id": blog_id, "day": datetime(2024, 2, 1), "registers": b"", "version": 0})
+
+    with pytest.raises(ValueError):
+        await rebuild_rollups(db, None, history_start=datetime(2024, 3, 2))
+    with pytest.raises(ValueError):
+        await rebuild_visitor_sketches(db, datetime(2024, 2, 1), history_start=datetime(2024, 3, 2))
+
+    assert await db.daily_blog_stats.count_documents({}) == 1
+    assert await db.visitor_sketches.count_documents({}) == 1
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.rollups import (
+    decode_key,
+    encode_key,
+    read_depth_bucket,
+    read_progress_inc,
+    record_read_progress_many,
+    record_view_events,
+    referrer_domain,
+    view_events_inc,
+)
+
+
+@pytest.mark.parametrize("percentage, bucket", [(-5, "0"), (0, "0"), (24, "0"), (25, "25"), (79, "75"), (100, "100"), (140, "100")])
+def test_read_depth_bucket(percentage, bucket):
+    assert read_depth_bucket(percentage) == bucket
+
+
+def test_first_progress_of_a_view():
+    assert read_progress_inc(None, 30) == {"read.sum": 30, "read_depth.25": 1, "read.count": 1}
+
+
+def test_progress_moves_between_buckets_and_completes():
+    assert read_progress_inc(30, 90) == {
+        "read.sum": 60,
+        "read_depth.75": 1,
+        "read_depth.25": -1,
+        "read.completed": 1,
+    }
+
+
+def test_progress_within_a_bucket_only_adds_to_the_sum():
+    assert read_progress_inc(80, 85) == {"read.sum": 5}
+
+
+def test_view_events_inc_groups_by_blog_and_day():
+    blog_id = ObjectId()
+    events = [
+        {"blog_id": blog_id, "created_at": datetime(2024, 3, 1, 8), "referrer_domain": "news.example.com", "device": "mobile"},
+        {"blog_id": blog_id, "created_at": datetime(2024, 3, 1, 20), "referrer": None, "device": "desktop", "country": "IN"},
+        {"blog_id": blog_id, "created_at": datetime(2024, 3, 2, 1), "referrer": "https://www.example.com/a", "read_percentage": 100},
+    ]
+    incs = view_events_inc(events)
+
+    assert dict(incs[(blog_id, datetime(2024, 3, 1))]) == {
+        "views": 2,
+        "slots.views.32": 1,
+        "slots.views.80": 1,
+        "sources.news%2Eexample%2Ecom": 1,
+        "sources.direct": 1,
+        "devices.mobile": 1,
+        "devices.desktop": 1,
+        "countries.IN": 1,
+    }
+    assert dict(incs[(blog_id, datetime(2024, 3, 2))]) == {
+        "views": 1,
+        "slots.views.04": 1,
+        "sources.example%2Ecom": 1,
+        "devices.unknown": 1,
+        "read.sum": 100,
+        "read_depth.100": 1,
+        "read.count": 1,
+        "read.completed": 1,
+    }
+
+
+def test_keys_round_trip():
+    assert decode_key(encode_key("a.b$c%2E")) == "a.b$c%2E"
+    assert referrer_domain("https://WWW.Example.com:8080/x") == "example.com"
+    assert referrer_domain("not a url") is None
+
+
+@pytest.mark.anyio
+async def test_rollup_counters_accumulate(db):
+    blog_id = ObjectId()
+    day = datetime(2024, 3, 1)
+    events = [{"blog_id": blog_id, "created_at": datetime(2024, 3, 1, hour), "device": "mobile"} for hour in range(3)]
+
+    await record_view_events(db, events[:2])
+    await record_view_events(db, events[2:])
+    await record_read_progress_many(db, [(events[0], 50), (events[1], 20)])
+    await record_read_progress_many(db, [({**events[1], "read_percentage": 20}, 90)])
+
+    rollup = await db.daily_blog_stats.find_one({"blog_id": blog_id, "day": day})
+    assert rollup["views"] == 3
+    assert rollup["slots"] == {"views": {"00": 1, "04": 1, "08": 1}}
+    assert rollup["devices"] == {"mobile": 3}
+    assert rollup["read"] == {"sum": 140, "count": 2, "completed": 1}
+    assert rollup["read_depth"] == {"50": 1, "0": 0, "75": 1}
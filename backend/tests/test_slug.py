@@ -0,0 +1,37 @@
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.services.slug import next_slug, slug_matches_base, write_with_unique_slug
+
+
+@pytest.mark.anyio
+async def test_next_slug_counts_up(db):
+    assert [await next_slug(db, "hello") for _ in range(3)] == ["hello", "hello-1", "hello-2"]
+
+
+@pytest.mark.anyio
+async def test_slug_collision_resyncs_counter_and_retries(db):
+    await db.blogs.create_index("slug", unique=True)
+    # Written before the counters existed, so the counter knows nothing about them
+    await db.blogs.insert_many([{"slug": "hello"}, {"slug": "hello-4"}])
+
+    async def insert(slug):
+        await db.blogs.insert_one({"slug": slug})
+
+    assert await write_with_unique_slug(db, "hello", insert) == "hello-5"
+    assert await write_with_unique_slug(db, "hello", insert) == "hello-6"
+
+
+@pytest.mark.anyio
+async def test_other_duplicate_keys_are_not_retried(db):
+    async def insert(slug):
+        raise DuplicateKeyError("dup", details={"keyPattern": {"email": 1}})
+
+    with pytest.raises(DuplicateKeyError):
+        await write_with_unique_slug(db, "hello", insert)
+
+
+def test_slug_matches_base():
+    assert slug_matches_base("hello", "hello")
+    assert slug_matches_base("hello-12", "hello")
+    assert not slug_matches_base("hello-world", "hello")
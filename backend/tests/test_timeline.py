@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.timeline import Timeline, epoch_day, timeline_unit
+
+
+def test_epoch_day_respects_tz_offset():
+    moment = datetime(2024, 3, 10, 23, 30)
+    assert epoch_day(moment) == epoch_day(datetime(2024, 3, 10))
+    assert epoch_day(moment, tz_offset=60) == epoch_day(datetime(2024, 3, 11))
+    assert epoch_day(datetime(2024, 3, 10, 0, 30), tz_offset=-60) == epoch_day(datetime(2024, 3, 9))
+
+
+def test_daily_buckets():
+    timeline = Timeline(datetime(2024, 3, 1), datetime(2024, 3, 3, 12))
+    counts = timeline.count([datetime(2024, 3, 1, 5), datetime(2024, 3, 3, 23), datetime(2024, 3, 3), datetime(2024, 2, 28)])
+
+    assert timeline.points(counts) == [
+        {"date": "2024-03-01", "count": 1},
+        {"date": "2024-03-02", "count": 0},
+        {"date": "2024-03-03", "count": 2},
+    ]
+
+
+def test_local_days_shift_events_across_midnight():
+    # 23:30 UTC is already the next day at UTC+1
+    timeline = Timeline(datetime(2024, 3, 1), datetime(2024, 3, 2, 22), tz_offset=60)
+    assert timeline.count([datetime(2024, 3, 1, 23, 30)]) == [0, 1]
+
+
+def test_weeks_start_on_monday():
+    # 2024-03-06 is a Wednesday
+    timeline = Timeline(datetime(2024, 3, 6), datetime(2024, 3, 20), unit="week")
+    counts = timeline.count([datetime(2024, 3, 10), datetime(2024, 3, 11), datetime(2024, 3, 17)])
+
+    assert timeline.labels() == ["2024-03-04", "2024-03-11", "2024-03-18"]
+    assert counts == [1, 2, 0]
+
+
+def test_months_and_fold():
+    timeline = Timeline(datetime(2023, 12, 15), datetime(2024, 2, 10), unit="month")
+    day_counts = {epoch_day(datetime(2023, 12, 31)): 3, epoch_day(datetime(2024, 2, 1)): 2, epoch_day(datetime(2024, 3, 1)): 9}
+
+    assert timeline.labels() == ["2023-12-01", "2024-01-01", "2024-02-01"]
+    assert timeline.fold(day_counts) == [3, 0, 2]
+
+
+def test_auto_granularity_caps_points():
+    start = datetime(2024, 1, 1)
+    assert timeline_unit("auto", start, datetime(2024, 3, 1)) == "day"
+    assert timeline_unit("auto", start, datetime(2025, 1, 1)) == "week"
+    assert timeline_unit("auto", start, datetime(2028, 1, 1)) == "month"
+    assert timeline_unit("week", start, datetime(2024, 1, 2)) == "week"
+
+
+def test_unknown_unit():
+    with pytest.raises(ValueError):
+        Timeline(datetime(2024, 1, 1), datetime(2024, 1, 2), unit="year")
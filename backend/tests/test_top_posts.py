@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.utils.top_posts import rank_top_posts
+
+
+def test_most_viewed_posts_first():
+    blogs = [
+        {"_id": ObjectId(), "title": f"Post {i}", "slug": f"post-{i}", "created_at": datetime(2024, 1, i + 1)}
+        for i in range(8)
+    ]
+    views = {blog["_id"]: i * 10 for i, blog in enumerate(blogs)}
+    likes = {blogs[7]["_id"]: 3}
+
+    top = rank_top_posts(blogs, views, likes, {}, limit=3)
+
+    assert [post["slug"] for post in top] == ["post-7", "post-6", "post-5"]
+    assert top[0] == {
+        "id": str(blogs[7]["_id"]),
+        "title": "Post 7",
+        "slug": "post-7",
+        "views": 70,
+        "likes": 3,
+        "comments": 0,
+        "published_at": datetime(2024, 1, 8),
+    }
+
+
+def test_fewer_posts_than_the_limit():
+    blog = {"_id": ObjectId(), "title": "Only", "slug": "only", "created_at": datetime(2024, 1, 1), "published_at": datetime(2024, 1, 2)}
+
+    top = rank_top_posts([blog], {}, {}, {}, limit=5)
+
+    assert len(top) == 1
+    assert top[0]["views"] == 0
+    assert top[0]["published_at"] == datetime(2024, 1, 2)
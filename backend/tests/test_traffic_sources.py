@@ -0,0 +1,84 @@
+import pytest
+from bson import ObjectId
+
+from app.services import analytics
+from app.services.analytics import record_view
+from app.services.ingest import view_buffer
+from app.services.rollups import referrer_domain, referrer_source
+from app.utils.dedup import RecentKeys
+from app.utils.user_agent import classify_device
+
+IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148 Safari/604.1"
+ANDROID_PHONE = "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/120.0 Mobile Safari/537.36"
+ANDROID_TABLET = "Mozilla/5.0 (Linux; Android 13; SM-X700) AppleWebKit/537.36 Chrome/120.0 Safari/537.36"
+IPAD = "Mozilla/5.0 (iPad; CPU OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148 Safari/604.1"
+DESKTOP = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36"
+GOOGLEBOT = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
+
+
+@pytest.mark.parametrize("user_agent, device", [
+    (IPHONE, "mobile"),
+    (ANDROID_PHONE, "mobile"),
+    (ANDROID_TABLET, "tablet"),
+    (IPAD, "tablet"),
+    (DESKTOP, "desktop"),
+    (GOOGLEBOT, "bot"),
+    ("curl/8.4.0", "bot"),
+    ("", "unknown"),
+])
+def test_classify_device(user_agent, device):
+    assert classify_device(user_agent) == device
+
+
+@pytest.mark.parametrize("referrer, domain", [
+    ("https://www.Google.com/search?q=blogmind", "google.com"),
+    ("http://news.ycombinator.com:8080/item?id=1", "news.ycombinator.com"),
+    ("android-app://com.slack", "com.slack"),
+    ("not a url", None),
+    ("http://[::1", None),
+    ("", None),
+    (None, None),
+])
+def test_referrer_domain(referrer, domain):
+    assert referrer_domain(referrer) == domain
+
+
+def test_referrer_source_prefers_the_stored_domain():
+    assert referrer_source({"referrer_domain": "google.com", "referrer": "https://bing.com/"}) == "google.com"
+    assert referrer_source({"referrer_domain": None, "referrer": "https://bing.com/"}) == "direct"
+    # Events recorded before referrer_domain was stored
+    assert referrer_source({"referrer": "https://www.bing.com/search"}) == "bing.com"
+    assert referrer_source({}) == "direct"
+
+
+@pytest.fixture
+def pending(monkeypatch):
+    monkeypatch.setattr(analytics, "recent_views", RecentKeys(60, 100))
+    monkeypatch.setattr(view_buffer, "_events", [])
+    return view_buffer._events
+
+
+@pytest.mark.anyio
+async def test_views_store_referrer_domain_and_device(pending):
+    await record_view(str(ObjectId()), None, "1.2.3.4", IPHONE, referrer="https://www.google.com/search", device="desktop")
+
+    event = pending[0]
+    assert event["referrer_domain"] == "google.com"
+    assert event["device"] == "mobile"
+
+
+@pytest.mark.anyio
+async def test_client_device_is_used_only_without_a_user_agent(pending):
+    await record_view(str(ObjectId()), None, "1.2.3.4", "", device="tablet")
+    await record_view(str(ObjectId()), None, "1.2.3.4", "")
+
+    assert [event["device"] for event in pending] == ["tablet", "unknown"]
+    assert pending[1]["referrer_domain"] is None
+
+
+@pytest.mark.anyio
+async def test_bot_views_are_dropped(pending, monkeypatch):
+    monkeypatch.setattr(analytics.settings, "VIEW_BOT_FILTER_ENABLED", True)
+
+    assert await record_view(str(ObjectId()), None, "1.2.3.4", GOOGLEBOT) is None
+    assert pending == []
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.services import view_store
+from app.services.view_store import setup_view_events, view_event_filter
+
+
+@pytest.mark.anyio
+async def test_view_event_filter_finds_the_event_by_token(db):
+    view_id = ObjectId()
+    blog_id = ObjectId()
+    created_at = view_id.generation_time.replace(tzinfo=None) + timedelta(milliseconds=300)
+    await db.view_events.insert_many([
+        {"_id": view_id, "blog_id": blog_id, "created_at": created_at},
+        {"_id": ObjectId(), "blog_id": blog_id, "created_at": created_at},
+    ])
+
+    assert (await db.view_events.find_one(view_event_filter(view_id, blog_id)))["_id"] == view_id
+    assert await db.view_events.find_one(view_event_filter(view_id, ObjectId())) is None
+    assert await db.view_events.find_one(view_event_filter(view_id, blog_id, datetime(2020, 1, 1))) is None
+    assert (await db.view_events.find_one(view_event_filter(view_id, blog_id, created_at)))["_id"] == view_id
+
+
+@pytest.mark.anyio
+async def test_setup_replaces_the_old_blog_id_index(db, monkeypatch):
+    async def regular_collection(db, name):
+        return "collection"
+
+    # mongomock has no list_collections
+    monkeypatch.setattr(view_store, "collection_type", regular_collection)
+    await db.view_events.create_index("blog_id")
+    await db.view_events.create_index("created_at")
+
+    await setup_view_events(db, retention_days=30)
+
+    indexes = {tuple(index["key"]): index for index in (await db.view_events.index_information()).values()}
+    assert (("blog_id", 1),) not in indexes
+    assert (("blog_id", 1), ("created_at", 1)) in indexes
+    assert indexes[(("created_at", 1),)]["expireAfterSeconds"] == 30 * 24 * 60 * 60
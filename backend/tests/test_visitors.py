@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.visitors import (
+    count_author_visitors, count_unique_visitors, rebuild_visitor_sketches, record_visitors
+)
+
+WINDOW = (datetime(2024, 3, 1), datetime(2024, 3, 31))
+
+
+def view(blog_id, ip_address, day=1):
+    return {"_id": ObjectId(), "blog_id": blog_id, "created_at": datetime(2024, 3, day, 12),
+            "ip_address": ip_address, "user_agent": "test"}
+
+
+@pytest.fixture
+async def blogs(db):
+    blogs = [{"_id": ObjectId(), "author_id": "author-1"} for _ in range(3)]
+    blogs.append({"_id": ObjectId(), "author_id": "author-2"})
+    await db.blogs.insert_many(blogs)
+    return [blog["_id"] for blog in blogs]
+
+
+@pytest.mark.anyio
+async def test_author_sketches_count_each_visitor_once_across_posts(db, blogs):
+    # Every visitor reads all three of author-1's posts on two days
+    events = [view(blog_id, f"10.0.0.{i}", day) for blog_id in blogs[:3] for i in range(20) for day in (1, 2)]
+    events += [view(blogs[3], "10.0.1.1")]
+    await record_visitors(db, events)
+
+    assert await db.author_visitor_sketches.count_documents({"author_id": "author-1"}) == 2
+    assert await count_author_visitors(db, "author-1", *WINDOW) == 20
+    assert await count_author_visitors(db, "author-2", *WINDOW) == 1
+    assert await count_unique_visitors(db, blogs[:1], *WINDOW) == 20
+
+
+@pytest.mark.anyio
+async def test_views_of_deleted_blogs_only_go_to_the_blog_sketch(db, blogs):
+    await record_visitors(db, [view(ObjectId(), "10.0.0.1")])
+
+    assert await db.visitor_sketches.count_documents({}) == 1
+    assert await db.author_visitor_sketches.count_documents({}) == 0
+
+
+@pytest.mark.anyio
+async def test_rebuild_writes_blog_and_author_sketches(db, blogs):
+    events = [view(blog_id, f"10.0.0.{i}") for blog_id in blogs[:2] for i in range(5)]
+    await db.view_events.insert_many(events)
+    await record_visitors(db, events[:1])
+
+    written = await rebuild_visitor_sketches(db)
+
+    assert written == 3
+    assert await count_author_visitors(db, "author-1", *WINDOW) == 5
+    assert await count_unique_visitors(db, blogs[:2], *WINDOW) == 5